@@ -0,0 +1,84 @@
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from benchmarks.suite import BENCHMARKS
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json") # tracked, unlike the runs in RESULTS_DIR
+
+
+def _commit() -> Optional[str]:
+	try:
+		return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def run_benchmarks(pattern: str = "*") -> Dict[str, Any]:
+	results = {}
+	for name, benchmark in BENCHMARKS.items():
+		if not fnmatch.fnmatch(name, pattern):
+			continue
+		metric = benchmark()
+		results[name] = metric._asdict()
+		print(f"{name:<40} {metric.value:>14.2f} {metric.unit}", flush=True)
+	return {
+		"timestamp": datetime.now().isoformat(timespec="seconds"),
+		"commit": _commit(),
+		"python": platform.python_version(),
+		"machine": f"{platform.system()} {platform.machine()} {platform.processor()}".strip(),
+		"results": results
+	}
+
+
+def compare(run: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+	"""Names of the benchmarks that got worse than the baseline by more than `threshold` (0.2 = 20%)."""
+	regressions = []
+	print(f"\nCompared to {baseline.get('commit') or 'baseline'} ({baseline.get('timestamp')}):")
+	for name, result in run["results"].items():
+		old = baseline["results"].get(name)
+		if old is None or not old["value"]:
+			continue
+		change = result["value"] / old["value"] - 1 # positive = larger
+		worse = -change if result["higher_is_better"] else change
+		flag = "REGRESSION" if worse > threshold else ""
+		if flag:
+			regressions.append(name)
+		print(f"{name:<40} {old['value']:>14.2f} -> {result['value']:>14.2f} {result['unit']:<10} {change:+7.1%} {flag}")
+	return regressions
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Benchmark the engine, prompt rendering and the LLM harness')
+	parser.add_argument('--filter', '-k', type=str, default='*', help='Only run benchmarks matching this glob, e.g. "harness_call*"')
+	parser.add_argument('--output', '-o', type=str, default=None, help='JSON file for the results (default: benchmarks/results/<timestamp>.json)')
+	parser.add_argument('--baseline', '-b', type=str, default=BASELINE_PATH, help='Results to compare against (default: benchmarks/baseline.json)')
+	parser.add_argument('--threshold', '-t', type=float, default=0.2, help='Relative slowdown counted as a regression (default: 0.2)')
+	parser.add_argument('--save-baseline', action='store_true', help='Also store the results as the new baseline')
+	args = parser.parse_args()
+
+	run = run_benchmarks(args.filter)
+	os.makedirs(RESULTS_DIR, exist_ok=True)
+	output = args.output or os.path.join(RESULTS_DIR, f"{run['timestamp'].replace(':', '')}.json")
+	for path in [output] + ([args.baseline] if args.save_baseline else []):
+		with open(path, "w") as f:
+			json.dump(run, f, indent=2)
+	print(f"\nResults saved to {output}")
+
+	if args.save_baseline or not os.path.exists(args.baseline):
+		return
+	with open(args.baseline) as f:
+		regressions = compare(run, json.load(f), args.threshold)
+	if regressions:
+		print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,171 @@
+"""
+Benchmarks of the hot paths: the engine playing whole games, prompt rendering,
+conversation memory per turn and the per-call overhead of the LLM turn loop
+(with a stub provider, so only the harness is measured). Each benchmark returns
+a Metric; benchmarks.run times them, stores the results and compares them to a
+baseline.
+"""
+import random
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from hanabi.game import HanabiGame
+from hanabi.players import LLMPlayer, RandomPlayer
+
+TABLE_SIZES = (2, 3, 4, 5)
+GAME_LENGTHS = (0, 20, 40) # turns played before measuring mid-game paths
+
+
+class Metric(NamedTuple):
+	value: float
+	unit: str
+	higher_is_better: bool
+
+
+class StubPlayer(LLMPlayer):
+	"""LLM player whose provider answers instantly with a random legal move (filler text for THINK prompts)."""
+	conversation_start = 1
+
+	def __init__(self, cot: int = 0, stream: bool = True, rng: Optional[random.Random] = None):
+		super().__init__(stream=stream)
+		self.model = "stub"
+		self.cot = cot
+		self.rng = rng if rng is not None else random.Random()
+		self._load_prompts()
+		self.messages = [{"role": "system", "content": self.system_prompt}]
+
+	def _build_request(self, content: str, final: bool) -> Dict[str, Any]:
+		self.messages.append({"role": "user", "content": content})
+		return {"model": self.model, "messages": self._context_messages()}
+
+	def _send(self, request: Dict[str, Any]) -> str:
+		if not self._expect_move:
+			return "Thinking about the state. " * 20
+		legal = self.game.legal_moves(self.seat)
+		action = self.game.action_table.nth_listed(self.seat, legal, self.rng.randrange(legal.bit_count()))
+		return self.game.action_to_move(self.seat, action)
+
+	async def _send_async(self, request: Dict[str, Any]) -> str:
+		return self._send(request)
+
+	def _parse(self, response: str) -> str:
+		return response
+
+
+def measure(fn: Callable[[], Any], min_time: float = 0.2, repeat: int = 5) -> float:
+	"""Median seconds per call of fn, over `repeat` rounds of at least `min_time` seconds each."""
+	number = 1
+	while True: # calibrate the calls per round, as timeit does
+		start = time.perf_counter()
+		for _ in range(number):
+			fn()
+		elapsed = time.perf_counter() - start
+		if elapsed >= min_time:
+			break
+		number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+	rounds = [elapsed / number]
+	for _ in range(repeat - 1):
+		start = time.perf_counter()
+		for _ in range(number):
+			fn()
+		rounds.append((time.perf_counter() - start) / number)
+	return statistics.median(rounds)
+
+
+def _game(players: List[Any], seed: int) -> HanabiGame:
+	return HanabiGame(players, rng=random.Random(seed))
+
+
+def _safe_move(game: HanabiGame, player: int, rng: random.Random) -> str:
+	"""
+	A move that cannot cost a life and draws as few cards as possible: a clue while there
+	are tokens, else a card the engine knows is playable, else a discard.
+	"""
+	moves = [game.action_to_move(player, action) for action in game.action_table.listed(player, game.legal_moves(player))]
+	clues = [move for move in moves if move.startswith("C")]
+	if clues:
+		return rng.choice(clues)
+	playable = [i for i, card in enumerate(game.hands[player]) if game.play_area[card.color] == card.number - 1]
+	if playable:
+		return f"P{rng.choice(playable) + 1}"
+	return rng.choice([move for move in moves if move.startswith("D")])
+
+
+def _advance(game: HanabiGame, turns: int, rng: random.Random):
+	"""
+	Play `turns` moves through the regular turn path (prompts and log included). Random
+	play usually ends the game before turn 40, so these moves never cost a life.
+	"""
+	game.start_game(verbosity=0)
+	while game.turns_played < turns and not game.is_over():
+		player = game.current_player
+		game.prepare_turn(verbosity=0)
+		game.apply_turn(_safe_move(game, player, rng), verbosity=0)
+	assert game.turns_played == turns, f"the game ended at turn {game.turns_played}, before turn {turns}"
+
+
+def play_random(num_players: int) -> Metric:
+	"""Whole games of RandomPlayers (observations, no prompts), as run for the test provider."""
+	seeds = iter(range(10**9))
+	def play():
+		seed = next(seeds)
+		_game([RandomPlayer(random.Random(seed * 10 + i)) for i in range(num_players)], seed).play_game(verbosity=0)
+	return Metric(1 / measure(play), "games/s", True)
+
+
+def game_state(num_players: int, turns: int) -> Metric:
+	"""get_game_state of the player to move after `turns` turns."""
+	game = _game([RandomPlayer() for _ in range(num_players)], turns)
+	_advance(game, turns, random.Random(turns))
+	player = game.current_player
+	return Metric(measure(lambda: game.get_game_state(player, player)) * 1e6, "us/call", False)
+
+
+def prompt(num_players: int, turns: int) -> Metric:
+	"""Full prompt of the player to move (state plus the turns since their last move) after `turns` turns."""
+	game = _game([StubPlayer() for _ in range(num_players)], turns)
+	_advance(game, turns, random.Random(turns))
+	return Metric(measure(lambda: game.render_observation(game.get_observation(game.current_player))) * 1e6, "us/call", False)
+
+
+def history_memory(num_players: int, cot: int = 0) -> Metric:
+	"""Memory held by a finished game of StubPlayers (conversations, log, states), per turn played."""
+	bytes_per_turn = []
+	for seed in range(3):
+		tracemalloc.start()
+		try:
+			game = _game([StubPlayer(cot=cot, rng=random.Random(seed * 10 + i)) for i in range(num_players)], seed)
+			before = tracemalloc.get_traced_memory()[0]
+			game.play_game(verbosity=0)
+			bytes_per_turn.append((tracemalloc.get_traced_memory()[0] - before) / game.turns_played)
+		finally:
+			tracemalloc.stop()
+	return Metric(statistics.median(bytes_per_turn), "bytes/turn", False)
+
+
+def harness_call(num_players: int, cot: int, stream: bool) -> Metric:
+	"""Time per LLM call of whole games of StubPlayers: prompts, context, telemetry, move parsing and the engine."""
+	seeds = iter(range(10**9))
+	calls = []
+	def play():
+		seed = next(seeds)
+		players = [StubPlayer(cot=cot, stream=stream, rng=random.Random(seed * 10 + i)) for i in range(num_players)]
+		game = _game(players, seed)
+		game.play_game(verbosity=0)
+		calls.append(game.turns_played * (cot + 1))
+	per_game = measure(play)
+	return Metric(per_game / statistics.mean(calls) * 1e6, "us/call", False)
+
+
+BENCHMARKS: Dict[str, Callable[[], Metric]] = {}
+for n in TABLE_SIZES:
+	BENCHMARKS[f"play_random[{n}p]"] = lambda n=n: play_random(n)
+	for turns in GAME_LENGTHS:
+		BENCHMARKS[f"get_game_state[{n}p,turn{turns}]"] = lambda n=n, t=turns: game_state(n, t)
+		BENCHMARKS[f"prompt[{n}p,turn{turns}]"] = lambda n=n, t=turns: prompt(n, t)
+	BENCHMARKS[f"history_memory[{n}p]"] = lambda n=n: history_memory(n)
+	BENCHMARKS[f"history_memory[{n}p,cot1]"] = lambda n=n: history_memory(n, cot=1)
+	for cot in (0, 1):
+		BENCHMARKS[f"harness_call[{n}p,cot{cot}]"] = lambda n=n, c=cot: harness_call(n, c, stream=True)
+	BENCHMARKS[f"harness_call[{n}p,cot0,nostream]"] = lambda n=n: harness_call(n, 0, stream=False)
@@ -0,0 +1,42 @@
+# Maximum number of games played at the same time for each provider when
+# experiments run concurrently (see --concurrency in main.py)
+PROVIDER_CONCURRENCY = {
+	"openai": 8,
+	"anthropic": 4,
+	"google": 4,
+	"groq": 4,
+	"xai": 4,
+	"test": 32
+}
+
+# Providers whose players run locally and only use the CPU. Their games can be
+# spread over worker processes (see --workers in main.py)
+OFFLINE_PROVIDERS = {"test"}
+
+# Requests and tokens per minute allowed for each provider, shared by all games
+# in the process (see hanabi.ratelimit). Set these to your account's limits; a
+# provider without an entry is not paced, but its failed requests are still retried.
+PROVIDER_RATE_LIMITS = {
+	"openai": {"requests_per_minute": 500, "tokens_per_minute": 200000},
+	"anthropic": {"requests_per_minute": 50, "tokens_per_minute": 40000},
+	"google": {"requests_per_minute": 60},
+	"groq": {"requests_per_minute": 30, "tokens_per_minute": 6000},
+	"xai": {"requests_per_minute": 60}
+}
+
+# Connection pool and timeouts of the API clients, which are shared by all
+# players with the same provider, base URL and key (see hanabi.clients)
+HTTP_CLIENT_SETTINGS = {
+	"max_connections": 100,
+	"max_keepalive_connections": 20,
+	"timeout": 600.0,
+	"connect_timeout": 10.0,
+	"http2": True
+}
+
+# Providers whose games can be played in lockstep through a batch API (see
+# --batch in main.py), with the batch format they use
+BATCH_PROVIDERS = {
+	"openai": "openai",
+	"anthropic": "anthropic"
+}
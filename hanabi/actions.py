@@ -0,0 +1,201 @@
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Sequence
+
+COLORS = 'RGBYW'
+NUM_COLORS = 5
+NUM_RANKS = 5
+NUM_CLUES = NUM_COLORS + NUM_RANKS # clue attributes: colors R..W, then numbers 1..5
+EMPTY = -1 # empty hand slot
+
+# moves as accepted by HanabiGame: P<card>, D<card> or C<target><C color|N number><positions>
+MOVE_PATTERN = re.compile(
+	r"(?P<action>[PD])(?P<card>[1-9])"
+	r"|C(?P<target>[1-9])(?:C(?P<color>[RGBYW])|N(?P<number>[1-5]))(?P<positions>[1-9]+)"
+)
+# the same grammar as a standalone token inside free text, e.g. "I'll play P2."
+MOVE_TOKEN = re.compile(rf"(?<![A-Za-z0-9])(?:{MOVE_PATTERN.pattern})(?![A-Za-z0-9])")
+
+
+class Move(NamedTuple):
+	kind: str # 'P', 'D' or 'C'
+	card: int # card index of a play or discard
+	target: int # player receiving a clue
+	attribute: int # clue attribute, see NUM_CLUES
+	positions: int # clued positions as a bitmask
+
+
+@lru_cache(maxsize=4096)
+def parse_move(move: str) -> Optional[Move]:
+	"""Parse a move string, or None if it is malformed. Clue positions may come in any order."""
+	match = MOVE_PATTERN.fullmatch(move)
+	if match is None:
+		return None
+	if match["action"]:
+		return Move(match["action"], int(match["card"]) - 1, -1, -1, 0)
+	if match["color"]:
+		attribute = COLORS.index(match["color"])
+	else:
+		attribute = NUM_COLORS + int(match["number"]) - 1
+	positions = 0
+	for position in match["positions"]:
+		positions |= 1 << (int(position) - 1)
+	return Move('C', -1, int(match["target"]) - 1, attribute, positions)
+
+
+def extract_move(text: str, complete: bool = True) -> Optional[str]:
+	"""
+	Move token in a model output, ignoring any text around it. A complete output
+	gives its last move, as models weigh options before settling on one ("I
+	considered P1 but will D3"). While the output is still streaming (complete=False),
+	it is the first move that something follows, as a token at the very end may go
+	on (e.g. more clue positions).
+	"""
+	if complete:
+		matches = list(MOVE_TOKEN.finditer(text))
+		return matches[-1].group() if matches else None
+	for match in MOVE_TOKEN.finditer(text):
+		if match.end() < len(text):
+			return match.group()
+	return None
+
+
+def num_actions(num_players: int, hand_size: int = 4) -> int:
+	"""
+	Actions are encoded relative to the player to move:
+	[play 0..H-1] [discard 0..H-1] then, for each target offset 1..P-1,
+	[clue color R,G,B,Y,W] [clue number 1..5]. A clue action always
+	reveals exactly the matching positions of the target hand.
+	"""
+	return 2 * hand_size + (num_players - 1) * NUM_CLUES
+
+
+def clue_positions(hand: Sequence[int], attribute: int) -> List[int]:
+	"""Positions of the cards (card codes) of a hand that a clue of `attribute` touches."""
+	if attribute < NUM_COLORS:
+		return [i for i, c in enumerate(hand) if c != EMPTY and c // NUM_RANKS == attribute]
+	return [i for i, c in enumerate(hand) if c != EMPTY and c % NUM_RANKS == attribute - NUM_COLORS]
+
+
+def encode_move(move: str, player: int, hands: List[List[int]], hand_size: int = 4) -> int:
+	"""
+	Encode a move string (as accepted by HanabiGame) into an action id, or -1 if it has no
+	encoding. A clue action always reveals the matching positions of the target hand (card
+	codes, as for decode_action), so a clue listing any other positions has none.
+	"""
+	parsed = parse_move(move)
+	if parsed is None:
+		return -1
+	if parsed.kind != 'C':
+		if parsed.card >= hand_size:
+			return -1
+		return parsed.card if parsed.kind == 'P' else hand_size + parsed.card
+	num_players = len(hands)
+	offset = (parsed.target - player) % num_players
+	if offset == 0 or parsed.target >= num_players:
+		return -1
+	if parsed.positions != sum(1 << i for i in clue_positions(hands[parsed.target], parsed.attribute)):
+		return -1
+	return 2 * hand_size + (offset - 1) * NUM_CLUES + parsed.attribute
+
+
+def decode_action(action: int, player: int, hands: List[List[int]], hand_size: int = 4) -> str:
+	"""Decode an action id into a move string, using the target hand (card codes) to fill in clue positions."""
+	num_players = len(hands)
+	if action < hand_size:
+		return f"P{action+1}"
+	if action < 2 * hand_size:
+		return f"D{action-hand_size+1}"
+	offset, kind = divmod(action - 2 * hand_size, NUM_CLUES)
+	target = (player + offset + 1) % num_players
+	if kind < NUM_COLORS:
+		value = COLORS[kind]
+		clue_type = 'C'
+	else:
+		value = str(kind - NUM_COLORS + 1)
+		clue_type = 'N'
+	return f"C{target+1}{clue_type}{value}{''.join(str(i+1) for i in clue_positions(hands[target], kind))}"
+
+
+class ActionTable:
+	"""
+	Precomputed action layout of one table size (see num_actions). Legal moves
+	are returned as an int bitmask over action ids, built from each hand's
+	clue attribute bits, so no move string is built or parsed to find them.
+	"""
+	def __init__(self, num_players: int, hand_size: int = 4):
+		self.num_players = num_players
+		self.hand_size = hand_size
+		self.num_actions = num_actions(num_players, hand_size)
+		# plays and discards of the first n cards
+		self.play_bits = [(1 << n) - 1 for n in range(hand_size + 1)]
+		self.discard_bits = [((1 << n) - 1) << hand_size for n in range(hand_size + 1)]
+		# first clue action of each target offset (offset 0 would be the player itself)
+		self.clue_shift = [-1] + [2 * hand_size + (offset - 1) * NUM_CLUES for offset in range(1, num_players)]
+		# (first action, width) of the action blocks of each player with clue targets in seat order,
+		# the order RandomPlayer has always listed moves in
+		self.seat_blocks = [
+			[(0, 2 * hand_size)] + [
+				(self.clue_shift[(target - player) % num_players], NUM_CLUES)
+				for target in range(num_players) if target != player
+			]
+			for player in range(num_players)
+		]
+		# (kind, card or target offset, attribute) of every action
+		self.layout = [self._describe(action) for action in range(self.num_actions)]
+
+	def _describe(self, action: int):
+		if action < self.hand_size:
+			return ('P', action, -1)
+		if action < 2 * self.hand_size:
+			return ('D', action - self.hand_size, -1)
+		offset, attribute = divmod(action - 2 * self.hand_size, NUM_CLUES)
+		return ('C', offset + 1, attribute)
+
+	def legal_mask(self, player: int, hand_size: int, info_tokens: int, hand_attributes: List[int]) -> int:
+		"""Bitmask of the legal actions of `player`, given the attribute bits of every hand."""
+		mask = self.play_bits[hand_size]
+		if info_tokens < 8:
+			mask |= self.discard_bits[hand_size]
+		if info_tokens > 0:
+			for offset in range(1, self.num_players):
+				mask |= hand_attributes[(player + offset) % self.num_players] << self.clue_shift[offset]
+		return mask
+
+	def move_string(self, player: int, action: int, clue_masks: List[List[int]], hand_sizes: Sequence[int]) -> str:
+		"""Move string of an action id, with the positions of a clue taken from the target hand's clue bitmasks."""
+		kind, index, attribute = self.layout[action]
+		if kind != 'C':
+			return f"{kind}{index+1}"
+		target = (player + index) % self.num_players
+		clue = f"C{COLORS[attribute]}" if attribute < NUM_COLORS else f"N{attribute - NUM_COLORS + 1}"
+		positions = clue_masks[target][attribute]
+		return f"C{target+1}{clue}" + "".join(str(i+1) for i in range(hand_sizes[target]) if positions >> i & 1)
+
+	def listed(self, player: int, mask: int) -> List[int]:
+		"""Action ids of a mask in seat order."""
+		actions = []
+		for shift, width in self.seat_blocks[player]:
+			block = mask >> shift & ((1 << width) - 1)
+			while block:
+				low = block & -block
+				actions.append(shift + low.bit_length() - 1)
+				block ^= low
+		return actions
+
+	def nth_listed(self, player: int, mask: int, n: int) -> int:
+		"""listed(player, mask)[n], without building the list."""
+		for shift, width in self.seat_blocks[player]:
+			block = mask >> shift & ((1 << width) - 1)
+			count = block.bit_count()
+			if n < count:
+				for _ in range(n):
+					block &= block - 1 # drop the lowest set bit
+				return shift + (block & -block).bit_length() - 1
+			n -= count
+		raise IndexError("mask has fewer than n + 1 actions")
+
+
+@lru_cache(maxsize=None)
+def action_table(num_players: int, hand_size: int = 4) -> ActionTable:
+	return ActionTable(num_players, hand_size)
@@ -0,0 +1,344 @@
+import json
+import os
+import random
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from hanabi.game import HanabiGame
+from hanabi.ratelimit import is_provider_error, is_transient, request_tokens
+
+BATCH_FORMATS = ("openai", "anthropic")
+
+# HTTP status of the error types in Anthropic batch results, as their API returns them
+ANTHROPIC_ERROR_STATUS = {
+	"invalid_request_error": 400, "authentication_error": 401, "permission_error": 403, "not_found_error": 404,
+	"request_too_large": 413, "rate_limit_error": 429, "api_error": 500, "overloaded_error": 529
+}
+
+
+class BatchItem(NamedTuple):
+	response: Any # provider response, as LLMPlayer._send returns it (None if the request failed)
+	error: Optional[str]
+	status: Optional[int] = None # HTTP status of a failed request, None if it was never answered (e.g. expired)
+
+
+class BatchItemError(Exception):
+	"""A failed batch request, with the HTTP status the same request would have failed with (see hanabi.ratelimit)."""
+	def __init__(self, message: str, status_code: Optional[int] = None):
+		super().__init__(message)
+		self.status_code = status_code
+
+
+def _openai_input(custom_id: str, request: Dict[str, Any]) -> Dict[str, Any]:
+	return {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": request}
+
+
+def _anthropic_input(custom_id: str, request: Dict[str, Any]) -> Dict[str, Any]:
+	# beta headers can't be set per batch request
+	return {"custom_id": custom_id, "params": {k: v for k, v in request.items() if k != "extra_headers"}}
+
+
+def _openai_item(line: Dict[str, Any]) -> BatchItem:
+	response = line.get("response") or {}
+	if line.get("error") or response.get("status_code") != 200:
+		return BatchItem(None, json.dumps(line.get("error") or response.get("body")), response.get("status_code"))
+	from openai.types.chat import ChatCompletion # SDKs are imported on first use, see hanabi.registry
+	return BatchItem(ChatCompletion.model_validate(response["body"]), None)
+
+
+def _anthropic_item(line: Dict[str, Any]) -> BatchItem:
+	result = line["result"]
+	if result["type"] != "succeeded":
+		error = result.get("error") or {} # expired and canceled requests have none
+		status = ANTHROPIC_ERROR_STATUS.get((error.get("error") or {}).get("type"), 500) if error else None
+		return BatchItem(None, json.dumps(error or result["type"]), status)
+	from anthropic.types import Message
+	return BatchItem(Message.model_validate(result["message"]), None)
+
+
+class BatchBackend(ABC):
+	"""Submits a set of requests as one batch and polls until the batch has finished."""
+	poll_interval: float = 30.0 # seconds
+
+	@abstractmethod
+	def submit(self, requests: Dict[str, Dict[str, Any]]) -> str:
+		"""Submit requests by custom ID. Returns the batch ID."""
+		pass
+
+	@abstractmethod
+	def results(self, batch_id: str) -> Optional[Dict[str, BatchItem]]:
+		"""Results by custom ID, or None while the batch is still running."""
+		pass
+
+	def run(self, requests: Dict[str, Dict[str, Any]]) -> Dict[str, BatchItem]:
+		batch_id = self.submit(requests)
+		while True:
+			results = self.results(batch_id)
+			if results is not None:
+				return results
+			time.sleep(self.poll_interval)
+
+
+class OpenAIBatchBackend(BatchBackend):
+	"""OpenAI Batch API (also offered by other compatible APIs, through the client's base_url)."""
+	def __init__(self, client: Any, poll_interval: float = 30.0):
+		self.client = client
+		self.poll_interval = poll_interval
+
+	def submit(self, requests):
+		lines = "".join(json.dumps(_openai_input(custom_id, request)) + "\n" for custom_id, request in requests.items())
+		input_file = self.client.files.create(file=("batch.jsonl", lines.encode()), purpose="batch")
+		batch = self.client.batches.create(input_file_id=input_file.id, endpoint="/v1/chat/completions", completion_window="24h")
+		return batch.id
+
+	def results(self, batch_id):
+		batch = self.client.batches.retrieve(batch_id)
+		if batch.status in ("validating", "in_progress", "finalizing", "cancelling"):
+			return None
+		items = {}
+		for file_id in (batch.output_file_id, batch.error_file_id):
+			if file_id:
+				for line in self.client.files.content(file_id).text.splitlines():
+					if line:
+						line = json.loads(line)
+						items[line["custom_id"]] = _openai_item(line)
+		return items # requests of a failed or expired batch are missing, and get resubmitted
+
+
+class AnthropicBatchBackend(BatchBackend):
+	"""Anthropic Message Batches API."""
+	def __init__(self, client: Any, poll_interval: float = 30.0):
+		self.client = client
+		self.poll_interval = poll_interval
+
+	def submit(self, requests):
+		batch = self.client.messages.batches.create(
+			requests=[_anthropic_input(custom_id, request) for custom_id, request in requests.items()]
+		)
+		return batch.id
+
+	def results(self, batch_id):
+		if self.client.messages.batches.retrieve(batch_id).processing_status != "ended":
+			return None
+		return {
+			entry.custom_id: _anthropic_item(entry.model_dump())
+			for entry in self.client.messages.batches.results(batch_id)
+		}
+
+
+def random_move_responder(rng: Optional[random.Random] = None) -> Callable[[Dict[str, Any]], str]:
+	"""Offline stand-in for a model: answers every request with a random play or discard."""
+	rng = rng if rng is not None else random.Random()
+	return lambda request: f"{rng.choice('PD')}{rng.randint(1, 4)}"
+
+
+class FileBatchBackend(BatchBackend):
+	"""
+	Local stand-in for a batch endpoint. A batch is written to <directory>/<id>.jsonl
+	in the provider's batch input format, and it has finished once <id>.output.jsonl
+	exists in the provider's output format. With `respond` (request -> output text),
+	the output file is written right away; without it, something else has to write it.
+	"""
+	def __init__(
+			self,
+			directory: str,
+			batch_format: str = "openai",
+			respond: Optional[Callable[[Dict[str, Any]], str]] = None,
+			poll_interval: float = 1.0
+		):
+		if batch_format not in BATCH_FORMATS:
+			raise ValueError(f"Unknown batch format: {batch_format}")
+		self.directory = directory
+		self.batch_format = batch_format
+		self.respond = respond
+		self.poll_interval = poll_interval
+		os.makedirs(directory, exist_ok=True)
+
+	def _path(self, batch_id: str, suffix: str = "") -> str:
+		return os.path.join(self.directory, f"{batch_id}{suffix}.jsonl")
+
+	def submit(self, requests):
+		batch_id = f"batch_{uuid.uuid4().hex}"
+		to_input = _openai_input if self.batch_format == "openai" else _anthropic_input
+		with open(self._path(batch_id), "w") as f:
+			for custom_id, request in requests.items():
+				f.write(json.dumps(to_input(custom_id, request)) + "\n")
+		if self.respond is not None:
+			self._answer(batch_id)
+		return batch_id
+
+	def _answer(self, batch_id: str):
+		with open(self._path(batch_id)) as f:
+			inputs = [json.loads(line) for line in f]
+		with open(self._path(batch_id, ".output"), "w") as f:
+			for line in inputs:
+				f.write(json.dumps(self._output(line)) + "\n")
+
+	def _output(self, line: Dict[str, Any]) -> Dict[str, Any]:
+		request = line.get("body") or line.get("params")
+		text = self.respond(request)
+		prompt_tokens, completion_tokens = request_tokens(request), len(text) // 4 + 1
+		if self.batch_format == "anthropic":
+			return {"custom_id": line["custom_id"], "result": {"type": "succeeded", "message": {
+				"id": f"msg_{uuid.uuid4().hex}", "type": "message", "role": "assistant", "model": request["model"],
+				"content": [{"type": "text", "text": text}], "stop_reason": "end_turn", "stop_sequence": None,
+				"usage": {"input_tokens": prompt_tokens, "output_tokens": completion_tokens}
+			}}}
+		return {"custom_id": line["custom_id"], "error": None, "response": {"status_code": 200, "body": {
+			"id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion", "created": int(time.time()), "model": request["model"],
+			"choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}],
+			"usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+		}}}
+
+	def results(self, batch_id):
+		path = self._path(batch_id, ".output")
+		if not os.path.exists(path):
+			return None
+		to_item = _openai_item if self.batch_format == "openai" else _anthropic_item
+		with open(path) as f:
+			return {line["custom_id"]: to_item(line) for line in map(json.loads, f) if line}
+
+
+class _Turn:
+	"""A turn in progress in one game: the player's request generator and the call being made."""
+	def __init__(self, game: HanabiGame, game_state: Any):
+		self.game = game
+		self.game_state = game_state
+		self.player = game.players[game.current_player]
+		self.steps = self.player._turn(game_state)
+		self.request = next(self.steps)
+		self.call: Dict[str, Any] = {}
+		self.move: Optional[str] = None
+
+
+class LockstepRunner:
+	"""
+	Plays several games of the same config in lockstep through a batch API. At each
+	step the request of the player to move in every unfinished game goes into one
+	batch (chain of thought turns take one batch per call), the outputs are fed
+	back into the players' turns, and then all moves are applied at once with the
+	usual HanabiGame.apply_turn. Cached outputs are used without a batch. Failed
+	requests are sorted as in LLMPlayer._generate_move: transient failures (and
+	requests the batch never answered) are resubmitted with the next batch up to
+	max_resubmits times, after which their game is stopped like on a ProviderError
+	(its checkpoint is kept); other provider errors, e.g. a bad key, stop the game
+	right away, and errors about the request itself are played as an "ERROR" move.
+	"""
+	def __init__(
+			self,
+			games: List[HanabiGame],
+			backend: BatchBackend,
+			checkpoints: Optional[List[Any]] = None,
+			max_resubmits: int = 2
+		):
+		self.games = games
+		self.backend = backend
+		self.checkpoints = checkpoints if checkpoints is not None else [None] * len(games)
+		self.max_resubmits = max_resubmits
+		self.failed: Dict[int, str] = {} # game index -> error
+
+	def run(self) -> List[Optional[int]]:
+		"""Play all games to the end. Returns the scores, None for games that were stopped."""
+		for game, checkpoint in zip(self.games, self.checkpoints):
+			game.start_game(verbosity=0)
+			if checkpoint is not None:
+				game._resume(checkpoint, verbosity=0)
+		while True:
+			active = [i for i, game in enumerate(self.games) if i not in self.failed and not game.is_over()]
+			if not active:
+				break
+			self._step(active)
+		return [None if i in self.failed else game.end_game(verbosity=0) for i, game in enumerate(self.games)]
+
+	def _step(self, active: List[int]):
+		turns = {i: _Turn(self.games[i], self.games[i].prepare_turn(verbosity=0)) for i in active}
+		waiting = dict(turns)
+		while waiting:
+			self._complete(waiting)
+			for i in list(waiting):
+				if waiting[i].move is not None or i in self.failed:
+					del waiting[i]
+		for i, turn in turns.items():
+			if i in self.failed:
+				continue
+			game, actor, turn_number = turn.game, turn.game.current_player, turn.game.turns_played
+			turn.player.history.append((turn.game_state, turn.move))
+			game.apply_turn(turn.move, verbosity=0)
+			if self.checkpoints[i] is not None:
+				game._save_turn(self.checkpoints[i], turn_number, actor, turn.move)
+
+	def _stop(self, i: int, turn: _Turn, start: float):
+		"""Stop game i on the error of its current call, like a ProviderError."""
+		turn.player._finish_call(turn.call, start)
+		self.failed[i] = turn.call["error"]
+		print(f"Game {i + 1} of the batch stopped by a provider error: {self.failed[i]} (resume with --resume)")
+
+	def _complete(self, turns: Dict[int, _Turn]):
+		"""Get the output of the current request of every turn, then advance the turns."""
+		outputs: Dict[int, str] = {}
+		requests: Dict[str, Dict[str, Any]] = {}
+		for i, turn in turns.items():
+			turn.call, start = turn.player._new_call(), time.perf_counter()
+			cache = turn.player.cache
+			if cache is not None and cache.enabled:
+				output = cache.get(turn.player._cache_key(turn.request, streamed=False)) # raises CacheMiss in replay mode
+				if output is not None:
+					turn.call["cached"] = True
+					turn.player._finish_call(turn.call, start)
+					outputs[i] = output
+					continue
+			requests[f"{i}-{turn.game.turns_played}-{turn.call['call']}"] = turn.request
+
+		resubmits = 0
+		start = time.perf_counter()
+		while requests:
+			results = self.backend.run(requests)
+			for custom_id, request in list(requests.items()):
+				item = results.get(custom_id, BatchItem(None, "missing from batch results"))
+				i = int(custom_id.split("-")[0])
+				turn = turns[i]
+				if item.error is not None:
+					error = BatchItemError(item.error, item.status)
+					if item.status is None or is_transient(error):
+						turn.call["error"] = item.error # resubmitted
+						continue
+					del requests[custom_id]
+					if is_provider_error(error): # resubmitting won't help
+						turn.call["error"] = item.error
+						self._stop(i, turn, start)
+						continue
+					turn.player._finish_call(turn.call, start, error) # e.g. over the context length, as in LLMPlayer._generate_move
+					print(f"Error generating move: {error}")
+					turn.move = "ERROR"
+					continue
+				del requests[custom_id]
+				turn.call["error"] = None # an earlier submission may have failed
+				turn.call.update(turn.player._usage(item.response))
+				try:
+					output = turn.player._parse(item.response)
+				except Exception as e: # unreadable output, played as an invalid move as in LLMPlayer._generate_move
+					turn.player._finish_call(turn.call, start, e)
+					print(f"Error generating move: {e}")
+					turn.move = "ERROR"
+					continue
+				turn.player._finish_call(turn.call, start)
+				cache = turn.player.cache
+				if cache is not None:
+					cache.put(turn.player._cache_key(turn.request, streamed=False), output) # batch outputs are complete
+				outputs[i] = output
+			if requests and resubmits == self.max_resubmits:
+				for custom_id in requests:
+					i = int(custom_id.split("-")[0])
+					self._stop(i, turns[i], start)
+				break
+			for custom_id in requests:
+				turns[int(custom_id.split("-")[0])].call["retries"] += 1
+			resubmits += 1
+
+		for i, output in outputs.items():
+			turn = turns[i]
+			try:
+				turn.request = turn.steps.send(output)
+			except StopIteration as done:
+				turn.move = done.value
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+CACHE_MODES = ("passthrough", "record", "replay")
+
+
+class CacheMiss(Exception):
+	"""Raised in replay mode when a request is not in the cache."""
+	pass
+
+
+class ResponseCache:
+	"""
+	Content-addressed store of LLM outputs, keyed on a hash of everything that
+	determines a response (player class, model, base URL, system prompt, the full
+	request args, and whether a PLAY response was streamed, as a streamed one ends
+	at the move; see LLMPlayer._cache_key). Modes:
+	- passthrough: the cache is not used
+	- record: serve hits from the cache, call the API on a miss and store the output
+	- replay: serve hits from the cache, raise CacheMiss on a miss (no network)
+	Least recently used entries are evicted once the stored outputs exceed max_bytes.
+	"""
+	def __init__(self, path: str = "results/response_cache.sqlite", mode: str = "record", max_bytes: int = 1 << 30):
+		if mode not in CACHE_MODES:
+			raise ValueError(f"Unknown cache mode: {mode}")
+		self.path = path
+		self.mode = mode
+		self.max_bytes = max_bytes
+		self.hits = 0
+		self.misses = 0
+		self._lock = threading.Lock()
+		self._db = None
+		if mode != "passthrough":
+			os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+			self._db = sqlite3.connect(path, check_same_thread=False)
+			self._db.execute("PRAGMA journal_mode=WAL")
+			self._db.execute(
+				"CREATE TABLE IF NOT EXISTS responses ("
+				"key TEXT PRIMARY KEY, output TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+			)
+			self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+			self._db.commit()
+			self._total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+	@property
+	def enabled(self) -> bool:
+		return self.mode != "passthrough"
+
+	@staticmethod
+	def key(identity: Dict[str, Any], request: Dict[str, Any]) -> str:
+		payload = json.dumps({"identity": identity, "request": request}, sort_keys=True, default=str)
+		return hashlib.sha256(payload.encode()).hexdigest()
+
+	def get(self, key: str) -> Optional[str]:
+		if not self.enabled:
+			return None
+		with self._lock:
+			row = self._db.execute("SELECT output FROM responses WHERE key = ?", (key,)).fetchone()
+			if row is not None:
+				self.hits += 1
+				self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+				self._db.commit()
+				return row[0]
+			self.misses += 1
+		if self.mode == "replay":
+			raise CacheMiss(f"No cached response for request {key[:12]}")
+		return None
+
+	def put(self, key: str, output: str):
+		if self.mode != "record":
+			return
+		size = len(output.encode())
+		with self._lock:
+			previous = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+			self._db.execute(
+				"INSERT OR REPLACE INTO responses (key, output, size, last_used) VALUES (?, ?, ?, ?)",
+				(key, output, size, time.time())
+			)
+			self._total_bytes += size - (previous[0] if previous else 0)
+			if self._total_bytes > self.max_bytes:
+				self._evict()
+			self._db.commit()
+
+	def _evict(self):
+		# drop least recently used entries until 90% of the budget is left
+		target = int(self.max_bytes * 0.9)
+		rows = self._db.execute("SELECT key, size FROM responses ORDER BY last_used")
+		evicted = []
+		for key, size in rows:
+			if self._total_bytes <= target:
+				break
+			evicted.append((key,))
+			self._total_bytes -= size
+		self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+	def close(self):
+		if self._db is not None:
+			self._db.close()
+			self._db = None
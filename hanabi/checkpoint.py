@@ -0,0 +1,82 @@
+import json
+import os
+from typing import Any, Dict, List
+from hanabi.game import HanabiGame, card_to_code
+
+
+def checkpoint_path(directory: str, experiment_id: int, run: int) -> str:
+	return os.path.join(directory, f"{experiment_id}-{run}.jsonl")
+
+
+def pending_checkpoints(directory: str) -> List[Dict[str, Any]]:
+	"""Headers of the games with a checkpoint in `directory`, i.e. games that were started but not recorded."""
+	if not os.path.isdir(directory):
+		return []
+	headers = []
+	for name in sorted(os.listdir(directory)):
+		if name.endswith(".jsonl"):
+			with open(os.path.join(directory, name)) as f:
+				line = f.readline()
+			if line.endswith("\n"): # a header cut short by a crash means no turn was saved either
+				headers.append(json.loads(line))
+	return sorted(headers, key=lambda h: (h["experiment_id"], h["run"]))
+
+
+class GameCheckpoint:
+	"""
+	Append-only checkpoint of one game: a header line identifying the game and
+	its deck, then one line per completed turn with the move and what the moving
+	player added to its state that turn (for LLM players, the new messages and
+	raw outputs). Opening an existing checkpoint resumes it: the moves are
+	replayed on the fresh game and each player gets its own turns back, so no
+	request is sent twice.
+	"""
+	def __init__(self, path: str, game: HanabiGame, **meta):
+		self.path = path
+		self.turns: List[Dict[str, Any]] = []
+		deck = bytes(card_to_code(c) for c in game.initial_deck).hex()
+		if os.path.exists(path):
+			header = self._load()
+			if header is not None:
+				if header["deck"] != deck:
+					raise ValueError(f"Checkpoint {path} is for a different deck")
+				return
+		os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+		with open(path, "w") as f:
+			f.write(json.dumps(dict(meta, num_players=len(game.players), deck=deck)) + "\n")
+
+	def _load(self):
+		with open(self.path, "rb") as f:
+			data = f.read()
+		lines = data.split(b"\n")
+		complete, torn = lines[:-1], lines[-1] # after a crash the last line may be incomplete
+		if torn:
+			with open(self.path, "r+b") as f:
+				f.truncate(len(data) - len(torn))
+		if not complete:
+			return None
+		self.turns = [json.loads(line) for line in complete[1:]]
+		return json.loads(complete[0])
+
+	def restore(self, game: HanabiGame) -> int:
+		"""Replay the saved turns on a game that was just started. Returns the number of turns restored."""
+		for turn in self.turns:
+			if turn["actor"] != game.current_player:
+				raise ValueError(f"Checkpoint {self.path} is out of step with the game at turn {turn['turn']}")
+			game_state = game.prepare_turn(verbosity=0)
+			game.players[game.current_player].replay_turn(game_state, turn["move"], turn["player"])
+			game.apply_turn(turn["move"], verbosity=0)
+		return len(self.turns)
+
+	def append(self, turn: int, actor: int, move: str, player_record: Dict[str, Any]):
+		record = {"turn": turn, "actor": actor, "move": move, "player": player_record}
+		with open(self.path, "a") as f:
+			f.write(json.dumps(record, separators=(",", ":")) + "\n")
+			f.flush()
+			os.fsync(f.fileno()) # a turn can cost minutes of reasoning, make sure it is on disk
+		self.turns.append(record)
+
+	def remove(self):
+		"""Call once the game's result is recorded."""
+		if os.path.exists(self.path):
+			os.remove(self.path)
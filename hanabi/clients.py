@@ -0,0 +1,111 @@
+import asyncio
+import importlib
+import importlib.util
+import sys
+import threading
+import weakref
+from types import ModuleType
+from typing import Any, Dict, Optional, Tuple
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None # httpx needs it for HTTP/2
+
+# provider -> (SDK module, client class, async client class), imported on first use
+SDKS = {
+	"openai": ("openai", "OpenAI", "AsyncOpenAI"), # also used for xAI and other compatible APIs, through base_url
+	"anthropic": ("anthropic", "Anthropic", "AsyncAnthropic"),
+	"groq": ("groq", "Groq", "AsyncGroq")
+}
+
+# connection pool and timeouts of every client handed out, see configure_clients
+client_settings: Dict[str, Any] = {
+	"max_connections": 100,
+	"max_keepalive_connections": 20,
+	"keepalive_expiry": 60.0, # seconds an idle connection is kept open
+	"timeout": 600.0, # seconds, long enough for reasoning models
+	"connect_timeout": 10.0,
+	"http2": True # only if the h2 package is installed
+}
+
+_clients: Dict[Tuple, Any] = {}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, Any]]" = weakref.WeakKeyDictionary()
+_gemini_key: Optional[str] = None
+_lock = threading.Lock()
+
+
+def configure_clients(**settings):
+	"""Change client_settings. Only clients created afterwards are affected."""
+	unknown = set(settings) - set(client_settings)
+	if unknown:
+		raise ValueError(f"Unknown client settings: {', '.join(sorted(unknown))}")
+	client_settings.update(settings)
+
+
+def _sdk(provider: str) -> ModuleType:
+	return importlib.import_module(SDKS[provider][0])
+
+
+def _http_client(provider: str, asynchronous: bool) -> Any:
+	# the SDK's own HTTP client class, which also brings the SDK's httpx build (some versions vendor their own)
+	sdk = _sdk(provider)
+	client_class = sdk.DefaultAsyncHttpxClient if asynchronous else sdk.DefaultHttpxClient
+	httpx = sys.modules[client_class.__mro__[1].__module__.split(".")[0]]
+	return client_class(
+		limits=httpx.Limits(
+			max_connections=client_settings["max_connections"],
+			max_keepalive_connections=client_settings["max_keepalive_connections"],
+			keepalive_expiry=client_settings["keepalive_expiry"]
+		),
+		timeout=httpx.Timeout(client_settings["timeout"], connect=client_settings["connect_timeout"]),
+		http2=client_settings["http2"] and HTTP2_AVAILABLE
+	)
+
+
+def get_client(provider: str, api_key: Optional[str], base_url: Optional[str] = None) -> Any:
+	"""
+	The SDK client shared by every player with the same (provider, base_url, key).
+	All of them use one keep-alive connection pool instead of one each. SDK retries
+	are off, since requests are retried by hanabi.ratelimit.
+	"""
+	key = (provider, base_url, api_key)
+	with _lock:
+		client = _clients.get(key)
+		if client is None:
+			client_class = getattr(_sdk(provider), SDKS[provider][1])
+			client = client_class(api_key=api_key, base_url=base_url, max_retries=0, http_client=_http_client(provider, False))
+			_clients[key] = client
+		return client
+
+
+def get_async_client(provider: str, api_key: Optional[str], base_url: Optional[str] = None) -> Any:
+	"""
+	Async variant of get_client. Connections can't move between event loops,
+	so clients are shared within the running loop (e.g. one asyncio.run).
+	"""
+	loop = asyncio.get_running_loop()
+	key = (provider, base_url, api_key)
+	with _lock:
+		clients = _async_clients.setdefault(loop, {})
+		client = clients.get(key)
+		if client is None:
+			client_class = getattr(_sdk(provider), SDKS[provider][2])
+			client = client_class(api_key=api_key, base_url=base_url, max_retries=0, http_client=_http_client(provider, True))
+			clients[key] = client
+		return client
+
+
+def configure_gemini(api_key: Optional[str]):
+	"""genai.configure sets process-wide state, so it is only called when the key changes."""
+	global _gemini_key
+	import google.generativeai as genai
+	with _lock:
+		if api_key and api_key != _gemini_key:
+			genai.configure(api_key=api_key)
+			_gemini_key = api_key
+
+
+def close_clients():
+	"""Close the pooled connections of the sync clients (async clients go with their event loop)."""
+	with _lock:
+		for client in _clients.values():
+			client.close()
+		_clients.clear()
@@ -0,0 +1,92 @@
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+Summarizer = Callable[[int], str] # index of the first kept turn -> summary of everything before it
+
+
+def estimate_tokens(messages: List[Dict]) -> int:
+	"""Rough token count (~4 characters per token), good enough to compare prompt sizes."""
+	return sum(len(m["content"]) for m in messages) // 4
+
+
+class ContextPolicy:
+	"""
+	Decides which part of a player's conversation is sent with each request.
+	The conversation is split into turns (the game state prompt plus any
+	THINK/PLAY follow-ups); the current turn is always sent in full. This
+	default policy sends everything. Each call sets last_sizes to the (full, sent)
+	estimated size of the conversation, which goes into the call telemetry.
+	"""
+	def __init__(self):
+		self.last_sizes: Optional[Tuple[int, int]] = None
+
+	def apply(self, messages: List[Dict], turn_starts: List[int], summarize: Optional[Summarizer] = None) -> List[Dict]:
+		view = self._select(messages, turn_starts, summarize)
+		self.last_sizes = (estimate_tokens(messages), estimate_tokens(view))
+		return view
+
+	def _select(self, messages: List[Dict], turn_starts: List[int], summarize: Optional[Summarizer]) -> List[Dict]:
+		return messages
+
+
+class SlidingWindow(ContextPolicy):
+	"""Only send the last `turns` turns."""
+	def __init__(self, turns: int = 5):
+		super().__init__()
+		self.turns = max(1, turns)
+
+	def _select(self, messages, turn_starts, summarize):
+		if len(turn_starts) <= self.turns:
+			return messages
+		return messages[turn_starts[-self.turns]:]
+
+
+class SummaryCompaction(SlidingWindow):
+	"""Send the last `turns` turns, with older turns collapsed into a summary generated by the engine."""
+	def _select(self, messages, turn_starts, summarize):
+		if len(turn_starts) <= self.turns:
+			return messages
+		first_kept = len(turn_starts) - self.turns
+		view = messages[turn_starts[first_kept]:]
+		summary = summarize(first_kept) if summarize is not None else ""
+		if summary:
+			# prepended to the first kept prompt, so user/assistant turns keep alternating
+			view[0] = dict(view[0], content=f"{summary}\n{view[0]['content']}")
+		return view
+
+
+class TokenBudget(ContextPolicy):
+	"""Drop the oldest turns until the estimated prompt fits in `max_tokens`."""
+	def __init__(self, max_tokens: int = 16000):
+		super().__init__()
+		self.max_tokens = max_tokens
+
+	def _select(self, messages, turn_starts, summarize):
+		first_kept = 0
+		size = estimate_tokens(messages)
+		while size > self.max_tokens and first_kept < len(turn_starts) - 1:
+			size -= estimate_tokens(messages[turn_starts[first_kept]:turn_starts[first_kept + 1]])
+			first_kept += 1
+		return messages[turn_starts[first_kept]:] if first_kept else messages
+
+
+CONTEXT_POLICIES = {
+	"full": ContextPolicy,
+	"window": SlidingWindow,
+	"compact": SummaryCompaction,
+	"budget": TokenBudget
+}
+
+
+def get_context_policy(spec: Union[None, str, ContextPolicy]) -> ContextPolicy:
+	"""
+	Build a policy from a spec such as "window:5", "compact:5" or "budget:16000".
+	None means the full conversation is sent.
+	"""
+	if isinstance(spec, ContextPolicy):
+		return spec
+	if not spec:
+		return ContextPolicy()
+	name, _, value = spec.partition(":")
+	if name not in CONTEXT_POLICIES:
+		raise ValueError(f"Unknown context policy: {name}")
+	return CONTEXT_POLICIES[name](int(value)) if value else CONTEXT_POLICIES[name]()
@@ -1,16 +1,36 @@
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 import random
+import numpy as np
 from hanabi.players import Player
+from hanabi.render import StateRenderer
+from hanabi.history import EventLog
+from hanabi.actions import COLORS, EMPTY, NUM_CLUES, NUM_COLORS, NUM_RANKS, action_table, parse_move
+from hanabi.observation import Observation
+
+COLOR_INDEX = {color: i for i, color in enumerate(COLORS)}
 
 @dataclass
 class Card:
     color: str  # R,G,B,Y,W
     number: int # 1-5
 
+def card_to_code(card: Card) -> int:
+    """Compact integer encoding of a card: color_index * 5 + (number - 1)."""
+    return COLORS.index(card.color) * 5 + card.number - 1
+
+def code_to_card(code: int) -> Card:
+    return Card(COLORS[code // 5], code % 5 + 1)
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
 class HanabiGame:
-    def __init__(self, players: List['Player']):
+    def __init__(self, players: List['Player'], deck: Optional[List[Card]] = None, rng: Optional[random.Random] = None):
         self.players = players
+        self.rng = rng if rng is not None else random # pass a seeded random.Random for reproducible decks
         self.current_player = 0
         self.lives = 3
         self.info_tokens = 8
@@ -18,111 +38,205 @@ class HanabiGame:
         self.play_area = {'R': 0, 'G': 0, 'B': 0, 'Y': 0, 'W': 0}
         self.discard_pile: List[Card] = []
         self.hands: List[List[Card]] = []
-        self.deck = self._create_deck()
+        self.deck = list(deck) if deck is not None else self._create_deck() # cards are drawn from the end
+        self.initial_deck = tuple(self.deck)
+        self.action_table = action_table(len(players))
+        # array copies of the state for observations, kept up to date move by move
+        self.fireworks = np.zeros(NUM_COLORS, dtype=np.int8)
+        self.discard_counts = np.zeros((NUM_COLORS, NUM_RANKS), dtype=np.int8)
+        self.hand_codes = np.full((len(players), 4), EMPTY, dtype=np.int8)
+        self._fireworks_view = _read_only(self.fireworks)
+        self._discard_counts_view = _read_only(self.discard_counts)
         self._deal_initial_hands()
+        self.renderer = StateRenderer(self)
+        self.log = EventLog(self.renderer)
+        self.last_seen = [0] * len(players) # per player, index of the first log event since their last move
+        self._record_states = True # set in start_game
+        self._undo_stack: List[tuple] = [] # see apply/undo
     
     def _create_deck(self) -> List[Card]:
         deck = []
-        for color in 'RGBYW':
+        for color in COLORS:
             for number, count in [(1,3), (2,2), (3,2), (4,2), (5,1)]:
                 for _ in range(count):
                     deck.append(Card(color, number))
-        random.shuffle(deck)
+        self.rng.shuffle(deck)
         return deck
     
+    def state_dict(self) -> Dict:
+        """Engine state (without the players) as plain card codes, e.g. for keyframes and checkpoints."""
+        return {
+            "deck": [card_to_code(c) for c in self.deck],
+            "hands": [[card_to_code(c) for c in hand] for hand in self.hands],
+            "play_area": [self.play_area[color] for color in COLORS],
+            "discard_pile": [card_to_code(c) for c in self.discard_pile],
+            "lives": self.lives,
+            "info_tokens": self.info_tokens,
+            "turns_played": self.turns_played,
+            "current_player": self.current_player
+        }
+
+    def load_state_dict(self, state: Dict):
+        self.deck = [code_to_card(c) for c in state["deck"]]
+        self.hands = [[code_to_card(c) for c in hand] for hand in state["hands"]]
+        self.play_area = dict(zip(COLORS, state["play_area"]))
+        self.discard_pile = [code_to_card(c) for c in state["discard_pile"]]
+        self.lives = state["lives"]
+        self.info_tokens = state["info_tokens"]
+        self.turns_played = state["turns_played"]
+        self.current_player = state["current_player"]
+        self.fireworks[:] = state["play_area"]
+        self.discard_counts[:] = 0
+        for c in state["discard_pile"]:
+            self.discard_counts[c // NUM_RANKS, c % NUM_RANKS] += 1
+        self._index_hands()
+        self.renderer.invalidate_all()
+
     def _deal_initial_hands(self):
         self.hands = [[] for _ in range(len(self.players))]
         for player in range(len(self.players)):
             for _ in range(4):
                 self.hands[player].append(self.deck.pop())
+        self._index_hands()
+
+    def _index_hands(self):
+        self.clue_masks: List[List[int]] = [[] for _ in self.hands] # per hand and clue attribute, matching positions as a bitmask
+        self.hand_attributes: List[int] = [0] * len(self.hands) # per hand, bits of the clue attributes present
+        for player in range(len(self.hands)):
+            self._index_hand(player)
+
+    def _index_hand(self, player: int):
+        """Recompute the clue bitmasks of a hand after its cards moved."""
+        masks = [0] * NUM_CLUES
+        attributes = 0
+        codes = self.hand_codes[player]
+        codes[:] = EMPTY
+        for i, card in enumerate(self.hands[player]):
+            color, number = COLOR_INDEX[card.color], NUM_COLORS + card.number - 1
+            masks[color] |= 1 << i
+            masks[number] |= 1 << i
+            attributes |= 1 << color | 1 << number
+            codes[i] = color * NUM_RANKS + number - NUM_COLORS
+        self.clue_masks[player] = masks
+        self.hand_attributes[player] = attributes
 
     def get_game_state(self, player: int, current_player: int) -> str:
-        state = f"Players: {', '.join(f'Player {i+1}' for i in range(len(self.players))).replace(f'Player {player+1}', '[YOU]')}\n"
-        state += f"Lives: {self.lives}/3 | Information tokens: {self.info_tokens}/8 | Score: {sum(self.play_area.values())}/25\n\n"
+        return self.renderer.render(player, current_player)
+    
+    def legal_moves(self, player: int) -> int:
+        """Legal actions of `player` as a bitmask over the action ids of self.action_table (see hanabi.actions)."""
+        return self.action_table.legal_mask(player, len(self.hands[player]), self.info_tokens, self.hand_attributes)
 
-        if player == current_player:
-            state += f"Player {current_player+1} (YOU) to play\n"
-        else:
-            state += f"Player {current_player+1} to play\n"
+    def action_to_move(self, player: int, action: int) -> str:
+        """Move string of an action id of `player`, with the positions of a clue filled in from the target hand."""
+        return self.action_table.move_string(player, action, self.clue_masks, [len(hand) for hand in self.hands])
 
-        state += "Discard pile:\n"
-        state += " ".join(f"{c.color}{c.number}" for c in self.discard_pile) + "\n\n"
-        
-        state += "Play area:\n"
-        state += " ".join(f"[{color}{value}]" for color, value in self.play_area.items() if value > 0) + "\n\n"
-        
-        state += "Your hand:\n"
-        state += " ".join("[*]" * len(self.hands[player])) + "\n\n"
-        
-        state += "Other hands:\n"
-        for i in range(len(self.players)):
-            if i != player:
-                state += f"Player {i+1}: {' '.join(f'[{c.color}{c.number}]' for c in self.hands[i])}\n"
+    def get_observation(self, player: int) -> Observation:
+        """What `player` sees right now, as arrays (see hanabi.observation)."""
+        hands = self.hand_codes.copy()
+        hands[player] = EMPTY # players can't see their own cards
+        clue_masks = list(self.clue_masks)
+        clue_masks[player] = None
+        return Observation(
+            player,
+            self.current_player,
+            self.turns_played,
+            self.lives,
+            self.info_tokens,
+            len(self.deck),
+            self._fireworks_view,
+            self._discard_counts_view,
+            hands,
+            tuple(len(hand) for hand in self.hands),
+            clue_masks,
+            self.legal_moves(player),
+            self.log.since(self.last_seen[player]),
+            self.renderer.snapshot(self.current_player) if self._record_states else None
+        )
+
+    def render_observation(self, observation: Observation) -> str:
+        """The text prompt of an observation: the turns since the player's last move, then the current state."""
+        current_state = self.renderer.render_snapshot(observation.state, observation.player)
+        if not observation.events:
+            return current_state
+        new_state = self.log.render_events(observation.player, observation.events)
+        new_state += f"\n<-------- Current State: Turn {observation.turn}, Player {observation.player+1} (You) -------->\n"
+        new_state += f"{current_state}\n"
+        return new_state
 
-        #state += "----------------------------------------\n\n"
-        return state.strip()  # Ensure no trailing newlines
-    
     def validate_move(self, player: int, move: str) -> bool:
+        parsed = parse_move(move)
+        if parsed is None:
+            return self._validate_unparsed(player, move)
+        if parsed.kind == 'P':  # Play
+            return parsed.card < len(self.hands[player])
+        if parsed.kind == 'D':  # Discard
+            return parsed.card < len(self.hands[player]) and self.info_tokens < 8
+        # Clue: exactly the matching positions of a player's hand
+        if self.info_tokens <= 0 or parsed.target >= len(self.players):
+            return False
+        return parsed.positions == self.clue_masks[parsed.target][parsed.attribute]
+
+    def _validate_unparsed(self, player: int, move: str) -> bool:
+        """
+        The original rules for strings outside the move grammar, so results stay comparable:
+        P0/D0 address the last card, C0 the last player, and any clue type but N is a color clue.
+        """
         try:
-            if move.startswith('P'):  # Play
-                if len(move) != 2: # P <card_idx>
+            if move.startswith('P') or move.startswith('D'):
+                if len(move) != 2:
                     return False
                 card_idx = int(move[1]) - 1
-                return card_idx < len(self.hands[player])
-                
-            elif move.startswith('D'):  # Discard
-                if len(move) != 2: # D <card_idx>
-                    return False
-                card_idx = int(move[1]) - 1
-                return card_idx < len(self.hands[player]) and self.info_tokens < 8
-                
-            elif move.startswith('C'):  # Clue
-                if self.info_tokens <= 0:
-                    return False
-                if len(move) < 5: # C <target> <type> <value> <positions>
+                return card_idx < len(self.hands[player]) and (move[0] == 'P' or self.info_tokens < 8)
+            if move.startswith('C'):
+                if self.info_tokens <= 0 or len(move) < 5:
                     return False
                 target = int(move[1]) - 1
-                clue_type = move[2]
-                value = move[3]
-                positions = set(int(x)-1 for x in move[4:])
-                
-                if clue_type == 'N':
-                    value = int(value)
-                    matching = {i for i, card in enumerate(self.hands[target]) 
-                              if card.number == value}
-                else:  # Color clue
-                    matching = {i for i, card in enumerate(self.hands[target]) 
-                              if card.color == value}
+                positions = set(int(x) - 1 for x in move[4:])
+                if move[2] == 'N':
+                    value = int(move[3])
+                    matching = {i for i, card in enumerate(self.hands[target]) if card.number == value}
+                else:
+                    matching = {i for i, card in enumerate(self.hands[target]) if card.color == move[3]}
                 return positions == matching
-                
             return False
-        except:
+        except (ValueError, IndexError):
             return False
 
     def execute_move(self, player: int, move: str):
         self.turns_played += 1
 
+        self.renderer.invalidate(status=True) # every move changes lives, tokens or score
+
         if not self.validate_move(player, move):
             self.lives -= 1
             return "INVALID MOVE"
             
         if move.startswith('P'):
-            card_idx = int(move[1]) - 1
+            card_idx = int(move[1]) - 1 # also P0/D0, see _validate_unparsed
             card = self.hands[player].pop(card_idx)
+            self.renderer.invalidate(hands=(player,))
             if self.play_area[card.color] == card.number - 1:
                 self.play_area[card.color] = card.number
+                self.fireworks[COLOR_INDEX[card.color]] = card.number
+                self.renderer.invalidate(play_area=True)
             else:
                 self.lives -= 1
                 self.discard_pile.append(card)
+                self.discard_counts[COLOR_INDEX[card.color], card.number - 1] += 1
             if self.deck:
                 self.hands[player].insert(card_idx, self.deck.pop())
+            self._index_hand(player)
                 
         elif move.startswith('D'):
-            card_idx = int(move[1]) - 1
+            card_idx = int(move[1]) - 1 # also P0/D0, see _validate_unparsed
             card = self.hands[player].pop(card_idx)
+            self.renderer.invalidate(hands=(player,))
             self.discard_pile.append(card)
+            self.discard_counts[COLOR_INDEX[card.color], card.number - 1] += 1
             if self.deck:
                 self.hands[player].insert(card_idx, self.deck.pop())
+            self._index_hand(player)
             self.info_tokens = min(8, self.info_tokens + 1)
             
         elif move.startswith('C'):
@@ -130,57 +244,139 @@ class HanabiGame:
 
         return move
 
-    def play_game(self, verbosity: int = 1):
+    def apply(self, move: str) -> str:
+        """
+        Execute the move of the player to move and pass the turn, saving what undo() needs.
+        Only the engine state changes: the event log and the players are not involved,
+        so this is meant for search and rollouts rather than for playing a game.
+        """
+        player = self.current_player
+        self._undo_stack.append((
+            player, self.lives, self.info_tokens, self.hands[player][:],
+            len(self.discard_pile), len(self.deck), self.deck[-1] if self.deck else None,
+            self.play_area.copy()
+        ))
+        executed_move = self.execute_move(player, move)
+        self.current_player = (player + 1) % len(self.players)
+        return executed_move
+
+    def undo(self):
+        """Take back the last apply()."""
+        player, lives, info_tokens, hand, discard_size, deck_size, drawn, play_area = self._undo_stack.pop()
+        self.turns_played -= 1
+        self.current_player = player
+        self.lives = lives
+        self.info_tokens = info_tokens
+        self.hands[player] = hand
+        if len(self.deck) < deck_size:
+            self.deck.append(drawn)
+        discarded = len(self.discard_pile) > discard_size
+        while len(self.discard_pile) > discard_size:
+            card = self.discard_pile.pop()
+            self.discard_counts[COLOR_INDEX[card.color], card.number - 1] -= 1
+        if play_area != self.play_area:
+            self.play_area = play_area
+            self.fireworks[:] = [play_area[color] for color in COLORS]
+        self._index_hand(player)
+        self.renderer.invalidate(status=True, play_area=True, hands=(player,), discard=discarded)
+
+    def undo_all(self):
+        """Take back every apply() since the stack was last empty."""
+        while self._undo_stack:
+            self.undo()
+
+    def is_over(self) -> bool:
+        return self.lives <= 0 or sum(self.play_area.values()) >= 25 or not self.deck
+
+    def start_game(self, verbosity: int = 1):
         if verbosity > 0:
             print("Starting game...")
 
-        history = ["" for _ in range(len(self.players))] # initialize empty history for each player
+        for seat, player in enumerate(self.players):
+            player.attach(self, seat)
+        self._record_states = any(player.needs_prompt for player in self.players) # else nobody ever reads a rendered state
 
-        while self.lives > 0 and sum(self.play_area.values()) < 25 and self.deck:
-            if verbosity > 1:
-                print(f">>> Player {self.current_player+1}, Turn {self.turns_played}")
-                print(f">>> Game State: \n{self.get_game_state(self.current_player, self.current_player)}") # full game state
-            elif verbosity > 0:
-                print(f">>> Player {self.current_player+1}, Turn {self.turns_played}")
-                top_line = self.get_game_state(self.current_player, self.current_player).split('\n')[1]
-                print(f">>> Game State: {top_line}") # top line of game state
-            
-            # current state from the view point of each player
-            current_states = [
-                self.get_game_state(player, self.current_player) 
-                for player in range(len(self.players))
-            ]
-            
-            # create current state string, including turns since last move
-            if history[self.current_player] != "":
-                new_state = history[self.current_player]
-                new_state += f"\n<-------- Current State: Turn {self.turns_played}, Player {self.current_player+1} (You) -------->\n"
-                new_state += f"{current_states[self.current_player]}\n"
-            else:
-                new_state = current_states[self.current_player]
-            
-            # decide move
-            move = self.players[self.current_player].take_turn(new_state)
+    def prepare_turn(self, verbosity: int = 1) -> Union[str, Observation]:
+        """Build the prompt for the player to move, including the turns since their last move (or their Observation)."""
+        if verbosity > 1:
+            print(f">>> Player {self.current_player+1}, Turn {self.turns_played}")
+            print(f">>> Game State: \n{self.get_game_state(self.current_player, self.current_player)}") # full game state
+        elif verbosity > 0:
+            print(f">>> Player {self.current_player+1}, Turn {self.turns_played}")
+            top_line = self.renderer.status_line()
+            print(f">>> Game State: {top_line}") # top line of game state
 
-            # execute move
-            if verbosity > 0:
-                print(f">>> Player {self.current_player+1} move: {move}")
-                
-            executed_move = self.execute_move(self.current_player, move)
+        observation = self.get_observation(self.current_player)
+        self._turn_state = observation.state # the state every player sees before this move, recorded in the log once the move is made
+        if not self.players[self.current_player].needs_prompt:
+            return observation
 
-            # update history
-            for player in range(len(self.players)):
-                history[player] += f"\n<-------- Turn {self.turns_played-1}, Player {self.current_player+1} -------->\n"  # -1 because we are adding the move after the turn
-                history[player] += f"<-- Game State -->\n{current_states[player]}\n"
-                history[player] += f"<-- Move -->\n{executed_move}\n\n"
+        # the text prompt, including turns since last move
+        return self.render_observation(observation)
+
+    def apply_turn(self, move: str, verbosity: int = 1):
+        """Execute the move of the player to move, log it and pass the turn."""
+        if verbosity > 0:
+            print(f">>> Player {self.current_player+1} move: {move}")
 
-            history[self.current_player] = "" # reset history for current player, it will start accumulating again from next player's turn
+        turn = self.turns_played
+        executed_move = self.execute_move(self.current_player, move)
+        self.log.append(turn, self.current_player, executed_move, self._turn_state)
+        self.last_seen[self.current_player] = len(self.log) # the player's own move is not repeated to them
 
-            # switch to next player
-            self.current_player = (self.current_player + 1) % len(self.players)
+        # switch to next player
+        self.current_player = (self.current_player + 1) % len(self.players)
 
+    def end_game(self, verbosity: int = 1) -> int:
         if verbosity > 0:
             print("Game over. Final board state:")
             print(self.get_game_state(self.current_player, self.current_player))
         
-        return sum(self.play_area.values()) 
\ No newline at end of file
+        return sum(self.play_area.values())
+
+    def _resume(self, checkpoint, verbosity: int = 1):
+        restored = checkpoint.restore(self)
+        if restored and verbosity > 0:
+            print(f"Resumed game from checkpoint after {restored} turns")
+
+    def _save_turn(self, checkpoint, turn: int, actor: int, move: str):
+        checkpoint.append(turn, actor, move, self.players[actor].turn_record())
+
+    def play_game(self, verbosity: int = 1, checkpoint=None, before_turn=None):
+        """
+        Play until the game is over. With a GameCheckpoint, every turn is saved and a saved game is resumed.
+        before_turn is called before every turn and before saving it, and can stop the game by raising.
+        """
+        self.start_game(verbosity)
+        if checkpoint is not None:
+            self._resume(checkpoint, verbosity)
+        while not self.is_over():
+            turn, actor = self.turns_played, self.current_player
+            if before_turn is not None:
+                before_turn()
+            new_state = self.prepare_turn(verbosity)
+            move = self.players[actor].take_turn(new_state) # decide move
+            self.apply_turn(move, verbosity)
+            if checkpoint is not None:
+                if before_turn is not None:
+                    before_turn() # e.g. not if another worker took the game over meanwhile
+                self._save_turn(checkpoint, turn, actor, move)
+        return self.end_game(verbosity)
+
+    async def play_game_async(self, verbosity: int = 1, checkpoint=None, before_turn=None):
+        """Same as play_game, but awaits the players so that many games can share one event loop."""
+        self.start_game(verbosity)
+        if checkpoint is not None:
+            self._resume(checkpoint, verbosity)
+        while not self.is_over():
+            turn, actor = self.turns_played, self.current_player
+            if before_turn is not None:
+                before_turn()
+            new_state = self.prepare_turn(verbosity)
+            move = await self.players[actor].take_turn_async(new_state) # decide move
+            self.apply_turn(move, verbosity)
+            if checkpoint is not None:
+                if before_turn is not None:
+                    before_turn() # e.g. not if another worker took the game over meanwhile
+                self._save_turn(checkpoint, turn, actor, move)
+        return self.end_game(verbosity)
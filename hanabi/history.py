@@ -0,0 +1,66 @@
+from collections import Counter
+from typing import List, NamedTuple
+from hanabi.actions import COLORS
+from hanabi.render import StateRenderer, StateSnapshot
+
+
+class Event(NamedTuple):
+	turn: int # turn number before the move
+	actor: int
+	move: str # the move as executed ("INVALID MOVE" for invalid moves)
+	state: StateSnapshot # state the actor saw before moving
+
+
+class EventLog:
+	"""
+	Append-only log of the turns of one game, shared by all seats. Each seat
+	only keeps the index of the first event it has not acted on yet, and the
+	"since your last turn" text is rendered from the events when a prompt is built.
+	"""
+	def __init__(self, renderer: StateRenderer):
+		self.renderer = renderer
+		self.events: List[Event] = []
+
+	def __len__(self) -> int:
+		return len(self.events)
+
+	def append(self, turn: int, actor: int, move: str, state: StateSnapshot):
+		self.events.append(Event(turn, actor, move, state))
+
+	def since(self, start: int) -> List[Event]:
+		return self.events[start:]
+
+	def render(self, player: int, start: int) -> str:
+		"""Turns since `start`, as seen by `player`."""
+		return self.render_events(player, self.events[start:])
+
+	def render_events(self, player: int, events: List[Event]) -> str:
+		return "".join(
+			f"\n<-------- Turn {event.turn}, Player {event.actor+1} -------->\n"
+			f"<-- Game State -->\n{self.renderer.render_snapshot(event.state, player)}\n"
+			f"<-- Move -->\n{event.move}\n\n"
+			for event in events
+		)
+
+	def summarize(self, end: int) -> str:
+		"""
+		Compact summary of the game before event `end`, used when older turns are dropped from a prompt:
+		the board at that point (lives, tokens, score, fireworks and discard counts), so its size does
+		not grow with the number of dropped turns.
+		"""
+		end = min(end, len(self.events))
+		if end <= 0:
+			return ""
+		# the state after the last dropped move is the one the next mover saw, or the current one
+		state = self.events[end].state if end < len(self.events) else self.renderer.snapshot(self.renderer.game.current_player)
+		discards = Counter(state.discard.split())
+		discard_line = " ".join(
+			f"{card}x{count}" if count > 1 else card
+			for card, count in sorted(discards.items(), key=lambda item: (COLORS.index(item[0][0]), item[0][1:]))
+		)
+		return (
+			f"<-------- Summary of turns 0-{self.events[end - 1].turn} -------->\n"
+			f"{state.status}\n"
+			f"Play area: {state.play_area or 'empty'}\n"
+			f"Discarded: {discard_line or 'nothing'}\n"
+		)
@@ -0,0 +1,220 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+	job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+	experiment_id INTEGER NOT NULL,
+	run INTEGER NOT NULL,
+	provider TEXT NOT NULL,
+	model TEXT NOT NULL,
+	args TEXT NOT NULL,
+	seed_bank INTEGER,
+	status TEXT NOT NULL DEFAULT 'pending',
+	worker TEXT,
+	lease_expires REAL,
+	attempts INTEGER NOT NULL DEFAULT 0,
+	error TEXT,
+	job_key TEXT, -- stored with the game, which is recorded once per job
+	UNIQUE (experiment_id, run)
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, job_id);
+"""
+
+JOB_STATUSES = ("pending", "running", "done", "failed")
+
+
+class LeaseLost(Exception):
+	"""The lease of a job ran out and another worker may have taken it over."""
+	pass
+
+
+class Job(NamedTuple):
+	job_id: int
+	experiment_id: int
+	run: int
+	provider: str
+	model: str
+	args: Dict[str, Any]
+	seed_bank: Optional[int]
+	attempts: int
+	key: str # unique across queues, unlike job_id
+
+
+def worker_name() -> str:
+	"""Unique name of a worker process, e.g. host-1234-1a2b3c."""
+	return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class JobQueue:
+	"""
+	Durable queue of games, (config, run) jobs in a SQLite file shared by any
+	number of workers. A worker claims a job with a lease and keeps renewing it
+	while the game runs (see Heartbeat, which stops renewing it once the game has
+	made no progress for a few leases); a job whose lease has expired (its worker
+	died or hung) is handed out again, and since games are checkpointed after every turn the
+	next worker carries on where the first one stopped. Failed jobs go back to
+	the queue until they have used max_attempts.
+
+	The journal mode is WAL by default, which needs all workers on one host. With
+	workers on several hosts sharing the file over a network filesystem, use
+	journal_mode="DELETE" (for the results store as well).
+	"""
+	def __init__(self, path: str, journal_mode: str = "WAL", max_attempts: int = 3):
+		os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+		self.path = path
+		self.max_attempts = max_attempts
+		# shared with the heartbeat thread, hence the lock
+		self.db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+		self.db.execute(f"PRAGMA journal_mode={journal_mode}")
+		self.db.executescript(SCHEMA)
+		if "job_key" not in {row[1] for row in self.db.execute("PRAGMA table_info(jobs)")}: # queues created before job keys
+			self.db.execute("ALTER TABLE jobs ADD COLUMN job_key TEXT")
+			self.db.execute("UPDATE jobs SET job_key = lower(hex(randomblob(16))) WHERE job_key IS NULL")
+		self._lock = threading.Lock()
+
+	def _transaction(self, statements):
+		with self._lock:
+			self.db.execute("BEGIN IMMEDIATE")
+			try:
+				result = statements()
+				self.db.execute("COMMIT")
+			except BaseException:
+				self.db.execute("ROLLBACK")
+				raise
+			return result
+
+	def enqueue(self, jobs: Iterable[Dict[str, Any]]) -> int:
+		"""Add jobs (dicts with experiment_id, run, provider, model, args, seed_bank). Jobs already queued are skipped. Returns the number added."""
+		rows = [
+			(int(j["experiment_id"]), j["run"], j["provider"], j["model"], json.dumps(j["args"]), j.get("seed_bank"), uuid.uuid4().hex)
+			for j in jobs
+		]
+		def insert():
+			before = self.db.total_changes
+			self.db.executemany(
+				"INSERT OR IGNORE INTO jobs (experiment_id, run, provider, model, args, seed_bank, job_key) VALUES (?, ?, ?, ?, ?, ?, ?)",
+				rows
+			)
+			return self.db.total_changes - before
+		return self._transaction(insert)
+
+	def claim(self, worker: str, lease: float) -> Optional[Job]:
+		"""
+		Take the oldest pending job, or one whose lease has expired, for `lease` seconds. None if there is none.
+		Expired jobs that have used max_attempts are marked failed instead, e.g. a game that keeps killing its worker.
+		"""
+		def take():
+			now = time.time()
+			self.db.execute(
+				"""
+				UPDATE jobs SET status = 'failed', lease_expires = NULL, error = 'lease expired on the last attempt'
+				WHERE status = 'running' AND lease_expires < ? AND attempts >= ?
+				""",
+				(now, self.max_attempts)
+			)
+			row = self.db.execute(
+				"""
+				SELECT job_id, experiment_id, run, provider, model, args, seed_bank, attempts, job_key FROM jobs
+				WHERE status = 'pending' OR (status = 'running' AND lease_expires < ?)
+				ORDER BY job_id LIMIT 1
+				""",
+				(now,)
+			).fetchone()
+			if row is None:
+				return None
+			self.db.execute(
+				"UPDATE jobs SET status = 'running', worker = ?, lease_expires = ?, attempts = attempts + 1 WHERE job_id = ?",
+				(worker, now + lease, row[0])
+			)
+			job_id, experiment_id, run, provider, model, args, seed_bank, attempts, key = row
+			return Job(job_id, experiment_id, run, provider, model, json.loads(args), seed_bank, attempts + 1, key)
+		return self._transaction(take)
+
+	def heartbeat(self, job: Job, worker: str, lease: float) -> bool:
+		"""Renew the lease of a running job. False if the job is no longer this worker's."""
+		def renew():
+			return self.db.execute(
+				"UPDATE jobs SET lease_expires = ? WHERE job_id = ? AND worker = ? AND status = 'running'",
+				(time.time() + lease, job.job_id, worker)
+			).rowcount == 1
+		return self._transaction(renew)
+
+	def complete(self, job: Job, worker: str):
+		# also if the lease was lost meanwhile, the game is done either way (results are written once)
+		self._transaction(lambda: self.db.execute(
+			"UPDATE jobs SET status = 'done', worker = ?, lease_expires = NULL, error = NULL WHERE job_id = ?",
+			(worker, job.job_id)
+		))
+
+	def fail(self, job: Job, worker: str, error: str):
+		"""Put a job back in the queue, or mark it failed once it has used max_attempts."""
+		status = "failed" if job.attempts >= self.max_attempts else "pending"
+		self._transaction(lambda: self.db.execute(
+			"UPDATE jobs SET status = ?, lease_expires = NULL, error = ? WHERE job_id = ? AND worker = ? AND status = 'running'",
+			(status, error, job.job_id, worker)
+		))
+
+	def counts(self) -> Dict[str, int]:
+		"""Number of jobs by status."""
+		with self._lock:
+			counts = dict(self.db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+		return {status: counts.get(status, 0) for status in JOB_STATUSES}
+
+	def close(self):
+		self.db.close()
+
+
+class Heartbeat:
+	"""
+	Renews the lease of a job from a background thread while the game makes
+	progress, i.e. calls check() (as HanabiGame.play_game's before_turn) at least
+	every stall_leases leases. A game stuck in a turn, e.g. on a request that never
+	returns, stops being renewed, so its job goes to another worker.
+	"""
+	def __init__(self, queue: JobQueue, job: Job, worker: str, lease: float, stall_leases: float = 3.0):
+		self.queue = queue
+		self.job = job
+		self.worker = worker
+		self.lease = lease
+		self.stall_leases = stall_leases
+		self.lost = False # set if another worker took over the job
+		self.stalled = False # set once renewals stopped for lack of progress
+		self.renewed = self.progressed = time.monotonic()
+		self._stop = threading.Event()
+		self._thread = threading.Thread(target=self._run, daemon=True)
+
+	def _run(self):
+		while not self._stop.wait(self.lease / 3):
+			if time.monotonic() - self.progressed > self.stall_leases * self.lease:
+				self.stalled = True
+				return
+			try:
+				if not self.queue.heartbeat(self.job, self.worker, self.lease):
+					self.lost = True
+					return
+				self.renewed = time.monotonic()
+			except sqlite3.OperationalError: # e.g. the store is busy, try again next beat
+				continue
+
+	def check(self):
+		"""Record progress, or raise LeaseLost once the job is no longer this worker's."""
+		if self.stalled:
+			raise LeaseLost(f"Job {self.job.job_id} made no progress for {self.stall_leases * self.lease:.0f}s and was given up")
+		if self.lost or time.monotonic() - self.renewed > self.lease: # also if renewals kept failing
+			raise LeaseLost(f"Job {self.job.job_id} was taken over by another worker")
+		self.progressed = time.monotonic()
+
+	def __enter__(self) -> "Heartbeat":
+		self._thread.start()
+		return self
+
+	def __exit__(self, *exc_info):
+		self._stop.set()
+		self._thread.join()
@@ -0,0 +1,316 @@
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from hanabi.actions import COLORS
+from hanabi.context import estimate_tokens
+
+MovePolicy = Callable[[str, random.Random], str] # game state text of the last prompt -> move
+
+CARD_PATTERN = re.compile(r"\[([RGBYW])([1-5])\]")
+OTHER_HAND_PATTERN = re.compile(r"^Player (\d+): (.*)$", re.MULTILINE)
+TOKENS_PATTERN = re.compile(r"Information tokens: (\d+)/8")
+
+
+def legal_moves_from_prompt(state: str) -> List[str]:
+	"""Legal moves in the last game state rendered in a prompt (see hanabi.render)."""
+	state = state[state.rfind("Players:"):] # the current state comes after the turns since the last move
+	tokens = TOKENS_PATTERN.search(state)
+	info_tokens = int(tokens.group(1)) if tokens else 8
+	hand_start = state.find("Your hand:")
+	hand_size = state[hand_start:].split("\n", 2)[1].count("*") if hand_start >= 0 else 4
+	moves = [f"P{i+1}" for i in range(hand_size)]
+	if info_tokens < 8:
+		moves += [f"D{i+1}" for i in range(hand_size)]
+	if info_tokens > 0:
+		for target, cards in OTHER_HAND_PATTERN.findall(state[state.find("Other hands:"):]):
+			hand = CARD_PATTERN.findall(cards)
+			for color in COLORS:
+				positions = "".join(str(i+1) for i, (c, _) in enumerate(hand) if c == color)
+				if positions:
+					moves.append(f"C{target}C{color}{positions}")
+			for number in "12345":
+				positions = "".join(str(i+1) for i, (_, n) in enumerate(hand) if n == number)
+				if positions:
+					moves.append(f"C{target}N{number}{positions}")
+	return moves
+
+
+def random_legal_move(state: str, rng: random.Random) -> str:
+	"""The default move policy: a uniformly random legal move."""
+	return rng.choice(legal_moves_from_prompt(state) or ["P1"])
+
+
+class MockLLM:
+	"""
+	The behaviour of the mock endpoints: latency, injected failures, token
+	accounting and the answers themselves. THINK prompts get `think_tokens` of
+	filler text, other prompts the move chosen by `policy` from the game state
+	in the conversation.
+	"""
+	def __init__(
+			self,
+			latency: float = 0.5, # median seconds before the first token
+			latency_sigma: float = 0.5, # spread of the lognormal latency distribution
+			token_interval: float = 0.0, # seconds per output token
+			rate_limit_rate: float = 0.0, # share of requests answered with a 429
+			error_rate: float = 0.0, # share of requests answered with a 500
+			retry_after: float = 1.0, # Retry-After of the 429s, in seconds
+			think_tokens: int = 200,
+			policy: MovePolicy = random_legal_move,
+			seed: Optional[int] = None
+		):
+		self.latency = latency
+		self.latency_sigma = latency_sigma
+		self.token_interval = token_interval
+		self.rate_limit_rate = rate_limit_rate
+		self.error_rate = error_rate
+		self.retry_after = retry_after
+		self.think_tokens = think_tokens
+		self.policy = policy
+		self.rng = random.Random(seed)
+		self.stats = {"requests": 0, "rate_limited": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0}
+		self._lock = threading.Lock()
+
+	def _count(self, **amounts: int):
+		with self._lock:
+			for key, amount in amounts.items():
+				self.stats[key] += amount
+
+	def failure(self) -> Optional[int]:
+		"""Status code of an injected failure for the next request, or None."""
+		with self._lock:
+			draw = self.rng.random()
+		if draw < self.rate_limit_rate:
+			self._count(requests=1, rate_limited=1)
+			return 429
+		if draw < self.rate_limit_rate + self.error_rate:
+			self._count(requests=1, errors=1)
+			return 500
+		return None
+
+	def first_token_delay(self) -> float:
+		if self.latency <= 0:
+			return 0.0
+		with self._lock:
+			return self.rng.lognormvariate(math.log(self.latency), self.latency_sigma)
+
+	def answer(self, messages: List[Dict[str, Any]]) -> Tuple[str, int, int]:
+		"""(output text, prompt tokens, completion tokens) for a conversation."""
+		texts = [m["content"] if isinstance(m["content"], str) else json.dumps(m["content"]) for m in messages]
+		prompts = [text for m, text in zip(messages, texts) if m["role"] == "user"]
+		last_line = prompts[-1].rstrip().rsplit("\n", 1)[-1] if prompts else ""
+		if last_line.startswith("THINK"):
+			text = ("Thinking about the state. " * (self.think_tokens // 5 + 1))[:self.think_tokens * 4]
+		else:
+			state = next((p for p in reversed(prompts) if "Other hands:" in p), "")
+			with self._lock:
+				text = self.policy(state, self.rng)
+		prompt_tokens = estimate_tokens([{"content": t} for t in texts])
+		completion_tokens = max(1, len(text) // 4)
+		self._count(requests=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+		return text, prompt_tokens, completion_tokens
+
+
+def _pieces(text: str) -> List[str]:
+	# about one token per streamed chunk
+	return [text[i:i+4] for i in range(0, len(text), 4)] or [""]
+
+
+class _Handler(BaseHTTPRequestHandler):
+	protocol_version = "HTTP/1.1" # keep-alive, as real endpoints
+
+	def log_message(self, *args):
+		pass
+
+	@property
+	def mock(self) -> MockLLM:
+		return self.server.mock
+
+	def _json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+		headers = headers or {}
+		data = json.dumps(body).encode()
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(data)))
+		for name, value in headers.items():
+			self.send_header(name, value)
+		self.end_headers()
+		self.wfile.write(data)
+
+	def _start_stream(self):
+		self.send_response(200)
+		self.send_header("Content-Type", "text/event-stream")
+		self.send_header("Transfer-Encoding", "chunked")
+		self.end_headers()
+
+	def _event(self, data: Any, event: Optional[str] = None):
+		payload = (f"event: {event}\n" if event else "") + f"data: {data if isinstance(data, str) else json.dumps(data)}\n\n"
+		encoded = payload.encode()
+		self.wfile.write(f"{len(encoded):x}\r\n".encode() + encoded + b"\r\n")
+		self.wfile.flush()
+
+	def _end_stream(self):
+		self.wfile.write(b"0\r\n\r\n")
+
+	def do_GET(self):
+		if self.path.rstrip("/").endswith("/stats"):
+			with self.mock._lock:
+				self._json(200, dict(self.mock.stats))
+		else:
+			self._json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+	def do_POST(self):
+		request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+		anthropic = self.path.rstrip("/").endswith("/messages")
+		if not anthropic and not self.path.rstrip("/").endswith("/chat/completions"):
+			self._json(404, {"error": {"message": f"Unknown path {self.path}"}})
+			return
+		status = self.mock.failure()
+		if status is not None:
+			message = "Rate limit exceeded" if status == 429 else "Internal server error"
+			kind = "rate_limit_error" if status == 429 else "api_error"
+			body = {"type": "error", "error": {"type": kind, "message": message}} if anthropic else {"error": {"type": kind, "message": message}}
+			self._json(status, body, {"retry-after": str(self.mock.retry_after)} if status == 429 else {})
+			return
+		messages = request.get("messages", [])
+		if anthropic and request.get("system"):
+			messages = [{"role": "system", "content": request["system"]}] + messages
+		text, prompt_tokens, completion_tokens = self.mock.answer(messages)
+		time.sleep(self.mock.first_token_delay())
+		try:
+			if anthropic:
+				self._messages(request, text, prompt_tokens, completion_tokens)
+			else:
+				self._chat_completion(request, text, prompt_tokens, completion_tokens)
+		except (BrokenPipeError, ConnectionResetError):
+			pass # the client closed the stream early, e.g. once it had a move
+
+	def _chat_completion(self, request: Dict[str, Any], text: str, prompt_tokens: int, completion_tokens: int):
+		usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+		common = {"id": f"chatcmpl-{uuid.uuid4().hex}", "created": int(time.time()), "model": request.get("model", "mock")}
+		if not request.get("stream"):
+			time.sleep(self.mock.token_interval * completion_tokens)
+			self._json(200, dict(common, object="chat.completion", usage=usage, choices=[
+				{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}
+			]))
+			return
+		self._start_stream()
+		chunk = dict(common, object="chat.completion.chunk")
+		for piece in _pieces(text):
+			self._event(dict(chunk, choices=[{"index": 0, "delta": {"content": piece}, "finish_reason": None}]))
+			time.sleep(self.mock.token_interval)
+		last = dict(chunk, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}])
+		if self.path.startswith("/openai/"): # Groq reports usage in x_groq
+			last["x_groq"] = {"id": common["id"], "usage": usage}
+		self._event(last)
+		if (request.get("stream_options") or {}).get("include_usage"):
+			self._event(dict(chunk, choices=[], usage=usage))
+		self._event("[DONE]")
+		self._end_stream()
+
+	def _messages(self, request: Dict[str, Any], text: str, prompt_tokens: int, completion_tokens: int):
+		message = {
+			"id": f"msg_{uuid.uuid4().hex}", "type": "message", "role": "assistant", "model": request.get("model", "mock"),
+			"stop_reason": None, "stop_sequence": None
+		}
+		if not request.get("stream"):
+			time.sleep(self.mock.token_interval * completion_tokens)
+			self._json(200, dict(
+				message, content=[{"type": "text", "text": text}], stop_reason="end_turn",
+				usage={"input_tokens": prompt_tokens, "output_tokens": completion_tokens}
+			))
+			return
+		self._start_stream()
+		self._event({"type": "message_start", "message": dict(message, content=[], usage={"input_tokens": prompt_tokens, "output_tokens": 1})}, "message_start")
+		self._event({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}, "content_block_start")
+		for piece in _pieces(text):
+			self._event({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}}, "content_block_delta")
+			time.sleep(self.mock.token_interval)
+		self._event({"type": "content_block_stop", "index": 0}, "content_block_stop")
+		self._event({
+			"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+			"usage": {"output_tokens": completion_tokens}
+		}, "message_delta")
+		self._event({"type": "message_stop"}, "message_stop")
+		self._end_stream()
+
+
+class MockLLMServer(ThreadingHTTPServer):
+	"""
+	Local server speaking the OpenAI chat completions (/v1/chat/completions, also
+	under /openai/v1 as Groq) and Anthropic messages (/v1/messages) formats,
+	streamed or not, with the behaviour of a MockLLM. Point a player at it with
+	base_url (url for OpenAI, root_url for Anthropic and Groq). GET /stats returns
+	the request and token counts.
+	"""
+	daemon_threads = True
+
+	def __init__(self, mock: Optional[MockLLM] = None, host: str = "127.0.0.1", port: int = 0):
+		super().__init__((host, port), _Handler)
+		self.mock = mock if mock is not None else MockLLM()
+		self._thread: Optional[threading.Thread] = None
+
+	@property
+	def root_url(self) -> str:
+		host, port = self.server_address[:2]
+		return f"http://{host}:{port}"
+
+	@property
+	def url(self) -> str:
+		return f"{self.root_url}/v1"
+
+	def start(self) -> "MockLLMServer":
+		"""Serve from a background thread."""
+		self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+		self._thread.start()
+		return self
+
+	def stop(self):
+		self.shutdown()
+		self.server_close()
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Mock OpenAI/Anthropic-compatible LLM server for load-testing the harness')
+	parser.add_argument('--host', type=str, default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=8000)
+	parser.add_argument('--latency', type=float, default=0.5, help='Median seconds before the first token (default: 0.5)')
+	parser.add_argument('--latency-sigma', type=float, default=0.5, help='Spread of the lognormal latency (default: 0.5)')
+	parser.add_argument('--token-interval', type=float, default=0.0, help='Seconds per output token (default: 0)')
+	parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Share of requests answered with a 429 (default: 0)')
+	parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with a 500 (default: 0)')
+	parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After of the 429s in seconds (default: 1)')
+	parser.add_argument('--think-tokens', type=int, default=200, help='Length of the answers to THINK prompts (default: 200)')
+	parser.add_argument('--seed', type=int, default=None)
+	args = parser.parse_args()
+
+	mock = MockLLM(
+		latency=args.latency,
+		latency_sigma=args.latency_sigma,
+		token_interval=args.token_interval,
+		rate_limit_rate=args.rate_limit_rate,
+		error_rate=args.error_rate,
+		retry_after=args.retry_after,
+		think_tokens=args.think_tokens,
+		seed=args.seed
+	)
+	server = MockLLMServer(mock, args.host, args.port)
+	print(f"Mock LLM server on {server.root_url} (OpenAI base_url {server.url}, Anthropic/Groq base_url {server.root_url})")
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+		print(f"Served: {json.dumps(mock.stats)}")
+
+
+if __name__ == "__main__":
+	main()
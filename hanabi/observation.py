@@ -0,0 +1,39 @@
+from typing import List, NamedTuple, Optional, Tuple
+import numpy as np
+from hanabi.actions import action_table
+from hanabi.history import Event
+from hanabi.render import StateSnapshot
+
+
+class Observation(NamedTuple):
+	"""
+	What one player sees of the game, as arrays and ints instead of text.
+	fireworks and discard_counts are read-only views of the engine's arrays,
+	so they are only valid until the next move (copy them to keep them).
+	Colors are in COLORS order and cards are card codes (see hanabi.actions).
+	"""
+	player: int
+	current_player: int
+	turn: int
+	lives: int
+	info_tokens: int
+	deck_size: int
+	fireworks: np.ndarray # (5,) highest card played per color
+	discard_counts: np.ndarray # (5, 5) discarded cards by color and number - 1
+	hands: np.ndarray # (P, 4) card codes, EMPTY for empty slots and for the player's own cards
+	hand_sizes: Tuple[int, ...]
+	clue_masks: List[Optional[List[int]]] # per hand and clue attribute, matching positions as a bitmask (None for the own hand)
+	legal_moves: int # bitmask over the actions of action_table(P)
+	events: List[Event] # turns since the player's last move
+	state: Optional[StateSnapshot] # rendered text fragments, None if no player at the table reads prompts
+
+	@property
+	def score(self) -> int:
+		return int(self.fireworks.sum())
+
+	def legal_actions(self) -> List[int]:
+		"""Legal action ids, in the order the other hands are listed."""
+		return action_table(len(self.hand_sizes)).listed(self.player, self.legal_moves)
+
+	def action_to_move(self, action: int) -> str:
+		return action_table(len(self.hand_sizes)).move_string(self.player, action, self.clue_masks, self.hand_sizes)
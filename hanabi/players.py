@@ -1,16 +1,29 @@
 from abc import ABC, abstractmethod
+import asyncio
 import random
-from typing import List, Optional
-from openai import OpenAI
+import time
+from typing import Any, AsyncIterator, Dict, Generator, Iterator, List, Optional, Tuple, Union
 import os
-from anthropic import Anthropic
-import google.generativeai as genai
-from groq import Groq
+from hanabi.context import ContextPolicy, get_context_policy
+from hanabi.cache import CacheMiss, ResponseCache
+from hanabi.clients import configure_gemini, get_async_client, get_client
+from hanabi.ratelimit import ProviderError, RequestScheduler, is_provider_error, request_tokens
+from hanabi.actions import action_table, extract_move
+from hanabi.observation import Observation
 
 
 class Player(ABC):
+	needs_prompt: bool = True # False for players that are given an Observation (see hanabi.observation) instead of the text prompt
+
 	def __init__(self):
 		self.history = []  # List of (game_state, action) tuples
+		self.game = None
+		self.seat = None
+
+	def attach(self, game, seat: int):
+		"""Called by HanabiGame when a game starts."""
+		self.game = game
+		self.seat = seat
 	
 	@abstractmethod
 	def _generate_move(self, game_state: str) -> str:
@@ -26,6 +39,24 @@ class Player(ABC):
 		self.history.append((game_state, move))
 		return move
 
+	async def _generate_move_async(self, game_state: str) -> str:
+		"""Async variant of _generate_move. By default the blocking call runs in a worker thread."""
+		return await asyncio.to_thread(self._generate_move, game_state)
+
+	async def take_turn_async(self, game_state: str) -> str:
+		"""Async variant of take_turn, used when many games are played concurrently."""
+		move = await self._generate_move_async(game_state)
+		self.history.append((game_state, move))
+		return move
+
+	def turn_record(self) -> Dict[str, Any]:
+		"""What the last turn added to the player's state besides the move, saved in game checkpoints."""
+		return {}
+
+	def replay_turn(self, game_state: str, move: str, record: Dict[str, Any]):
+		"""Restore a turn from a checkpoint instead of taking it."""
+		self.history.append((game_state, move))
+
 
 class PromptLoaderMixin:
 	def _load_prompts(self, system_prompt: Optional[str] = None, 
@@ -52,64 +83,391 @@ class PromptLoaderMixin:
 
 
 class RandomPlayer(Player):
+	needs_prompt = False
+
+	def __init__(self, rng: Optional[random.Random] = None):
+		super().__init__()
+		self.rng = rng if rng is not None else random # pass a seeded random.Random for reproducible games
+
+	def _generate_move(self, observation: Observation) -> str:
+		legal = observation.legal_moves
+		# same draw as rng.choice over the legal moves listed in seat order
+		action = action_table(len(observation.hand_sizes)).nth_listed(observation.player, legal, self.rng.randrange(legal.bit_count()))
+		return observation.action_to_move(action)
+
+	async def _generate_move_async(self, observation: Observation) -> str:
+		return self._generate_move(observation) # CPU only, no need for a thread
+
+	def replay_turn(self, observation: Observation, move: str, record: Dict[str, Any]):
+		self._generate_move(observation) # keeps the rng in step with the original game
+		super().replay_turn(observation, move, record)
+
+
+# text and token usage (or None) of one piece of a streamed response
+Chunk = Tuple[str, Optional[Dict[str, Optional[int]]]]
+
+
+class LLMPlayer(Player, PromptLoaderMixin):
+	"""
+	Shared turn loop for the chat-based players. A turn is one request, or
+	cot + 1 requests with chain of thought (THINK prompts followed by a final
+	PLAY prompt). Subclasses say how to build, send and read a single request.
+	Responses are streamed by default, and the stream of a PLAY request is
+	closed as soon as it contains a complete move (see hanabi.actions.extract_move).
+	"""
+	cot: int = 0
+	debug: bool = False
+	conversation_start: int = 0 # messages before this index (the system prompt) are always sent
+
+	def __init__(self, context: Union[None, str, ContextPolicy] = None, stream: bool = True):
+		super().__init__()
+		self.context = get_context_policy(context)
+		self.stream = stream
+		self._expect_move = False # whether the request being sent is a PLAY request
+		self.turn_starts: List[int] = [] # index in messages of the first prompt of each turn
+		self.turn_log_starts: List[int] = [] # index in the game log of the first event shown in each turn
+		self.cache: Optional[ResponseCache] = None # set by the experiment runner
+		self.scheduler = RequestScheduler() # retries only, the experiment runner shares a paced one per provider
+		self.turn_outputs: List[List[str]] = [] # raw outputs of every call, per turn
+		self.turn_calls: List[List[Dict[str, Any]]] = [] # telemetry of every call, per turn (see _new_call)
+
+	def _debug_print(self, message: str):
+		if self.debug:
+			print(message)
+
+	def _turn(self, game_state: str) -> Generator[Dict[str, Any], str, str]:
+		"""
+		Yields the request args for each call of the turn and is sent back the
+		model output. Returns the final output, which is the move.
+		"""
+		output = ""
+		for i in range(self.cot + 1):
+			final = i == self.cot
+			suffix = self.play_suffix if final else self.think_suffix
+			content = game_state + "\n" + suffix if i == 0 else suffix
+			if i == 0:
+				self.turn_starts.append(len(self.messages))
+				self.turn_log_starts.append(self.game.last_seen[self.seat] if self.game is not None else 0)
+				self.turn_outputs.append([])
+				self.turn_calls.append([])
+			self._debug_print(f">>>>>>> LLM input:\n {content}\n")
+			self._expect_move = final
+			output = yield self._build_request(content, final)
+			self._debug_print(f">>>>>>> LLM output:\n {output}\n")
+			self.turn_outputs[-1].append(output)
+			self._record_output(output)
+		return extract_move(output) or output # text around the move is ignored, without a move it is invalid anyway
+
 	def _generate_move(self, game_state: str) -> str:
-		
-		# If game state includes a line "Previous turns:", remove everything after it
-		if "Previous turns:" in game_state:
-			game_state = game_state.split("Previous turns:")[0]
+		turn = self._turn(game_state)
+		request = next(turn)
+		while True:
+			call, start = self._new_call(), time.perf_counter()
+			try:
+				output = self._complete(request, call)
+			except CacheMiss:
+				raise # replay must not silently turn into a lost life
+			except Exception as e:
+				self._finish_call(call, start, e)
+				if is_provider_error(e):
+					raise ProviderError(f"{type(e).__name__}: {e}") from e # an outage is not a move of the model
+				print(f"Error generating move: {e}")
+				return "ERROR"
+			self._finish_call(call, start)
+			try:
+				request = turn.send(output)
+			except StopIteration as done:
+				return done.value
+
+	async def _generate_move_async(self, game_state: str) -> str:
+		turn = self._turn(game_state)
+		request = next(turn)
+		while True:
+			call, start = self._new_call(), time.perf_counter()
+			try:
+				output = await self._complete_async(request, call)
+			except CacheMiss:
+				raise
+			except Exception as e:
+				self._finish_call(call, start, e)
+				if is_provider_error(e):
+					raise ProviderError(f"{type(e).__name__}: {e}") from e # an outage is not a move of the model
+				print(f"Error generating move: {e}")
+				return "ERROR"
+			self._finish_call(call, start)
+			try:
+				request = turn.send(output)
+			except StopIteration as done:
+				return done.value
+
+	def turn_record(self) -> Dict[str, Any]:
+		start = self.turn_starts[-1] if self.turn_starts else len(self.messages)
+		return {
+			"messages": self.messages[start:],
+			"outputs": self.turn_outputs[-1] if self.turn_outputs else [],
+			"calls": self.turn_calls[-1] if self.turn_calls else []
+		}
+
+	def replay_turn(self, game_state: str, move: str, record: Dict[str, Any]):
+		super().replay_turn(game_state, move, record)
+		self.turn_starts.append(len(self.messages))
+		self.turn_log_starts.append(self.game.last_seen[self.seat] if self.game is not None else 0)
+		self.turn_outputs.append(record["outputs"])
+		self.turn_calls.append(record.get("calls", [])) # older checkpoints have no telemetry
+		self.messages.extend(record["messages"])
+
+	def _cache_identity(self) -> Dict[str, Any]:
+		"""Everything besides the request args that determines a response."""
+		return {
+			"player": type(self).__name__,
+			"model": self.model,
+			"base_url": getattr(self, "base_url", None),
+			"system": self.system_prompt
+		}
+
+	def _cache_key(self, request: Dict[str, Any], streamed: Optional[bool] = None) -> str:
+		"""
+		Response cache key of a request. A streamed PLAY output ends at the move (see
+		_read_stream), so it is kept apart from complete outputs of the same request.
+		"""
+		identity = self._cache_identity()
+		if (self.stream if streamed is None else streamed) and self._expect_move:
+			identity["stream"] = True
+		return self.cache.key(identity, request)
+
+	def _new_call(self) -> Dict[str, Any]:
+		"""Telemetry span of one request, stored with the game's results (see ResultsStore.add_game)."""
+		context_tokens, sent_context_tokens = self.context.last_sizes or (None, None) # of the request just built
+		return {
+			"turn": self.game.turns_played if self.game is not None else None,
+			"seat": self.seat,
+			"call": len(self.turn_calls[-1]), # 0..cot within the turn
+			"latency": None, # seconds
+			"time_to_first_token": None, # only known for streamed responses
+			"prompt_tokens": None,
+			"completion_tokens": None,
+			"reasoning_tokens": None,
+			"usage_estimated": False, # tokens estimated by _estimate_usage, not reported
+			"context_tokens": context_tokens, # estimated size of the whole conversation
+			"sent_context_tokens": sent_context_tokens, # and of the part the context policy sent
+			"retries": 0,
+			"cached": False,
+			"error": None
+		}
+
+	def _finish_call(self, call: Dict[str, Any], start: float, error: Optional[Exception] = None):
+		call["latency"] = round(time.perf_counter() - start, 4)
+		if error is not None:
+			call["error"] = f"{type(error).__name__}: {error}"
+		self.turn_calls[-1].append(call)
+
+	def _complete(self, request: Dict[str, Any], call: Dict[str, Any]) -> str:
+		"""Get the output text for one request, from the response cache if possible, and fill in its telemetry."""
+		if self.cache is None or not self.cache.enabled:
+			return self._request(request, call)
+		key = self._cache_key(request)
+		output = self.cache.get(key)
+		if output is None:
+			output = self._request(request, call)
+			self.cache.put(key, output)
+		else:
+			call["cached"] = True
+		return output
 
-		# Parse the game state to get number of cards in hand
-		hand_line = [line for line in game_state.split('\n') if "Your hand:" in line][0]
-		num_cards = len([c for c in hand_line if c == '*'])
-		
-		# Parse info tokens
-		info_line = [line for line in game_state.split('\n') if "Information tokens:" in line][0]
-		info_tokens = int(info_line.split(':')[1].split('/')[0].strip())
-		
-		# Generate possible moves
-		possible_moves = []
-		
-		# Add play moves
-		for i in range(num_cards):
-			possible_moves.append(f"P{i+1}")
-		
-		# Add discard moves (only if not at max info tokens)
-		if info_tokens < 8:
-			for i in range(num_cards):
-				possible_moves.append(f"D{i+1}")
-		
-		# Add clue moves (only if have info tokens)
-		if info_tokens > 0:
-			# Get other players' hands
-			other_hands_section = game_state.split("Other hands:\n")[1].split("\n")
-			for line in other_hands_section:
-				if ':' in line:  # Only process lines that contain player hands
-					# print(line)
-					player_num = line.split(':')[0].split()[1]
-					cards = line.split(':')[1].strip()
-					if cards:  # If player has cards
-						# Add color clues
-						for color in 'RGBYW':
-							positions = []
-							for i, card in enumerate(cards.split()):
-								if card[1] == color:  # [R1] format
-									positions.append(str(i+1))
-							if positions:  # Only add if there are matching cards
-								possible_moves.append(f"C{player_num}C{color}{''.join(positions)}")
-						
-						# Add number clues
-						for number in range(1, 6):
-							positions = []
-							for i, card in enumerate(cards.split()):
-								if int(card[2]) == number:  # [R1] format
-									positions.append(str(i+1))
-							if positions:  # Only add if there are matching cards
-								possible_moves.append(f"C{player_num}N{number}{''.join(positions)}")
-		
-		return random.choice(possible_moves)
+	async def _complete_async(self, request: Dict[str, Any], call: Dict[str, Any]) -> str:
+		if self.cache is None or not self.cache.enabled:
+			return await self._request_async(request, call)
+		key = self._cache_key(request)
+		output = self.cache.get(key)
+		if output is None:
+			output = await self._request_async(request, call)
+			self.cache.put(key, output)
+		else:
+			call["cached"] = True
+		return output
+
+	def _request(self, request: Dict[str, Any], call: Dict[str, Any]) -> str:
+		"""Send a request when the scheduler allows it, retrying transient failures, and read the output."""
+		estimate = request_tokens(request)
+		while True:
+			time.sleep(self.scheduler.acquire(estimate))
+			start = time.perf_counter()
+			try:
+				if self.stream:
+					return self._read_stream(self._send_stream(request), call, start, estimate)
+				response = self._send(request)
+			except Exception as e:
+				delay = self.scheduler.retry_delay(e, call["retries"])
+				if delay is None:
+					raise
+				call["retries"] += 1
+				time.sleep(delay)
+				continue
+			return self._read(response, call, estimate)
+
+	async def _request_async(self, request: Dict[str, Any], call: Dict[str, Any]) -> str:
+		estimate = request_tokens(request)
+		while True:
+			await asyncio.sleep(self.scheduler.acquire(estimate))
+			start = time.perf_counter()
+			try:
+				if self.stream:
+					return await self._read_stream_async(await self._send_stream_async(request), call, start, estimate)
+				response = await self._send_async(request)
+			except Exception as e:
+				delay = self.scheduler.retry_delay(e, call["retries"])
+				if delay is None:
+					raise
+				call["retries"] += 1
+				await asyncio.sleep(delay)
+				continue
+			return self._read(response, call, estimate)
+
+	def _read(self, response: Any, call: Dict[str, Any], estimate: int) -> str:
+		call.update(self._usage(response))
+		self._settle(call, estimate)
+		return self._parse(response)
+
+	def _settle(self, call: Dict[str, Any], estimate: int):
+		if call["prompt_tokens"] is not None and call["completion_tokens"] is not None:
+			self.scheduler.settle(estimate, call["prompt_tokens"] + call["completion_tokens"])
+
+	def _add_chunk(self, output: List[str], chunk: Chunk, call: Dict[str, Any], start: float) -> bool:
+		"""Add a streamed chunk to the output. True once the output holds a complete move and the stream can be closed."""
+		text, usage = chunk
+		if usage:
+			call.update(usage)
+		if not text:
+			return False
+		if call["time_to_first_token"] is None:
+			call["time_to_first_token"] = round(time.perf_counter() - start, 4)
+		output.append(text)
+		return self._expect_move and extract_move("".join(output), complete=False) is not None
+
+	def _estimate_usage(self, call: Dict[str, Any], estimate: int, output: str):
+		"""
+		Usage of a stream closed before its usage chunk arrived: the prompt as reported
+		at the start (Anthropic) or estimated from the request, and ~4 characters per
+		output token. Hidden reasoning is not seen, so reasoning_tokens stays unknown.
+		"""
+		if call["prompt_tokens"] is None:
+			call["prompt_tokens"] = estimate
+			call["usage_estimated"] = True
+		if call["completion_tokens"] is None:
+			call["completion_tokens"] = max(1, len(output) // 4)
+			call["usage_estimated"] = True
+
+	def _read_stream(self, chunks: Iterator[Chunk], call: Dict[str, Any], start: float, estimate: int) -> str:
+		# usage comes at the end of a stream, so it is estimated for streams closed early
+		output, closed = [], False
+		try:
+			for chunk in chunks:
+				if self._add_chunk(output, chunk, call, start):
+					closed = True
+					break
+		finally:
+			chunks.close()
+		if closed:
+			self._estimate_usage(call, estimate, "".join(output))
+		self._settle(call, estimate)
+		return "".join(output).strip()
+
+	async def _read_stream_async(self, chunks: AsyncIterator[Chunk], call: Dict[str, Any], start: float, estimate: int) -> str:
+		output, closed = [], False
+		try:
+			async for chunk in chunks:
+				if self._add_chunk(output, chunk, call, start):
+					closed = True
+					break
+		finally:
+			await chunks.aclose()
+		if closed:
+			self._estimate_usage(call, estimate, "".join(output))
+		self._settle(call, estimate)
+		return "".join(output).strip()
+
+	def _send_stream(self, request: Dict[str, Any]) -> Iterator[Chunk]:
+		"""Streamed variant of _send, as a generator of chunks. By default the whole response is one chunk."""
+		response = self._send(request)
+		yield self._parse(response), self._usage(response)
+
+	async def _send_stream_async(self, request: Dict[str, Any]) -> AsyncIterator[Chunk]:
+		response = await self._send_async(request)
+		async def chunks():
+			yield self._parse(response), self._usage(response)
+		return chunks()
+
+	def _usage(self, response: Any) -> Dict[str, Optional[int]]:
+		"""Token counts of a provider response (prompt_tokens, completion_tokens, reasoning_tokens), where reported."""
+		return {}
+
+	def _summarize(self, first_kept: int) -> str:
+		if self.game is None:
+			return ""
+		return self.game.log.summarize(self.turn_log_starts[first_kept])
+
+	def _context_messages(self) -> List[Dict[str, str]]:
+		"""The part of the conversation to send with the next request, as chosen by the context policy."""
+		start = self.conversation_start
+		turn_starts = [i - start for i in self.turn_starts]
+		return self.messages[:start] + self.context.apply(self.messages[start:], turn_starts, self._summarize)
+
+	@abstractmethod
+	def _build_request(self, content: str, final: bool) -> Dict[str, Any]:
+		"""Add the user content to the conversation and return the request args."""
+		pass
+
+	@abstractmethod
+	def _send(self, request: Dict[str, Any]) -> Any:
+		pass
 
+	@abstractmethod
+	async def _send_async(self, request: Dict[str, Any]) -> Any:
+		pass
+
+	@abstractmethod
+	def _parse(self, response: Any) -> str:
+		"""Extract the output text from a provider response."""
+		pass
+
+	def _record_output(self, output: str):
+		"""Add the model output to the conversation."""
+		self.messages.append({"role": "assistant", "content": output})
+
+
+def _chat_completion_chunks(stream: Any) -> Iterator[Chunk]:
+	try:
+		for chunk in stream:
+			yield (chunk.choices[0].delta.content or "") if chunk.choices else "", _chat_completion_usage(chunk)
+	finally:
+		stream.close()
+
+
+async def _chat_completion_chunks_async(stream: Any) -> AsyncIterator[Chunk]:
+	try:
+		async for chunk in stream:
+			yield (chunk.choices[0].delta.content or "") if chunk.choices else "", _chat_completion_usage(chunk)
+	finally:
+		await stream.close()
+
+
+def _chat_completion_usage(response: Any) -> Dict[str, Optional[int]]:
+	# OpenAI-compatible APIs (OpenAI, xAI, Groq), responses and stream chunks alike
+	usage = getattr(response, "usage", None) or getattr(getattr(response, "x_groq", None), "usage", None)
+	if usage is None:
+		return {}
+	details = getattr(usage, "completion_tokens_details", None)
+	return {
+		"prompt_tokens": usage.prompt_tokens,
+		"completion_tokens": usage.completion_tokens,
+		"reasoning_tokens": getattr(details, "reasoning_tokens", None)
+	}
+
+
+class GPTPlayer(LLMPlayer):
+	conversation_start = 1
+	_stream_args = {"stream": True, "stream_options": {"include_usage": True}} # usage arrives in a last chunk
 
-class GPTPlayer(Player, PromptLoaderMixin):
 	def __init__(
 			self, 
 			model: str = "gpt-3.5-turbo", 
@@ -120,13 +478,15 @@ class GPTPlayer(Player, PromptLoaderMixin):
 			system_prompt: Optional[str] = None, 
 			play_suffix: Optional[str] = None, 
 			think_suffix: Optional[str] = None,
-			base_url: Optional[str] = None # to use Groq or Xai, set to their base_url instead of None
+			base_url: Optional[str] = None, # to use Groq or Xai, set to their base_url instead of None
+			context: Union[None, str, ContextPolicy] = None, # e.g. "window:5", see hanabi.context
+			stream: bool = True
 		): 
-		super().__init__()
-		self.client = OpenAI(
-			api_key=api_key,
-			base_url=base_url  # Will use OpenAI's default if None, or can be set to Groq's URL
-		)
+		super().__init__(context, stream)
+		self.client = get_client("openai", api_key, base_url) # base_url: OpenAI's default if None, or another compatible API
+		self.api_key = api_key
+		self.base_url = base_url
+		self._async_client = None
 		self.model = model
 		self.cot = cot
 		self.debug = debug
@@ -138,92 +498,72 @@ class GPTPlayer(Player, PromptLoaderMixin):
 			{"role": "system", "content": self.system_prompt}
 		]
 
-	def _debug_print(self, message: str):
-		if self.debug:
-			print(message)
-	
-	def _generate_move(self, game_state: str) -> str:
-		# Add game state to conversation history
-		if self.cot == 0:
-			content = game_state + "\n" + self.play_suffix
-		else:
-			content = game_state + "\n" + self.think_suffix
+	@property
+	def async_client(self) -> Any:
+		if self._async_client is None:
+			self._async_client = get_async_client("openai", self.api_key, self.base_url)
+		return self._async_client
 
+	def _build_request(self, content: str, final: bool) -> Dict[str, Any]:
 		self.messages.append({"role": "user", "content": content})
-		self._debug_print(f">>>>>>> LLM input:\n {content}\n")
-
-		# Call LLM
-		try:
-			completion_args = {
-				"model": self.model,
-				"messages": self.messages
-			}
-			if self.reasoning_effort is not None:
-				completion_args["reasoning_effort"] = self.reasoning_effort
+		completion_args = {
+			"model": self.model,
+			"messages": self._context_messages()
+		}
+		if self.reasoning_effort is not None:
+			completion_args["reasoning_effort"] = self.reasoning_effort
+		return completion_args
+
+	def _send(self, request: Dict[str, Any]) -> Any:
+		raw = self.client.chat.completions.with_raw_response.create(**request)
+		self.scheduler.observe(raw.headers)
+		return raw.parse()
+
+	async def _send_async(self, request: Dict[str, Any]) -> Any:
+		raw = await self.async_client.chat.completions.with_raw_response.create(**request)
+		self.scheduler.observe(raw.headers)
+		return raw.parse()
+
+	def _send_stream(self, request: Dict[str, Any]) -> Iterator[Chunk]:
+		raw = self.client.chat.completions.with_raw_response.create(**request, **self._stream_args)
+		self.scheduler.observe(raw.headers)
+		return _chat_completion_chunks(raw.parse())
+
+	async def _send_stream_async(self, request: Dict[str, Any]) -> AsyncIterator[Chunk]:
+		raw = await self.async_client.chat.completions.with_raw_response.create(**request, **self._stream_args)
+		self.scheduler.observe(raw.headers)
+		return _chat_completion_chunks_async(raw.parse())
+
+	def _parse(self, response: Any) -> str:
+		return response.choices[0].message.content.strip()
+
+	def _usage(self, response: Any) -> Dict[str, Optional[int]]:
+		return _chat_completion_usage(response)
 			
-			response = self.client.chat.completions.create(**completion_args)
-			output = response.choices[0].message.content.strip()
-			self._debug_print(f">>>>>>> LLM output:\n {output}\n")
-		except Exception as e:
-			print(f"Error generating move: {e}")
-			return "ERROR"
-		
-		# add output to conversation history
-		self.messages.append({"role": "assistant", "content": output})
-		
-		# if COT == 0, return output
-		if self.cot == 0:
-			return output
-		
-		# if COT > 0, continue to generate moves	
-		for i in range(self.cot):
-			if i == self.cot - 1: # last iteration, play move
-				self.messages.append({
-					"role": "user", 
-					"content": self.play_suffix
-				})
-				self._debug_print(f">>>>>>> LLM input:\n {self.play_suffix}\n")
-			else: # intermediate iterations, think move
-				self.messages.append({
-					"role": "user", 
-					"content": self.think_suffix
-				})
-				self._debug_print(f">>>>>>> LLM input:\n {self.think_suffix}\n")
-			
-			# Get response from API
-			completion_args = {
-				"model": self.model,
-				"messages": self.messages
-			}
-			if self.reasoning_effort is not None:
-				completion_args["reasoning_effort"] = self.reasoning_effort
-			
-			try:
-				response = self.client.chat.completions.create(**completion_args)
-			except Exception as e:
-				print(f"Error generating move: {e}")
-				return "ERROR"
 
-			# Extract move from response
-			output = response.choices[0].message.content.strip()
-			self._debug_print(f">>>>>>> LLM output:\n{output}\n")
-			
-			# Add response to conversation history
-			self.messages.append({
-				"role": "assistant",
-				"content": output
-			})
-		
-		return output # the final output is the move
-			
+def _message_event_chunk(event: Any) -> Chunk:
+	# Anthropic stream events: usage comes in message_start and message_delta, thinking deltas are skipped
+	if event.type == "message_start":
+		return "", {"prompt_tokens": event.message.usage.input_tokens}
+	if event.type == "message_delta":
+		return "", {"completion_tokens": event.usage.output_tokens}
+	if event.type == "content_block_delta" and event.delta.type == "text_delta":
+		return event.delta.text, None
+	return "", None
+
 
-class ClaudePlayer(Player, PromptLoaderMixin):
+class ClaudePlayer(LLMPlayer):
 	def __init__(self, model: str = "claude-3-sonnet-20240229", api_key: Optional[str] = None, 
 				 cot: int = 0, system_prompt: Optional[str] = None, 
 				 play_suffix: Optional[str] = None, think_suffix: Optional[str] = None,
-				 debug: bool = False, thinking_tokens: Optional[int] = None):
-		super().__init__()
-		self.client = Anthropic(api_key=api_key)
+				 debug: bool = False, thinking_tokens: Optional[int] = None,
+				 context: Union[None, str, ContextPolicy] = None, stream: bool = True,
+				 base_url: Optional[str] = None):
+		super().__init__(context, stream)
+		self.client = get_client("anthropic", api_key, base_url)
+		self.api_key = api_key
+		self.base_url = base_url
+		self._async_client = None
 		self.model = model
 		self.cot = cot
 		self.debug = debug
@@ -236,167 +576,164 @@ class ClaudePlayer(Player, PromptLoaderMixin):
 		self._load_prompts(system_prompt, play_suffix, think_suffix)
 		self.messages = []
 
-	def _debug_print(self, message: str):
-		if self.debug:
-			print(message)
-	
-	def _generate_move(self, game_state: str) -> str:
-		# Initial content based on COT
-		if self.cot == 0:
-			content = game_state + "\n" + self.play_suffix
-			max_tokens = 32 + int(self.is_thinking) * self.thinking_tokens
+	@property
+	def async_client(self) -> Any:
+		if self._async_client is None:
+			self._async_client = get_async_client("anthropic", self.api_key, self.base_url)
+		return self._async_client
+
+	def _build_request(self, content: str, final: bool) -> Dict[str, Any]:
+		# PLAY prompts only need a move string, THINK prompts get room to reason
+		if final:
+			max_tokens = 32 + int(self.is_thinking) * self.thinking_tokens # adds thinking_tokens for thinking to total budget
 		else:
-			content = game_state + "\n" + self.think_suffix
 			max_tokens = 2048 + int(self.is_thinking) * self.thinking_tokens
 
 		self.messages.append({"role": "user", "content": content})
-		self._debug_print(f">>>>>>> LLM input:\n {content}\n")
-		
-		try:
-			create_args = {
-				"model": self.model,
-				"messages": self.messages,
-				"max_tokens": max_tokens,
-				"system": self.system_prompt
+		create_args = {
+			"model": self.model,
+			"messages": self._context_messages(),
+			"max_tokens": max_tokens,
+			"system": self.system_prompt
+		}
+		if self.is_thinking:
+			create_args["thinking"] = {
+				"type": "enabled",
+				"budget_tokens": self.thinking_tokens
 			}
-			if self.is_thinking:
-				create_args["thinking"] = {
-					"type": "enabled",
-					"budget_tokens": self.thinking_tokens
-				}
-				create_args["extra_headers"] = {"anthropic-beta": "output-128k-2025-02-19"} # allows for very long outputs, hence more reasoning
-			
-			response = self.client.messages.create(**create_args)
-
-			# Extract text from response content
-			if self.is_thinking:
-				output = ""
-				for content_block in response.content:
-					if content_block.type == "text":
-						output = content_block.text
-						break
-			else:
-				output = response.content[0].text
-
-			self._debug_print(f">>>>>>> LLM output:\n {output}\n")
-		except Exception as e:
-			print(f"Error generating move: {e}")
-			return "ERROR"
-		
-		self.messages.append({"role": "assistant", "content": output})
-		
-		if self.cot == 0:
-			return output
-		
-		# if COT > 0, continue to generate moves	
-		for i in range(self.cot):
-			if i == self.cot - 1:
-				content = self.play_suffix
-				max_tokens = 32 + int(self.is_thinking) * self.thinking_tokens # adds thinking_tokens for thinking to total budget
-			else:
-				content = self.think_suffix
-				max_tokens = 2048 + int(self.is_thinking) * self.thinking_tokens
-			
-			self.messages.append({"role": "user", "content": content})
-			self._debug_print(f">>>>>>> LLM input:\n {content}\n")
-			
+			create_args["extra_headers"] = {"anthropic-beta": "output-128k-2025-02-19"} # allows for very long outputs, hence more reasoning
+		return create_args
+
+	def _send(self, request: Dict[str, Any]) -> Any:
+		raw = self.client.messages.with_raw_response.create(**request)
+		self.scheduler.observe(raw.headers)
+		return raw.parse()
+
+	async def _send_async(self, request: Dict[str, Any]) -> Any:
+		raw = await self.async_client.messages.with_raw_response.create(**request)
+		self.scheduler.observe(raw.headers)
+		return raw.parse()
+
+	def _send_stream(self, request: Dict[str, Any]) -> Iterator[Chunk]:
+		raw = self.client.messages.with_raw_response.create(**request, stream=True)
+		self.scheduler.observe(raw.headers)
+		stream = raw.parse()
+		try:
+			for event in stream:
+				yield _message_event_chunk(event)
+		finally:
+			stream.close()
+
+	async def _send_stream_async(self, request: Dict[str, Any]) -> AsyncIterator[Chunk]:
+		raw = await self.async_client.messages.with_raw_response.create(**request, stream=True)
+		self.scheduler.observe(raw.headers)
+		stream = raw.parse()
+		async def chunks():
 			try:
-				
-				create_args = {
-					"model": self.model,
-					"messages": self.messages,
-					"system": self.system_prompt,
-					"max_tokens": max_tokens
-				}
-				if self.is_thinking:
-					create_args["thinking"] = {
-						"type": "enabled",
-						"budget_tokens": self.thinking_tokens
-					}
-					create_args["betas"] = ["output-128k-2025-02-19"] # allows for very long outputs, hence more reasoning
-
-				response = self.client.messages.create(**create_args)
-
-				# Extract text from response content
-				if self.is_thinking:
-					output = ""
-					for content_block in response.content:
-						if content_block.type == "text":
-							output = content_block.text
-							break
-				else:
-					output = response.content[0].text
-
-				self._debug_print(f">>>>>>> LLM output:\n {output}\n")
-			except Exception as e:
-				print(f"Error generating move: {e}")
-				return "ERROR"
-			
-			self.messages.append({"role": "assistant", "content": output})
-		
-		return output
-
-
-class GeminiPlayer(Player, PromptLoaderMixin):
+				async for event in stream:
+					yield _message_event_chunk(event)
+			finally:
+				await stream.close()
+		return chunks()
+
+	def _parse(self, response: Any) -> str:
+		# Extract text from response content
+		if self.is_thinking:
+			for content_block in response.content:
+				if content_block.type == "text":
+					return content_block.text
+			return ""
+		return response.content[0].text
+
+	def _usage(self, response: Any) -> Dict[str, Optional[int]]:
+		# thinking tokens are billed as output tokens and not reported separately
+		usage = getattr(response, "usage", None)
+		if usage is None:
+			return {}
+		return {"prompt_tokens": usage.input_tokens, "completion_tokens": usage.output_tokens}
+
+
+class GeminiPlayer(LLMPlayer):
 	def __init__(self, model: str = "gemini-pro", api_key: Optional[str] = None, 
 				 cot: int = 0, system_prompt: Optional[str] = None, 
 				 play_suffix: Optional[str] = None, think_suffix: Optional[str] = None,
-				 debug: bool = False):
-		super().__init__()
-		if api_key:
-			genai.configure(api_key=api_key)
-		self.model = model
+				 debug: bool = False, context: Union[None, str, ContextPolicy] = None, stream: bool = True):
+		super().__init__(context, stream)
+		import google.generativeai as genai # only loaded by the processes that use it, see hanabi.registry
+		configure_gemini(api_key)
+		self.model_name = model
 		self.cot = cot
 		self.debug = debug
 		self._load_prompts(system_prompt, play_suffix, think_suffix)
 		self.model = genai.GenerativeModel(model, system_instruction=self.system_prompt)
-		self.chat = self.model.start_chat(history=[])
-
-	def _debug_print(self, message: str):
-		if self.debug:
-			print(message)
-	
-	def _generate_move(self, game_state: str) -> str:
-		if self.cot == 0:
-			content = game_state + "\n" + self.play_suffix
-		else:
-			content = game_state + "\n" + self.think_suffix
+		# the conversation is kept here rather than in a chat session, so the context policy can trim it
+		self.messages = []
 
-		self._debug_print(f">>>>>>> LLM input:\n {content}\n")
-		
+	def _build_request(self, content: str, final: bool) -> Dict[str, Any]:
+		self.messages.append({"role": "user", "content": content})
+		return {
+			"contents": [
+				{"role": "model" if m["role"] == "assistant" else "user", "parts": [m["content"]]}
+				for m in self._context_messages()
+			]
+		}
+
+	def _cache_identity(self) -> Dict[str, Any]:
+		return dict(super()._cache_identity(), model=self.model_name)
+
+	def _send(self, request: Dict[str, Any]) -> Any:
+		return self.model.generate_content(**request)
+
+	async def _send_async(self, request: Dict[str, Any]) -> Any:
+		return await self.model.generate_content_async(**request)
+
+	def _send_stream(self, request: Dict[str, Any]) -> Iterator[Chunk]:
+		for chunk in self.model.generate_content(**request, stream=True):
+			yield self._chunk_text(chunk), self._usage(chunk)
+
+	async def _send_stream_async(self, request: Dict[str, Any]) -> AsyncIterator[Chunk]:
+		response = await self.model.generate_content_async(**request, stream=True)
+		async def chunks():
+			async for chunk in response:
+				yield self._chunk_text(chunk), self._usage(chunk)
+		return chunks()
+
+	@staticmethod
+	def _chunk_text(chunk: Any) -> str:
 		try:
-			response = self.chat.send_message(content)
-			output = response.text
-			self._debug_print(f">>>>>>> LLM output:\n {output}\n")
-		except Exception as e:
-			print(f"Error generating move: {e}")
-			return "ERROR"
-		
-		if self.cot == 0:
-			return output
-		
-		for i in range(self.cot):
-			content = self.play_suffix if i == self.cot - 1 else self.think_suffix
-			self._debug_print(f">>>>>>> LLM input:\n {content}\n")
-			
-			try:
-				response = self.chat.send_message(content)
-				output = response.text
-				self._debug_print(f">>>>>>> LLM output:\n {output}\n")
-			except Exception as e:
-				print(f"Error generating move: {e}")
-				return "ERROR"
-		
-		return output
+			return chunk.text
+		except ValueError: # e.g. a last chunk with only the finish reason
+			return ""
 
+	def _parse(self, response: Any) -> str:
+		return response.text
+
+	def _usage(self, response: Any) -> Dict[str, Optional[int]]:
+		usage = getattr(response, "usage_metadata", None)
+		if usage is None:
+			return {}
+		return {
+			"prompt_tokens": usage.prompt_token_count,
+			"completion_tokens": usage.candidates_token_count,
+			"reasoning_tokens": getattr(usage, "thoughts_token_count", None)
+		}
+
+
+class GroqPlayer(LLMPlayer):
+	conversation_start = 1
+	_stream_args = {"stream": True} # usage arrives in x_groq of the last chunk
 
-class GroqPlayer(Player, PromptLoaderMixin):
 	def __init__(self, model: str = "mixtral-8x7b-32768", api_key: Optional[str] = None, 
 				 cot: int = 0, system_prompt: Optional[str] = None, 
 				 play_suffix: Optional[str] = None, think_suffix: Optional[str] = None,
-				 debug: bool = False, is_thinking: bool = False):
-		super().__init__()
-		self.client = Groq(api_key=api_key)
+				 debug: bool = False, is_thinking: bool = False,
+				 context: Union[None, str, ContextPolicy] = None, stream: bool = True,
+				 base_url: Optional[str] = None):
+		super().__init__(context, stream)
+		self.client = get_client("groq", api_key, base_url)
+		self.api_key = api_key
+		self.base_url = base_url
+		self._async_client = None
 		self.model = model
 		self.cot = cot
 		self.debug = debug
@@ -406,60 +743,44 @@ class GroqPlayer(Player, PromptLoaderMixin):
 			{"role": "system", "content": self.system_prompt}
 		]
 
-	def _debug_print(self, message: str):
-		if self.debug:
-			print(message)
-	
-	def _generate_move(self, game_state: str) -> str:
-		if self.cot == 0:
-			content = game_state + "\n" + self.play_suffix
-		else:
-			content = game_state + "\n" + self.think_suffix
+	@property
+	def async_client(self) -> Any:
+		if self._async_client is None:
+			self._async_client = get_async_client("groq", self.api_key, self.base_url)
+		return self._async_client
 
+	def _build_request(self, content: str, final: bool) -> Dict[str, Any]:
 		self.messages.append({"role": "user", "content": content})
-		self._debug_print(f">>>>>>> LLM input:\n {content}\n")
-		
-		try:
-			completion_args = {
-				"model": self.model,
-				"messages": self.messages,
-			}
-			if self.is_thinking:
-				completion_args["reasoning_format"] = "hidden" # don't show reasoning for thinking models
-			
-			response = self.client.chat.completions.create(**completion_args)
-			output = response.choices[0].message.content.strip()
-			self._debug_print(f">>>>>>> LLM output:\n {output}\n")
-		except Exception as e:
-			print(f"Error generating move: {e}")
-			return "ERROR"
-		
-		self.messages.append({"role": "assistant", "content": output})
-		
-		if self.cot == 0:
-			return output
-		
-		for i in range(self.cot):
-			content = self.play_suffix if i == self.cot - 1 else self.think_suffix
-			self.messages.append({"role": "user", "content": content})
-			self._debug_print(f">>>>>>> LLM input:\n {content}\n")
-			
-			try:
-				completion_args = {
-					"model": self.model,
-					"messages": self.messages
-				}
-				if self.is_thinking:
-					completion_args["reasoning_format"] = "hidden" # don't show reasoning for thinking models
-				
-				response = self.client.chat.completions.create(**completion_args)
-				output = response.choices[0].message.content.strip()
-				self._debug_print(f">>>>>>> LLM output:\n {output}\n")
-			except Exception as e:
-				print(f"Error generating move: {e}")
-				return "ERROR"
-			
-			self.messages.append({"role": "assistant", "content": output})
-		
-		return output
-
+		completion_args = {
+			"model": self.model,
+			"messages": self._context_messages(),
+		}
+		if self.is_thinking:
+			completion_args["reasoning_format"] = "hidden" # don't show reasoning for thinking models
+		return completion_args
+
+	def _send(self, request: Dict[str, Any]) -> Any:
+		raw = self.client.chat.completions.with_raw_response.create(**request)
+		self.scheduler.observe(raw.headers)
+		return raw.parse()
+
+	async def _send_async(self, request: Dict[str, Any]) -> Any:
+		raw = await self.async_client.chat.completions.with_raw_response.create(**request)
+		self.scheduler.observe(raw.headers)
+		return raw.parse()
+
+	def _send_stream(self, request: Dict[str, Any]) -> Iterator[Chunk]:
+		raw = self.client.chat.completions.with_raw_response.create(**request, **self._stream_args)
+		self.scheduler.observe(raw.headers)
+		return _chat_completion_chunks(raw.parse())
+
+	async def _send_stream_async(self, request: Dict[str, Any]) -> AsyncIterator[Chunk]:
+		raw = await self.async_client.chat.completions.with_raw_response.create(**request, **self._stream_args)
+		self.scheduler.observe(raw.headers)
+		return _chat_completion_chunks_async(raw.parse())
+
+	def _parse(self, response: Any) -> str:
+		return response.choices[0].message.content.strip()
+
+	def _usage(self, response: Any) -> Dict[str, Optional[int]]:
+		return _chat_completion_usage(response)
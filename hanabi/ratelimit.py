@@ -0,0 +1,222 @@
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529} # 529: Anthropic overloaded
+AUTH_STATUS = {401, 403}
+
+# durations as in OpenAI's x-ratelimit-reset-* headers, e.g. "20ms", "1.5s" or "6m0s"
+DURATION_PATTERN = re.compile(r"(?:([\d.]+)h)?(?:([\d.]+)m(?!s))?(?:([\d.]+)s)?(?:([\d.]+)ms)?")
+
+
+class ProviderError(Exception):
+	"""
+	A request failed for reasons outside the model (rate limits, outages, bad keys)
+	and retrying did not help. It ends the game instead of costing a life, so the
+	game can be finished later with --resume.
+	"""
+	pass
+
+
+def status_code(error: BaseException) -> Optional[int]:
+	"""HTTP status of an SDK error (OpenAI, Anthropic and Groq use status_code, Google uses code)."""
+	for attribute in ("status_code", "code"):
+		value = getattr(error, attribute, None)
+		if isinstance(value, int):
+			return value
+	return getattr(getattr(error, "response", None), "status_code", None)
+
+
+def is_transient(error: BaseException) -> bool:
+	"""Whether a request that failed this way may succeed if sent again."""
+	if status_code(error) in RETRYABLE_STATUS:
+		return True
+	if isinstance(error, (TimeoutError, ConnectionError)):
+		return True
+	name = type(error).__name__ # e.g. APITimeoutError, APIConnectionError, ServiceUnavailable
+	return "Timeout" in name or "Connection" in name or name in ("ServiceUnavailable", "DeadlineExceeded", "ResourceExhausted")
+
+
+def is_provider_error(error: BaseException) -> bool:
+	"""
+	Whether an error is an infrastructure failure (outage, rate limit, network, bad key) rather than
+	something about the request. Other 4xx errors, e.g. a prompt over the context length, would fail
+	the same way on every --resume, so they go the usual "ERROR" (invalid move) way instead.
+	"""
+	status = status_code(error)
+	if status is not None and (status >= 500 or status in AUTH_STATUS):
+		return True
+	return is_transient(error)
+
+
+def _duration(value: str) -> Optional[float]:
+	"""Seconds in a header value: '2', '1.5', '20ms', '6m0s', an HTTP date or an RFC 3339 timestamp."""
+	value = value.strip()
+	try:
+		return float(value)
+	except ValueError:
+		pass
+	match = DURATION_PATTERN.fullmatch(value)
+	if value and match:
+		h, m, s, ms = (float(x) if x else 0.0 for x in match.groups())
+		return h * 3600 + m * 60 + s + ms / 1000
+	try:
+		when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+	except ValueError:
+		try:
+			when = parsedate_to_datetime(value)
+		except (TypeError, ValueError):
+			return None
+	if when.tzinfo is None:
+		when = when.replace(tzinfo=timezone.utc)
+	return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+	"""Seconds to wait according to Retry-After (or retry-after-ms), if the response says so."""
+	if not headers:
+		return None
+	if headers.get("retry-after-ms"):
+		return _duration(headers["retry-after-ms"] + "ms")
+	if headers.get("retry-after"):
+		return _duration(headers["retry-after"])
+	return None
+
+
+def exhausted_for(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+	"""
+	Seconds until a rate limit reported as used up in the response headers resets
+	(OpenAI/Groq x-ratelimit-*, Anthropic anthropic-ratelimit-*), or None.
+	"""
+	if not headers:
+		return None
+	wait = None
+	for remaining, reset in (
+		("x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+		("x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+		("anthropic-ratelimit-requests-remaining", "anthropic-ratelimit-requests-reset"),
+		("anthropic-ratelimit-tokens-remaining", "anthropic-ratelimit-tokens-reset"),
+	):
+		if headers.get(remaining) == "0" and headers.get(reset):
+			seconds = _duration(headers[reset])
+			if seconds is not None:
+				wait = seconds if wait is None else max(wait, seconds)
+	return wait
+
+
+def request_tokens(request: Dict[str, Any]) -> int:
+	"""Rough prompt size of a request (~4 characters per token), as in hanabi.context.estimate_tokens."""
+	return len(json.dumps(request, default=str)) // 4
+
+
+class TokenBucket:
+	"""
+	Refills at `rate` units per second up to `capacity`. reserve() takes the
+	units right away, letting the level go negative, and returns how long the
+	caller has to wait before using them, so waits are computed under the lock
+	and slept outside it, with time.sleep or asyncio.sleep alike.
+	"""
+	def __init__(self, rate: float, capacity: Optional[float] = None):
+		self.rate = rate
+		self.capacity = capacity if capacity is not None else rate * 60 # a minute's worth, e.g. the whole RPM
+		self.level = self.capacity
+		self.updated = time.monotonic()
+		self._lock = threading.Lock()
+
+	def _refill(self, now: float):
+		self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+		self.updated = now
+
+	def reserve(self, amount: float) -> float:
+		with self._lock:
+			now = time.monotonic()
+			self._refill(now)
+			self.level -= min(amount, self.capacity) # a single request larger than the bucket must still get through
+			return max(0.0, -self.level / self.rate)
+
+	def adjust(self, amount: float):
+		"""Give back (positive) or take (negative) units, e.g. once the actual token count is known."""
+		with self._lock:
+			self._refill(time.monotonic())
+			self.level = min(self.capacity, self.level + amount)
+
+
+class RequestScheduler:
+	"""
+	Paces the requests of one provider, shared by every player (and game) using it:
+	a token bucket for requests per minute, one for tokens per minute, and a pause
+	for everyone when the provider reports a limit as used up (Retry-After on a 429,
+	or rate-limit headers with nothing remaining). Failed requests are retried with
+	jittered exponential backoff if they look transient.
+	"""
+	def __init__(
+			self,
+			requests_per_minute: Optional[float] = None,
+			tokens_per_minute: Optional[float] = None,
+			max_retries: int = 5,
+			base_delay: float = 1.0,
+			max_delay: float = 60.0,
+			rng: Optional[random.Random] = None
+		):
+		self.requests = TokenBucket(requests_per_minute / 60) if requests_per_minute else None
+		self.tokens = TokenBucket(tokens_per_minute / 60) if tokens_per_minute else None
+		self.max_retries = max_retries
+		self.base_delay = base_delay
+		self.max_delay = max_delay
+		self.rng = rng if rng is not None else random.Random()
+		self.paused_until = 0.0 # time.monotonic() before which no request is sent
+		self._lock = threading.Lock()
+
+	def acquire(self, tokens: int) -> float:
+		"""Reserve one request of about `tokens` prompt tokens. Returns the seconds to wait before sending it."""
+		wait = max(0.0, self.paused_until - time.monotonic())
+		if self.requests is not None:
+			wait = max(wait, self.requests.reserve(1))
+		if self.tokens is not None:
+			wait = max(wait, self.tokens.reserve(tokens))
+		return wait
+
+	def settle(self, estimated: int, used: Optional[int]):
+		"""Correct the token bucket once the response reports the tokens actually used."""
+		if self.tokens is not None and used is not None:
+			self.tokens.adjust(estimated - used)
+
+	def pause(self, seconds: float):
+		with self._lock:
+			self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+	def observe(self, headers: Optional[Mapping[str, str]]):
+		"""Pause the provider if the headers of a response say a limit is used up."""
+		seconds = exhausted_for(headers)
+		if seconds:
+			self.pause(seconds)
+
+	def retry_delay(self, error: BaseException, attempt: int) -> Optional[float]:
+		"""Seconds to wait before retry number `attempt` + 1 of a failed request, or None to give up."""
+		if attempt >= self.max_retries or not is_transient(error):
+			return None
+		headers = getattr(getattr(error, "response", None), "headers", None)
+		server_wait = retry_after(headers)
+		if server_wait is not None:
+			self.pause(server_wait) # the limit is shared, hold back the other players too
+			return server_wait
+		self.observe(headers)
+		backoff = min(self.max_delay, self.base_delay * 2 ** attempt)
+		return self.rng.uniform(0, backoff) # full jitter
+
+
+_schedulers: Dict[str, RequestScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(provider: str, limits: Optional[Dict[str, Any]] = None) -> RequestScheduler:
+	"""The scheduler shared by all players of a provider in this process, created with `limits` on first use."""
+	with _schedulers_lock:
+		if provider not in _schedulers:
+			_schedulers[provider] = RequestScheduler(**(limits or {}))
+		return _schedulers[provider]
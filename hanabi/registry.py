@@ -0,0 +1,58 @@
+import importlib
+import threading
+from importlib.metadata import EntryPoint, entry_points
+from typing import Dict, List, Union
+
+ENTRY_POINT_GROUP = "hanabi_benchmark.players" # e.g. myprovider = "my_package.players:MyPlayer"
+
+# provider -> player class, or "module:Class" to import on first use, so that
+# each provider SDK is only loaded by the processes that play with it
+_backends: Dict[str, Union[str, type, EntryPoint]] = {
+	"openai": "hanabi.players:GPTPlayer",
+	"anthropic": "hanabi.players:ClaudePlayer",
+	"google": "hanabi.players:GeminiPlayer",
+	"groq": "hanabi.players:GroqPlayer", # compatible API with OpenAI
+	"xai": "hanabi.players:GPTPlayer", # compatible API with OpenAI
+	"test": "hanabi.players:RandomPlayer"
+}
+_discovered = False
+_lock = threading.Lock()
+
+
+def register_player(provider: str, backend: Union[str, type]):
+	"""Add or replace the player class of a provider, as a class or a "module:Class" path."""
+	with _lock:
+		_backends[provider] = backend
+
+
+def _discover():
+	# installed packages can add providers through entry points, the built-in ones take precedence
+	global _discovered
+	if _discovered:
+		return
+	for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+		_backends.setdefault(entry_point.name, entry_point)
+	_discovered = True
+
+
+def available_providers() -> List[str]:
+	with _lock:
+		_discover()
+		return sorted(_backends)
+
+
+def get_player_class(provider: str) -> type:
+	"""The player class of a provider, importing it (and its SDK) on first use."""
+	with _lock:
+		if provider not in _backends:
+			_discover()
+		if provider not in _backends:
+			raise ValueError(f"Unknown provider: {provider} (available: {', '.join(sorted(_backends))})")
+		backend = _backends[provider]
+		if isinstance(backend, EntryPoint):
+			backend = backend.load()
+		elif isinstance(backend, str):
+			module, _, name = backend.partition(":")
+			backend = getattr(importlib.import_module(module), name)
+		_backends[provider] = backend
+		return backend
@@ -0,0 +1,119 @@
+from typing import List, NamedTuple, Optional, Tuple
+
+
+class StateSnapshot(NamedTuple):
+	"""The rendered fragments of a game state, from which any player's view can be rendered later."""
+	status: str
+	current_player: int
+	discard: str
+	play_area: str
+	hand_lines: Tuple[str, ...]
+	hand_sizes: Tuple[int, ...]
+
+
+class StateRenderer:
+	"""
+	Builds the text of HanabiGame.get_game_state from cached fragments: the
+	status line, the discard pile, the play area and one line per hand. The
+	game invalidates only the fragments a move touched, so rendering a state
+	is mostly string joins. The discard pile is extended in place, since cards
+	are only ever appended to it.
+	"""
+	def __init__(self, game):
+		self.game = game
+		num_players = len(game.players)
+		player_names = ', '.join(f'Player {i+1}' for i in range(num_players))
+
+		# fragments that never change during a game
+		self._players_lines = [
+			f"Players: {player_names.replace(f'Player {player+1}', '[YOU]')}\n"
+			for player in range(num_players)
+		]
+		self._to_play_lines = [
+			(f"Player {player+1} (YOU) to play\n", f"Player {player+1} to play\n")
+			for player in range(num_players)
+		]
+		self._your_hand = {} # by number of cards
+
+		self.invalidate_all()
+
+	def invalidate_all(self):
+		self._status: Optional[str] = None
+		self._play_area: Optional[str] = None
+		self._hand_lines: List[Optional[str]] = [None] * len(self.game.players)
+		self._discard = ""
+		self._discard_count = 0
+
+	def invalidate(self, status: bool = False, play_area: bool = False, hands: tuple = (), discard: bool = False):
+		if discard: # cards were taken off the pile (undo), the extended text is stale
+			self._discard, self._discard_count = "", 0
+		if status:
+			self._status = None
+		if play_area:
+			self._play_area = None
+		for player in hands:
+			self._hand_lines[player] = None
+
+	def status_line(self) -> str:
+		if self._status is None:
+			game = self.game
+			self._status = f"Lives: {game.lives}/3 | Information tokens: {game.info_tokens}/8 | Score: {sum(game.play_area.values())}/25"
+		return self._status
+
+	def _discard_pile(self) -> str:
+		pile = self.game.discard_pile
+		if len(pile) < self._discard_count: # pile was replaced, start over
+			self._discard, self._discard_count = "", 0
+		if len(pile) > self._discard_count:
+			new_cards = " ".join(f"{c.color}{c.number}" for c in pile[self._discard_count:])
+			self._discard = f"{self._discard} {new_cards}" if self._discard else new_cards
+			self._discard_count = len(pile)
+		return self._discard
+
+	def _play_area_line(self) -> str:
+		if self._play_area is None:
+			self._play_area = " ".join(f"[{color}{value}]" for color, value in self.game.play_area.items() if value > 0)
+		return self._play_area
+
+	def _hand_line(self, player: int) -> str:
+		line = self._hand_lines[player]
+		if line is None:
+			line = f"Player {player+1}: {' '.join(f'[{c.color}{c.number}]' for c in self.game.hands[player])}\n"
+			self._hand_lines[player] = line
+		return line
+
+	def _your_hand_line(self, num_cards: int) -> str:
+		line = self._your_hand.get(num_cards)
+		if line is None:
+			line = " ".join("[*]" * num_cards) # same spacing as the original prompt format
+			self._your_hand[num_cards] = line
+		return line
+
+	def snapshot(self, current_player: int) -> StateSnapshot:
+		"""Capture the current fragments. Only references are stored, fragments are immutable strings."""
+		game = self.game
+		return StateSnapshot(
+			self.status_line(),
+			current_player,
+			self._discard_pile(),
+			self._play_area_line(),
+			tuple(self._hand_line(i) for i in range(len(game.players))),
+			tuple(len(hand) for hand in game.hands)
+		)
+
+	def render_snapshot(self, snapshot: StateSnapshot, player: int) -> str:
+		current_player = snapshot.current_player
+		parts = [
+			self._players_lines[player],
+			snapshot.status, "\n\n",
+			self._to_play_lines[current_player][player != current_player],
+			"Discard pile:\n", snapshot.discard, "\n\n",
+			"Play area:\n", snapshot.play_area, "\n\n",
+			"Your hand:\n", self._your_hand_line(snapshot.hand_sizes[player]), "\n\n",
+			"Other hands:\n",
+		]
+		parts.extend(line for i, line in enumerate(snapshot.hand_lines) if i != player)
+		return "".join(parts).strip() # Ensure no trailing newlines
+
+	def render(self, player: int, current_player: int) -> str:
+		return self.render_snapshot(self.snapshot(current_player), player)
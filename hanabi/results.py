@@ -0,0 +1,514 @@
+import ast
+import csv
+import math
+import os
+import re
+import sqlite3
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from hanabi.sequential import MAX_SCORE, score_interval, t_critical
+
+RESULT_COLUMNS = ["experiment_id", "provider", "model", "args", "timestamp", "turns_played", "score"]
+
+SUMMARY_COLUMNS = [
+	"provider", "model", "args", "avg_score", "std_score", "score_ci_low", "score_ci_high", "num_games",
+	"avg_turns_played", "win_percentage", "p_vs_next", "score_histogram",
+	"p50_latency", "p95_latency", "avg_prompt_tokens", "avg_completion_tokens", "avg_reasoning_tokens", "context_saving"
+]
+
+# bootstrap test of every two configs having the same mean score (a minus b, all games, decks paired or not),
+# p_value_holm adjusted for testing all the pairs at once; blank unless both played MIN_BOOTSTRAP_GAMES
+COMPARISON_COLUMNS = [
+	"provider_a", "model_a", "args_a", "provider_b", "model_b", "args_b", "mean_difference", "p_value", "p_value_holm"
+]
+
+PROVIDER_NAMES = {"openai": "OpenAI", "anthropic": "Anthropic", "google": "Google", "groq": "Groq", "xai": "xAI", "test": "Test"}
+
+# paired comparison of two configs on the games they played on the same decks (a minus b)
+PAIR_COLUMNS = [
+	"provider_a", "model_a", "args_a", "provider_b", "model_b", "args_b",
+	"num_pairs", "mean_difference", "std_difference", "ci_low", "ci_high"
+]
+
+# telemetry of one LLM request, as recorded by LLMPlayer._new_call
+CALL_COLUMNS = [
+	"turn", "seat", "call", "latency", "time_to_first_token",
+	"prompt_tokens", "completion_tokens", "reasoning_tokens", "usage_estimated",
+	"context_tokens", "sent_context_tokens", "retries", "cached", "error"
+]
+
+# calls of an experiment's games that count in its summary, i.e. not of replays
+COUNTED_CALLS = "game_id IN (SELECT id FROM games WHERE experiment_id = ? AND NOT replay)"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS experiments (
+	experiment_id INTEGER PRIMARY KEY,
+	provider TEXT NOT NULL,
+	model TEXT NOT NULL,
+	args TEXT NOT NULL,
+	created TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS games (
+	id INTEGER PRIMARY KEY AUTOINCREMENT,
+	experiment_id INTEGER NOT NULL,
+	provider TEXT NOT NULL,
+	model TEXT NOT NULL,
+	args TEXT NOT NULL,
+	timestamp TEXT NOT NULL,
+	turns_played INTEGER NOT NULL,
+	score INTEGER NOT NULL,
+	deck_seed TEXT,
+	job_key TEXT,
+	replay INTEGER NOT NULL DEFAULT 0 -- a deck its experiment had already played, left out of the summary
+);
+CREATE INDEX IF NOT EXISTS games_config ON games(provider, model, args);
+CREATE INDEX IF NOT EXISTS games_experiment ON games(experiment_id);
+CREATE TABLE IF NOT EXISTS experiment_summary (
+	experiment_id INTEGER PRIMARY KEY,
+	provider TEXT NOT NULL,
+	model TEXT NOT NULL,
+	args TEXT NOT NULL,
+	last_timestamp TEXT NOT NULL,
+	num_games INTEGER NOT NULL,
+	score_sum REAL NOT NULL,
+	score_sq_sum REAL NOT NULL,
+	turns_sum REAL NOT NULL,
+	wins INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS experiment_summary_config ON experiment_summary(provider, model, args, last_timestamp);
+CREATE TABLE IF NOT EXISTS calls (
+	game_id INTEGER NOT NULL,
+	experiment_id INTEGER NOT NULL,
+	turn INTEGER,
+	seat INTEGER,
+	call INTEGER NOT NULL,
+	latency REAL,
+	time_to_first_token REAL,
+	prompt_tokens INTEGER,
+	completion_tokens INTEGER,
+	reasoning_tokens INTEGER,
+	usage_estimated INTEGER, -- tokens of a stream closed at the move, see LLMPlayer._estimate_usage
+	context_tokens INTEGER, -- estimated conversation size, and the part the context policy sent
+	sent_context_tokens INTEGER,
+	retries INTEGER NOT NULL,
+	cached INTEGER NOT NULL,
+	error TEXT
+);
+CREATE INDEX IF NOT EXISTS calls_experiment ON calls(experiment_id);
+CREATE INDEX IF NOT EXISTS calls_game ON calls(game_id);
+"""
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+	"""Linearly interpolated percentile of sorted values, as pandas' quantile."""
+	if not values:
+		return None
+	position = (len(values) - 1) * q
+	low = int(position)
+	high = min(low + 1, len(values) - 1)
+	return round(values[low] + (values[high] - values[low]) * (position - low), 4)
+
+
+def _model_label(model: str, args: str) -> Tuple[str, bool]:
+	"""Leaderboard name of a config, e.g. "o3-mini-2025-01-31 (high)", and whether it uses chain of thought."""
+	try:
+		args = ast.literal_eval(args) # stored as str(dict)
+	except (ValueError, SyntaxError):
+		args = {}
+	if not isinstance(args, dict):
+		args = {}
+	details = []
+	if "reasoning_effort" in args:
+		details.append(str(args["reasoning_effort"]))
+	if args.get("thinking_tokens") and args.get("is_thinking", True):
+		details.append(f"{args['thinking_tokens']} reasoning")
+	elif args.get("is_thinking"):
+		details.append("thinking")
+	label = f"{model} ({', '.join(details)})" if details else model
+	return label, bool(args.get("cot"))
+
+
+def leaderboard_table(summary: List[Dict]) -> str:
+	"""Markdown leaderboard of the configs with a non-zero average score, in summary order."""
+	from hanabi.stats import parse_histogram, sparkline
+	lines = [
+		"| Model | Provider | Chain of Thought | Avg Score (out of 25) | 95% CI | Win % | Avg Turns | Games | p vs next | Scores 0-25 |",
+		"|-------|----------|------------------|----------------------|--------|-------|-----------|-------|-----------|-------------|"
+	]
+	rows = [row for row in summary if row["avg_score"] > 0]
+	for row, next_row in zip(rows, rows[1:] + [None]):
+		label, cot = _model_label(row["model"], row["args"])
+		histogram = parse_histogram(row["score_histogram"])
+		p_value = row["p_vs_next"] if next_row is not None else None # zero scores sort last, so the next row is the next config
+		ci = "" if row["score_ci_low"] is None else f"{row['score_ci_low']:.1f}-{row['score_ci_high']:.1f}"
+		lines.append(
+			f"| {label} | {PROVIDER_NAMES.get(row['provider'], row['provider'])} | {'Yes' if cot else 'No'} "
+			f"| {row['avg_score']:.1f} | {ci} "
+			f"| {round(100 * row['win_percentage'])} | {row['avg_turns_played']:.1f} | {row['num_games']} "
+			f"| {'' if p_value is None else f'{p_value:.3f}'} | `{sparkline([histogram.get(s, 0) for s in range(MAX_SCORE + 1)])}` |"
+		)
+	return "\n".join(lines)
+
+
+def update_readme(readme_file: str, summary: List[Dict]):
+	"""Replace the table and the "Last updated" date in the LEADERBOARD section of the README."""
+	with open(readme_file) as f:
+		readme = f.read()
+	section = re.search(r"^## LEADERBOARD\n(.*?)(?=^## |\Z)", readme, flags=re.MULTILINE | re.DOTALL)
+	if section is None:
+		raise ValueError(f"{readme_file} has no '## LEADERBOARD' section")
+	body = section.group(1)
+	table = leaderboard_table(summary)
+	existing = re.search(r"(?:^\|.*(?:\n|\Z))+", body, flags=re.MULTILINE)
+	if existing:
+		body = body[:existing.start()] + table + "\n" + body[existing.end():]
+	else:
+		body = table + "\n\n" + body
+	updated = f"Last updated: {date.today().isoformat()}"
+	body, found = re.subn(r"^Last updated: .*$", updated, body, flags=re.MULTILINE)
+	if not found:
+		body = body.rstrip("\n") + f"\n\n{updated}\n\n"
+	with open(readme_file, "w") as f:
+		f.write(readme[:section.start(1)] + body + readme[section.end(1):])
+
+
+class ResultsStore:
+	"""
+	SQLite (WAL) store of game results. Besides the games themselves it keeps
+	running aggregates per experiment (count, sums and sums of squares), updated
+	in the same transaction as each game, so the summary never needs a full scan.
+	Experiment IDs are allocated transactionally, so concurrent runners sharing a
+	store never hand out the same ID.
+
+	If csv_file is given, games are also appended to it in the experiment_results.csv
+	format (it is never read back, except for a one-off import into an empty store).
+	"""
+	def __init__(self, path: str, csv_file: Optional[str] = None, journal_mode: str = "WAL"):
+		os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+		self.path = path
+		self.csv_file = csv_file
+		self.db = sqlite3.connect(path, timeout=30, isolation_level=None) # transactions are explicit
+		self.db.execute(f"PRAGMA journal_mode={journal_mode}") # DELETE for stores shared by hosts over a network filesystem
+		self.db.execute("PRAGMA synchronous=NORMAL")
+		self.db.executescript(SCHEMA)
+		columns = {row[1] for row in self.db.execute("PRAGMA table_info(games)")}
+		if "deck_seed" not in columns: # stores created before seed banks
+			self.db.execute("ALTER TABLE games ADD COLUMN deck_seed TEXT")
+		if "job_key" not in columns: # stores created before the job queue
+			self.db.execute("ALTER TABLE games ADD COLUMN job_key TEXT")
+		if "replay" not in columns: # stores created before replays were kept out of the summary
+			self.db.execute("ALTER TABLE games ADD COLUMN replay INTEGER NOT NULL DEFAULT 0")
+		call_columns = {row[1] for row in self.db.execute("PRAGMA table_info(calls)")}
+		for column in ("usage_estimated", "context_tokens", "sent_context_tokens"): # stores created before these
+			if column not in call_columns:
+				self.db.execute(f"ALTER TABLE calls ADD COLUMN {column} INTEGER")
+		self.db.execute("CREATE INDEX IF NOT EXISTS games_deck ON games(experiment_id, deck_seed)")
+		self.db.execute("DROP INDEX IF EXISTS games_score") # superseded by games_histogram
+		self.db.execute("CREATE INDEX IF NOT EXISTS games_histogram ON games(experiment_id, replay, score)") # covers the score histograms
+		self.db.execute("CREATE UNIQUE INDEX IF NOT EXISTS games_job ON games(job_key) WHERE job_key IS NOT NULL")
+		if csv_file is not None:
+			if not os.path.exists(csv_file):
+				with open(csv_file, "w", newline="") as f:
+					csv.writer(f, lineterminator="\n").writerow(RESULT_COLUMNS)
+			elif self._is_empty():
+				self.import_csv(csv_file)
+
+	def _is_empty(self) -> bool:
+		return self.db.execute("SELECT NOT EXISTS (SELECT 1 FROM games)").fetchone()[0] == 1
+
+	def allocate_experiments(self, configs: List[Tuple[str, str, str]], first_id: Optional[int] = None) -> List[int]:
+		"""
+		Reserve one experiment ID per (provider, model, args) config. With first_id, the
+		IDs first_id, first_id + 1, ... are reused as given (e.g. to replay earlier decks),
+		which raises ValueError if one of them belongs to another config.
+		"""
+		now = datetime.now().isoformat()
+		self.db.execute("BEGIN IMMEDIATE")
+		try:
+			if first_id is None:
+				first_id = self.db.execute("SELECT COALESCE(MAX(experiment_id), 0) + 1 FROM experiments").fetchone()[0]
+			ids = list(range(first_id, first_id + len(configs)))
+			for experiment_id, config in zip(ids, configs):
+				stored = self.db.execute(
+					"SELECT provider, model, args FROM experiments WHERE experiment_id = ?", (experiment_id,)
+				).fetchone()
+				if stored is not None and tuple(stored) != tuple(config):
+					raise ValueError(f"Experiment {experiment_id} is {'/'.join(stored)}, not {'/'.join(config)}")
+			self.db.executemany(
+				"INSERT OR IGNORE INTO experiments (experiment_id, provider, model, args, created) VALUES (?, ?, ?, ?, ?)",
+				[(i, *config, now) for i, config in zip(ids, configs)]
+			)
+			self.db.execute("COMMIT")
+		except BaseException:
+			self.db.execute("ROLLBACK")
+			raise
+		return ids
+
+	def add_game(
+			self, experiment_id: int, provider: str, model: str, args: str, turns_played: int, score: int,
+			timestamp: Optional[str] = None, calls: Sequence[Dict[str, Any]] = (), deck_seed: Optional[str] = None,
+			job_key: Optional[str] = None
+		) -> bool:
+		"""
+		Insert one game, with the telemetry of its LLM calls, and fold it into its
+		experiment's aggregates. Games of different configs with the same deck_seed
+		were played on the same deck, and are compared pairwise (see paired_differences).
+		Games played for a queued job carry its job_key, and a job's game is only
+		stored once, e.g. when two workers finished the same job; returns whether it
+		was added. Replays of a deck (a reused experiment ID) are always added, but
+		only the first game of each deck of an experiment counts in the summary.
+		"""
+		timestamp = timestamp or datetime.now().isoformat()
+		self.db.execute("BEGIN IMMEDIATE")
+		try:
+			if job_key is not None and self.db.execute("SELECT 1 FROM games WHERE job_key = ?", (job_key,)).fetchone():
+				self.db.execute("COMMIT")
+				return False
+			game_id = self._insert_game(int(experiment_id), provider, model, args, timestamp, int(turns_played), int(score), deck_seed, job_key)
+			self.db.executemany(
+				f"INSERT INTO calls (game_id, experiment_id, {', '.join(CALL_COLUMNS)}) VALUES (?, ?{', ?' * len(CALL_COLUMNS)})",
+				[(game_id, int(experiment_id), *(call.get(column) for column in CALL_COLUMNS)) for call in calls]
+			)
+			self.db.execute("COMMIT")
+		except BaseException:
+			self.db.execute("ROLLBACK")
+			raise
+		if self.csv_file is not None:
+			with open(self.csv_file, "a", newline="") as f:
+				csv.writer(f, lineterminator="\n").writerow([experiment_id, provider, model, args, timestamp, turns_played, score])
+		return True
+
+	def _insert_game(
+			self, experiment_id: int, provider: str, model: str, args: str, timestamp: str, turns_played: int, score: int,
+			deck_seed: Optional[str] = None, job_key: Optional[str] = None
+		) -> int:
+		replay = deck_seed is not None and self.db.execute(
+			"SELECT 1 FROM games WHERE experiment_id = ? AND deck_seed = ?", (experiment_id, deck_seed)
+		).fetchone() is not None
+		game_id = self.db.execute(
+			"INSERT INTO games (experiment_id, provider, model, args, timestamp, turns_played, score, deck_seed, job_key, replay) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+			(experiment_id, provider, model, args, timestamp, turns_played, score, deck_seed, job_key, int(replay))
+		).lastrowid
+		if replay: # the same game again, counting it would only narrow the CI
+			return game_id
+		self.db.execute(
+			"""
+			INSERT INTO experiment_summary
+				(experiment_id, provider, model, args, last_timestamp, num_games, score_sum, score_sq_sum, turns_sum, wins)
+			VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?)
+			ON CONFLICT(experiment_id) DO UPDATE SET
+				last_timestamp = MAX(last_timestamp, excluded.last_timestamp),
+				num_games = num_games + 1,
+				score_sum = score_sum + excluded.score_sum,
+				score_sq_sum = score_sq_sum + excluded.score_sq_sum,
+				turns_sum = turns_sum + excluded.turns_sum,
+				wins = wins + excluded.wins
+			""",
+			(experiment_id, provider, model, args, timestamp, score, score * score, turns_played, int(score == 25))
+		)
+		return game_id
+
+	def import_csv(self, results_file: str):
+		"""One-off import of an experiment_results.csv written by earlier versions."""
+		with open(results_file, newline="") as f:
+			rows = list(csv.DictReader(f))
+		self.db.execute("BEGIN IMMEDIATE")
+		try:
+			for row in rows:
+				self.db.execute(
+					"INSERT OR IGNORE INTO experiments (experiment_id, provider, model, args, created) VALUES (?, ?, ?, ?, ?)",
+					(int(row["experiment_id"]), row["provider"], row["model"], row["args"], row["timestamp"])
+				)
+				self._insert_game(
+					int(row["experiment_id"]), row["provider"], row["model"], row["args"],
+					row["timestamp"], int(row["turns_played"]), int(row["score"])
+				)
+			self.db.execute("COMMIT")
+		except BaseException:
+			self.db.execute("ROLLBACK")
+			raise
+
+	def configs(self) -> Set[str]:
+		"""Tested configs as 'provider/model/args' strings."""
+		rows = self.db.execute("SELECT DISTINCT provider, model, args FROM experiment_summary")
+		return {f"{provider}/{model}/{args}" for provider, model, args in rows}
+
+	def latest_experiments(self) -> List[Tuple]:
+		"""Aggregate rows of the most recent experiment of each config."""
+		return self.db.execute(
+			"""
+			SELECT s.experiment_id, s.provider, s.model, s.args, s.num_games, s.score_sum, s.score_sq_sum, s.turns_sum, s.wins
+			FROM experiment_summary s
+			WHERE s.last_timestamp = (
+				SELECT MAX(last_timestamp) FROM experiment_summary
+				WHERE provider = s.provider AND model = s.model AND args = s.args
+			)
+			"""
+		).fetchall()
+
+	def call_stats(self, experiment_id: int, num_games: int) -> Dict[str, Optional[float]]:
+		"""
+		Latency percentiles of the requests sent to the API (cache hits left out), tokens per game
+		of an experiment, and the share of the conversation its context policy left out of the prompts.
+		"""
+		latencies = [row[0] for row in self.db.execute(
+			f"SELECT latency FROM calls WHERE {COUNTED_CALLS} AND NOT cached AND latency IS NOT NULL ORDER BY latency",
+			(experiment_id,)
+		)]
+		tokens = self.db.execute(
+			f"""
+			SELECT SUM(prompt_tokens), SUM(completion_tokens), SUM(reasoning_tokens), SUM(context_tokens), SUM(sent_context_tokens)
+			FROM calls WHERE {COUNTED_CALLS}
+			""",
+			(experiment_id,)
+		).fetchone()
+		return {
+			"p50_latency": _percentile(latencies, 0.5),
+			"p95_latency": _percentile(latencies, 0.95),
+			"avg_prompt_tokens": round(tokens[0] / num_games, 1) if tokens[0] is not None else None,
+			"avg_completion_tokens": round(tokens[1] / num_games, 1) if tokens[1] is not None else None,
+			"avg_reasoning_tokens": round(tokens[2] / num_games, 1) if tokens[2] is not None else None,
+			"context_saving": round(1 - tokens[4] / tokens[3], 4) if tokens[3] else None # share of the conversation left out
+		}
+
+	def score_histograms(self, experiment_ids: List[int]):
+		"""(experiments, 26) NumPy matrix of game counts per score, counted by SQLite in one scan."""
+		from hanabi.stats import score_histograms # NumPy is only needed for the summary
+		counts = self.db.execute(
+			f"""
+			SELECT experiment_id, score, COUNT(*) FROM games
+			WHERE experiment_id IN ({', '.join('?' * len(experiment_ids))}) AND NOT replay
+			GROUP BY experiment_id, score
+			""",
+			experiment_ids
+		).fetchall()
+		return score_histograms(experiment_ids, counts)
+
+	def leaderboard(self, confidence: float = 0.95) -> Tuple[List[Dict], List[Dict]]:
+		"""
+		Per-config summary of the latest experiments in leaderboard order, and the
+		pairwise comparisons of all configs (COMPARISON_COLUMNS), from one bootstrap
+		of every config's mean score. p_vs_next is the p-value against the next row.
+		Configs with fewer than stats.MIN_BOOTSTRAP_GAMES games get the t-interval
+		of the StoppingRule instead (blank below two games) and no p-values.
+		"""
+		from hanabi import stats
+		experiments = self.latest_experiments()
+		if not experiments:
+			return [], []
+		histograms = self.score_histograms([e[0] for e in experiments])
+		means = stats.bootstrap_means(histograms)
+		ci_low, ci_high = stats.bootstrap_intervals(means, confidence)
+		p_values = stats.pairwise_p_values(means)
+		enough = [e[4] >= stats.MIN_BOOTSTRAP_GAMES for e in experiments]
+
+		def p_value(i: int, j: int) -> Optional[float]:
+			return round(float(p_values[i, j]), 4) if enough[i] and enough[j] else None
+
+		summary = []
+		for i, (experiment_id, provider, model, args, n, score_sum, score_sq_sum, turns_sum, wins) in enumerate(experiments):
+			mean = score_sum / n
+			std = math.sqrt(max(0.0, (score_sq_sum - n * mean * mean) / (n - 1))) if n > 1 else None # sample std, as pandas
+			if enough[i]:
+				low, high = round(float(ci_low[i]), 4), round(float(ci_high[i]), 4)
+			elif std is not None:
+				half_width = t_critical(confidence, n - 1) * std / math.sqrt(n) # as score_interval
+				low, high = round(max(0.0, mean - half_width), 4), round(min(MAX_SCORE, mean + half_width), 4) # within the score range
+			else:
+				low = high = None
+			summary.append({
+				"provider": provider,
+				"model": model,
+				"args": args,
+				"avg_score": round(mean, 4),
+				"std_score": round(std, 4) if std is not None else None,
+				"score_ci_low": low,
+				"score_ci_high": high,
+				"num_games": n,
+				"avg_turns_played": round(turns_sum / n, 4),
+				"win_percentage": round(wins / n, 2),
+				"p_vs_next": None,
+				"score_histogram": stats.format_histogram(histograms[i]),
+				**self.call_stats(experiment_id, n),
+				"_index": i
+			})
+		summary.sort(key=lambda r: (r["provider"], r["model"], r["args"]))
+		summary.sort(key=lambda r: (r["win_percentage"], r["avg_score"], r["avg_turns_played"]), reverse=True)
+		for row, next_row in zip(summary, summary[1:]):
+			row["p_vs_next"] = p_value(row["_index"], next_row["_index"])
+
+		by_mean = sorted(summary, key=lambda r: (-r["avg_score"], r["provider"], r["model"], r["args"]))
+		comparisons = []
+		for i, a in enumerate(by_mean):
+			for b in by_mean[i + 1:]:
+				comparisons.append(dict(zip(COMPARISON_COLUMNS, (
+					a["provider"], a["model"], a["args"], b["provider"], b["model"], b["args"],
+					round(a["avg_score"] - b["avg_score"], 4), p_value(a["_index"], b["_index"]), None
+				))))
+		tested = [c for c in comparisons if c["p_value"] is not None]
+		for comparison, adjusted in zip(tested, stats.holm_adjust([c["p_value"] for c in tested])):
+			comparison["p_value_holm"] = round(float(adjusted), 4)
+		for row in summary:
+			del row["_index"]
+		return summary, comparisons
+
+	def summary(self) -> List[Dict]:
+		"""Per-config summary of the latest experiments, in leaderboard order."""
+		return self.leaderboard()[0]
+
+	def paired_differences(self, confidence: float = 0.95) -> List[Dict]:
+		"""
+		Score differences between the latest experiments of every two configs, over
+		the games they played on the same decks, with the t confidence interval of
+		the mean difference. Deck luck cancels out of each pair, so the interval is
+		much narrower than from the two means. Configs are in order of mean score.
+		"""
+		configs = []
+		for experiment_id, provider, model, args, n, score_sum, *_ in self.latest_experiments():
+			scores = dict(self.db.execute(
+				"SELECT deck_seed, score FROM games WHERE experiment_id = ? AND deck_seed IS NOT NULL AND NOT replay",
+				(experiment_id,)
+			))
+			configs.append((score_sum / n, provider, model, args, scores))
+		configs.sort(key=lambda c: (-c[0], c[1], c[2], c[3]))
+		pairs = []
+		for i, (_, *config_a, scores_a) in enumerate(configs):
+			for _, *config_b, scores_b in configs[i + 1:]:
+				differences = [scores_a[seed] - scores_b[seed] for seed in scores_a if seed in scores_b]
+				if len(differences) < 2:
+					continue
+				mean, half_width = score_interval(differences, confidence)
+				std = math.sqrt(sum((d - mean) ** 2 for d in differences) / (len(differences) - 1))
+				pairs.append(dict(zip(PAIR_COLUMNS, (
+					*config_a, *config_b, len(differences), round(mean, 4), round(std, 4),
+					round(mean - half_width, 4), round(mean + half_width, 4)
+				))))
+		return pairs
+
+	def export_pairs(self, pairs_file: str, pairs: Optional[List[Dict]] = None):
+		pairs = self.paired_differences() if pairs is None else pairs
+		with open(pairs_file, "w", newline="") as f:
+			writer = csv.DictWriter(f, fieldnames=PAIR_COLUMNS, lineterminator="\n")
+			writer.writeheader()
+			writer.writerows(pairs)
+
+	def export_summary(self, summary_file: str, summary: Optional[List[Dict]] = None):
+		summary = self.summary() if summary is None else summary
+		with open(summary_file, "w", newline="") as f:
+			writer = csv.DictWriter(f, fieldnames=list(summary[0].keys()) if summary else SUMMARY_COLUMNS, lineterminator="\n")
+			writer.writeheader()
+			for row in summary:
+				writer.writerow({k: "" if v is None else v for k, v in row.items()})
+
+	def export_comparisons(self, comparisons_file: str, comparisons: List[Dict]):
+		with open(comparisons_file, "w", newline="") as f:
+			writer = csv.DictWriter(f, fieldnames=COMPARISON_COLUMNS, lineterminator="\n")
+			writer.writeheader()
+			for row in comparisons:
+				writer.writerow({k: "" if v is None else v for k, v in row.items()})
+
+	def games(self, columns: str = "experiment_id, provider, model, args, timestamp, turns_played, score") -> List[Tuple]:
+		return self.db.execute(f"SELECT {columns} FROM games ORDER BY id").fetchall()
+
+	def close(self):
+		self.db.close()
@@ -0,0 +1,86 @@
+import random
+from typing import Callable, Dict, List, Optional
+from hanabi.game import HanabiGame, code_to_card
+from hanabi.trajectory import INVALID, Move
+
+RolloutPolicy = Callable[[HanabiGame, random.Random], str] # move for the player to move
+
+
+def random_policy(game: HanabiGame, rng: random.Random) -> str:
+	"""A uniformly random legal move, drawn like RandomPlayer does."""
+	player = game.current_player
+	legal = game.legal_moves(player)
+	return game.action_to_move(player, game.action_table.nth_listed(player, legal, rng.randrange(legal.bit_count())))
+
+
+def rollout(game: HanabiGame, policy: RolloutPolicy, rng: random.Random) -> int:
+	"""Play the game to the end with `policy` and return the final score. The game is left where it was."""
+	depth = 0
+	while not game.is_over():
+		game.apply(policy(game, rng))
+		depth += 1
+	score = sum(game.play_area.values())
+	for _ in range(depth):
+		game.undo()
+	return score
+
+
+class RolloutEvaluator:
+	"""
+	Monte-Carlo estimates of the moves of the player to move: each move is
+	applied, the game is played out `num_rollouts` times with the rollout
+	policy, and its value is the mean final score. The order of the remaining
+	deck is unknown to the players, so by default it is reshuffled for every
+	rollout. Everything runs on one engine with apply/undo, nothing is copied.
+	"""
+	def __init__(self, num_rollouts: int = 20, policy: RolloutPolicy = random_policy,
+				 shuffle_deck: bool = True, rng: Optional[random.Random] = None):
+		self.num_rollouts = num_rollouts
+		self.policy = policy
+		self.shuffle_deck = shuffle_deck
+		self.rng = rng if rng is not None else random.Random()
+
+	def value(self, game: HanabiGame, move: str) -> float:
+		"""Mean final score after `move` (any move string, invalid moves included)."""
+		deck = game.deck
+		total = 0
+		for _ in range(self.num_rollouts):
+			if self.shuffle_deck:
+				game.deck = deck[:]
+				self.rng.shuffle(game.deck)
+			game.apply(move)
+			total += rollout(game, self.policy, self.rng)
+			game.undo()
+		game.deck = deck
+		return total / self.num_rollouts
+
+	def move_values(self, game: HanabiGame) -> Dict[str, float]:
+		"""Value of every legal move of the player to move, in the order the moves are listed."""
+		player = game.current_player
+		actions = game.action_table.listed(player, game.legal_moves(player))
+		return {move: self.value(game, move) for move in (game.action_to_move(player, a) for a in actions)}
+
+	def regret(self, game: HanabiGame, move: str) -> float:
+		"""Value of the best legal move minus the value of `move` (0 for a best move, up to noise)."""
+		values = self.move_values(game)
+		value = values[move] if move in values else self.value(game, move)
+		return max(values.values()) - value
+
+	def trajectory_regrets(self, record: Dict) -> List[float]:
+		"""Regret of every move of a stored trajectory (see hanabi.trajectory), in turn order."""
+		num_players = record["num_players"]
+		game = HanabiGame([None] * num_players, deck=[code_to_card(c) for c in bytes.fromhex(record["deck"])])
+		regrets = []
+		for move in record["moves"]:
+			move = self._move_string(game, move)
+			regrets.append(self.regret(game, move))
+			game.apply(move)
+		return regrets
+
+	@staticmethod
+	def _move_string(game: HanabiGame, move: Move) -> str:
+		if move == INVALID:
+			return "INVALID MOVE"
+		if isinstance(move, int):
+			return game.action_to_move(game.current_player, move)
+		return move
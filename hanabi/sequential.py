@@ -0,0 +1,128 @@
+import math
+import statistics
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+MAX_SCORE = 25
+
+
+def t_critical(confidence: float, df: int) -> float:
+	"""Two-sided Student t critical value (Cornish-Fisher expansion around the normal one, close enough from df=2)."""
+	z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+	if df <= 0:
+		return math.inf
+	return (
+		z
+		+ (z**3 + z) / (4 * df)
+		+ (5 * z**5 + 16 * z**3 + 3 * z) / (96 * df**2)
+		+ (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * df**3)
+		+ (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / (92160 * df**4)
+	)
+
+
+def score_interval(scores: Sequence[float], confidence: float = 0.95) -> Tuple[float, float]:
+	"""(mean, half-width) of the t confidence interval of the mean score. The half-width is inf below two games."""
+	if not scores:
+		return math.nan, math.inf
+	mean = statistics.fmean(scores)
+	if len(scores) < 2:
+		return mean, math.inf
+	return mean, t_critical(confidence, len(scores) - 1) * statistics.stdev(scores) / math.sqrt(len(scores))
+
+
+class StoppingRule:
+	"""
+	When to stop playing a config: once the confidence interval of its mean score
+	is narrower than ±half_width, or, with a threshold (e.g. the lowest score on
+	the leaderboard), once the interval lies entirely below it. Nothing stops
+	before min_runs games, and everything stops at max_runs.
+	"""
+	def __init__(
+			self,
+			half_width: float = 1.0,
+			threshold: Optional[float] = None,
+			confidence: float = 0.95,
+			min_runs: int = 5,
+			max_runs: int = 10
+		):
+		self.half_width = half_width
+		self.threshold = threshold
+		self.confidence = confidence
+		self.min_runs = max(2, min_runs)
+		self.max_runs = max_runs
+
+	def decide(self, scores: Sequence[float]) -> Optional[str]:
+		"""Why the config is done after these scores, or None to keep playing."""
+		if len(scores) >= self.max_runs:
+			return "max runs"
+		if len(scores) < self.min_runs:
+			return None
+		mean, half_width = score_interval(scores, self.confidence)
+		if half_width <= self.half_width:
+			return "precise"
+		if self.threshold is not None and mean + half_width < self.threshold:
+			return "below threshold"
+		return None
+
+
+class SequentialSweep:
+	"""
+	Sequential allocation of games across configs. Configs get min_runs games
+	first; after that every free slot goes to the active config whose interval is
+	widest (accounting for games already in flight), so the budget is spent where
+	it shrinks the uncertainty most, bandit-style. A config leaves the sweep when
+	the StoppingRule says so, and the sweep ends when all have or the optional
+	total `budget` of games is used up.
+	"""
+	def __init__(self, configs: Sequence[Hashable], rule: StoppingRule, budget: Optional[int] = None):
+		self.rule = rule
+		self.budget = budget
+		self.scores: Dict[Hashable, List[float]] = {config: [] for config in configs}
+		self.runs: Dict[Hashable, int] = {config: 0 for config in configs} # games started, the next run index
+		self.pending: Dict[Hashable, int] = {config: 0 for config in configs}
+		self.stopped: Dict[Hashable, str] = {} # config -> reason
+		self.started = 0
+
+	def _priority(self, config: Hashable) -> Tuple[bool, float]:
+		scores, in_flight = self.scores[config], self.pending[config]
+		n = len(scores) + in_flight
+		if n < self.rule.min_runs:
+			return (True, -n) # the initial games first, fewest first
+		half_width = min(score_interval(scores, self.rule.confidence)[1], MAX_SCORE) # no wider than the score range
+		return (False, half_width * math.sqrt(max(1, len(scores)) / n)) # pending games will narrow it about this much
+
+	def next_games(self, slots: int) -> List[Tuple[Hashable, int]]:
+		"""Up to `slots` (config, run) pairs to start now."""
+		games = []
+		while len(games) < slots and (self.budget is None or self.started < self.budget):
+			open_configs = [
+				c for c in self.scores
+				if c not in self.stopped and self.runs[c] < self.rule.max_runs
+			]
+			if not open_configs:
+				break
+			config = max(open_configs, key=self._priority)
+			games.append((config, self.runs[config]))
+			self.runs[config] += 1
+			self.pending[config] += 1
+			self.started += 1
+		return games
+
+	def record(self, config: Hashable, score: Optional[int]):
+		"""Result of a game started with next_games (None if it failed, e.g. on a provider error)."""
+		self.pending[config] -= 1
+		if score is not None:
+			self.scores[config].append(score)
+		if config not in self.stopped:
+			reason = self.rule.decide(self.scores[config])
+			if reason is None and self.runs[config] >= self.rule.max_runs and not self.pending[config]:
+				reason = "max runs" # failed games count against max_runs, they are finished with --resume
+			if reason is not None:
+				self.stopped[config] = reason
+
+	def report(self) -> List[Tuple[Hashable, int, float, float, str]]:
+		"""(config, games, mean, half-width, reason) per config, reason "budget" if it was still running."""
+		rows = []
+		for config, scores in self.scores.items():
+			mean, half_width = score_interval(scores, self.rule.confidence)
+			rows.append((config, len(scores), mean, half_width, self.stopped.get(config, "budget")))
+		return rows
@@ -0,0 +1,80 @@
+from typing import Dict, Sequence, Tuple
+import numpy as np
+from hanabi.sequential import MAX_SCORE
+
+BOOTSTRAP_RESAMPLES = 2000
+# below this many games the percentile bootstrap is far too confident (it cannot see
+# scores that were not played), so configs get t-intervals and no p-values instead
+MIN_BOOTSTRAP_GAMES = 20
+SPARK_BARS = " ▁▂▃▄▅▆▇█"
+
+
+def score_histograms(experiment_ids: Sequence[int], counts: Sequence[Tuple[int, int, int]]) -> np.ndarray:
+	"""(configs, MAX_SCORE + 1) matrix of game counts per score from (experiment_id, score, count) rows."""
+	index = {experiment_id: i for i, experiment_id in enumerate(experiment_ids)}
+	histograms = np.zeros((len(experiment_ids), MAX_SCORE + 1), dtype=np.int64)
+	if counts:
+		rows = np.array([(index[e], s, c) for e, s, c in counts], dtype=np.int64)
+		np.add.at(histograms, (rows[:, 0], rows[:, 1]), rows[:, 2])
+	return histograms
+
+
+def bootstrap_means(histograms: np.ndarray, resamples: int = BOOTSTRAP_RESAMPLES, seed: int = 0) -> np.ndarray:
+	"""
+	(resamples, configs) bootstrap means of every config at once. This is the
+	Bayesian bootstrap: games get Dirichlet(1, ..., 1) weights, and the weights of
+	the games with the same score add up to a Gamma(count) draw, so a resample costs
+	one draw per score that occurs instead of one per game.
+	"""
+	configs, scores = np.nonzero(histograms) # the occupied bins, grouped by config
+	starts = np.searchsorted(configs, np.arange(len(histograms)))
+	weights = np.random.default_rng(seed).standard_gamma(histograms[configs, scores], size=(resamples, len(scores)))
+	# every config has played at least one game, so no group is empty
+	return np.add.reduceat(weights * scores, starts, axis=1) / np.add.reduceat(weights, starts, axis=1)
+
+
+def bootstrap_intervals(means: np.ndarray, confidence: float = 0.95) -> Tuple[np.ndarray, np.ndarray]:
+	"""Percentile bootstrap interval (low, high) of each config's mean score."""
+	low, high = np.quantile(means, [(1 - confidence) / 2, (1 + confidence) / 2], axis=0)
+	return low, high
+
+
+def pairwise_p_values(means: np.ndarray) -> np.ndarray:
+	"""
+	(configs, configs) two-sided bootstrap p-values of "same mean score" for every
+	pair, from how often the resampled difference of means lands on either side of 0.
+	"""
+	resamples, configs = means.shape
+	p_values = np.ones((configs, configs))
+	for i in range(configs - 1):
+		differences = means[:, i, None] - means[:, i + 1:]
+		tail = np.minimum((differences <= 0).sum(axis=0), (differences >= 0).sum(axis=0))
+		p_values[i, i + 1:] = p_values[i + 1:, i] = np.minimum(1.0, 2 * (tail + 1) / (resamples + 1))
+	return p_values
+
+
+def holm_adjust(p_values: Sequence[float]) -> np.ndarray:
+	"""Holm-Bonferroni adjusted p-values of a family of tests, e.g. all pairwise comparisons."""
+	p_values = np.asarray(p_values, dtype=float)
+	order = np.argsort(p_values)
+	adjusted = np.maximum.accumulate(p_values[order] * (len(p_values) - np.arange(len(p_values))))
+	result = np.empty_like(p_values)
+	result[order] = np.minimum(1.0, adjusted)
+	return result
+
+
+def format_histogram(counts: Sequence[int]) -> str:
+	"""Compact histogram for the CSV, e.g. "0:3 5:1 12:6" (score:games, empty scores left out)."""
+	return " ".join(f"{score}:{count}" for score, count in enumerate(counts) if count)
+
+
+def sparkline(counts: Sequence[int]) -> str:
+	"""One bar per score from 0 to MAX_SCORE, for the leaderboard."""
+	top = max(counts) if len(counts) else 0
+	if not top:
+		return ""
+	return "".join(SPARK_BARS[int(np.ceil(c / top * (len(SPARK_BARS) - 1)))] for c in counts)
+
+
+def parse_histogram(text: str) -> Dict[int, int]:
+	return {int(score): int(count) for score, count in (item.split(":") for item in text.split())}
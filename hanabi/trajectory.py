@@ -0,0 +1,167 @@
+import json
+import mmap
+import os
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from hanabi.game import HanabiGame, card_to_code, code_to_card
+from hanabi.actions import encode_move, decode_action
+try:
+	import fcntl
+except ImportError: # Windows, where only one process should write
+	fcntl = None
+
+KEYFRAME_INTERVAL = 10 # turns between stored engine states
+INVALID = -1 # encoded move that cost a life
+
+Move = Union[int, str] # action id, INVALID, or the raw string for the rare valid move without an encoding
+
+
+def _encode_state(state: Dict) -> Dict:
+	# the deck only ever shrinks from the end, so its size is enough to restore it from the initial deck
+	compact = {k: v for k, v in state.items() if k != "deck"}
+	compact["deck_size"] = len(state["deck"])
+	return compact
+
+
+def _decode_state(compact: Dict, initial_deck: List[int]) -> Dict:
+	state = {k: v for k, v in compact.items() if k != "deck_size"}
+	state["deck"] = initial_deck[:compact["deck_size"]]
+	return state
+
+
+def _blank_game(num_players: int, initial_deck: List[int]) -> HanabiGame:
+	# replay only needs the engine, not the players
+	return HanabiGame([None] * num_players, deck=[code_to_card(c) for c in initial_deck])
+
+
+def _apply(game: HanabiGame, move: Move):
+	if move == INVALID:
+		move = "INVALID"
+	elif isinstance(move, int):
+		hands = [[card_to_code(c) for c in hand] for hand in game.hands]
+		move = decode_action(move, game.current_player, hands, len(game.hands[game.current_player]))
+	game.execute_move(game.current_player, move)
+	game.current_player = (game.current_player + 1) % len(game.players)
+
+
+def build_trajectory(game: HanabiGame, **meta) -> Tuple[Dict, List[List[str]]]:
+	"""
+	Turn a finished game into a compact record (initial deck, encoded moves,
+	keyframes every KEYFRAME_INTERVAL turns) plus the raw model outputs of each
+	move, which TrajectoryWriter stores in a separate blob file.
+	"""
+	num_players = len(game.players)
+	initial_deck = [card_to_code(c) for c in game.initial_deck]
+	moves: List[Move] = []
+	outputs: List[List[str]] = []
+	turns_taken = [0] * num_players
+
+	replay = _blank_game(num_players, initial_deck)
+	keyframes = []
+	for event in game.log.events:
+		if event.turn % KEYFRAME_INTERVAL == 0:
+			keyframes.append(_encode_state(replay.state_dict()))
+
+		if event.move == "INVALID MOVE":
+			move = INVALID
+		else:
+			move = encode_move(event.move, event.actor, [[card_to_code(c) for c in hand] for hand in replay.hands])
+			if move == INVALID:
+				move = event.move
+		moves.append(move)
+		_apply(replay, move)
+
+		# LLM players keep every output of the turn, other players only the move they returned
+		player, taken = game.players[event.actor], turns_taken[event.actor]
+		outputs.append(player.turn_outputs[taken] if hasattr(player, "turn_outputs") else [player.history[taken][1]])
+		turns_taken[event.actor] += 1
+
+	record = dict(meta)
+	record.update({
+		"num_players": num_players,
+		"deck": bytes(initial_deck).hex(),
+		"moves": moves,
+		"keyframes": keyframes,
+		"turns_played": game.turns_played,
+		"score": sum(game.play_area.values())
+	})
+	return record, outputs
+
+
+class TrajectoryWriter:
+	"""Appends records to <prefix>.jsonl and the raw outputs to <prefix>.blob."""
+	def __init__(self, prefix: str):
+		self.index_path = prefix + ".jsonl"
+		self.blob_path = prefix + ".blob"
+		os.makedirs(os.path.dirname(prefix) or ".", exist_ok=True)
+
+	def write(self, record: Dict, outputs: List[List[str]]):
+		with open(self.blob_path, "ab") as blob:
+			if fcntl is not None:
+				fcntl.flock(blob, fcntl.LOCK_EX) # workers sharing the files append one record at a time
+			blob.seek(0, os.SEEK_END)
+			offset = blob.tell()
+			lengths = []
+			for move_outputs in outputs:
+				encoded = [text.encode() for text in move_outputs]
+				blob.write(b"".join(encoded))
+				lengths.append([len(e) for e in encoded])
+			blob.flush()
+			record = dict(record, blob_offset=offset, output_lengths=lengths)
+			with open(self.index_path, "a") as index:
+				index.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+class TrajectoryReader:
+	"""Reads records back and fetches raw outputs lazily from the memory-mapped blob."""
+	def __init__(self, prefix: str):
+		self.index_path = prefix + ".jsonl"
+		self.blob_path = prefix + ".blob"
+		self._blob: Optional[mmap.mmap] = None
+
+	def __iter__(self) -> Iterator[Dict]:
+		with open(self.index_path) as index:
+			for line in index:
+				yield json.loads(line)
+
+	def outputs(self, record: Dict, move_index: int) -> List[str]:
+		"""Raw model outputs (all calls of the turn, e.g. THINK then PLAY) for one move."""
+		lengths = record["output_lengths"]
+		if not any(lengths[move_index]):
+			return [""] * len(lengths[move_index]) # also covers an empty blob, which can't be mapped
+		if self._blob is None:
+			with open(self.blob_path, "rb") as f:
+				self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		start = record["blob_offset"] + sum(sum(l) for l in lengths[:move_index])
+		texts = []
+		for length in lengths[move_index]:
+			texts.append(self._blob[start:start + length].decode())
+			start += length
+		return texts
+
+	def close(self):
+		if self._blob is not None:
+			self._blob.close()
+			self._blob = None
+
+
+class TrajectoryReplay:
+	"""Rebuilds the engine state of a recorded game at any turn, starting from the closest keyframe."""
+	def __init__(self, record: Dict):
+		self.record = record
+		self.num_players = record["num_players"]
+		self.initial_deck = list(bytes.fromhex(record["deck"]))
+		self.moves: List[Move] = record["moves"]
+
+	def state_at(self, turn: int) -> HanabiGame:
+		"""Game as it was before move `turn` (turn == len(moves) gives the final state)."""
+		turn = max(0, min(turn, len(self.moves)))
+		game = _blank_game(self.num_players, self.initial_deck)
+		keyframe = min(turn // KEYFRAME_INTERVAL, len(self.record["keyframes"]) - 1)
+		if keyframe > 0:
+			game.load_state_dict(_decode_state(self.record["keyframes"][keyframe], self.initial_deck))
+		for move in self.moves[game.turns_played:turn]:
+			_apply(game, move)
+		return game
+
+	def final_state(self) -> HanabiGame:
+		return self.state_at(len(self.moves))
@@ -0,0 +1,164 @@
+from typing import List, Optional
+import numpy as np
+from hanabi.actions import EMPTY, NUM_COLORS, NUM_RANKS, num_actions, encode_move, decode_action
+
+NUM_CARD_TYPES = NUM_COLORS * NUM_RANKS
+
+# cards are encoded as color_index * 5 + (number - 1), in the same order HanabiGame builds its deck
+BASE_DECK = np.array([
+	color * NUM_RANKS + (number - 1)
+	for color in range(NUM_COLORS)
+	for number, count in [(1,3), (2,2), (3,2), (4,2), (5,1)]
+	for _ in range(count)
+], dtype=np.int8)
+DECK_SIZE = len(BASE_DECK)
+
+
+class VectorHanabiEnv:
+	"""
+	N independent Hanabi games held as NumPy arrays and advanced together.
+	Follows the same rules as HanabiGame.validate_move/execute_move: an
+	invalid action costs a life and still uses up the turn, and a game
+	ends when lives run out, the score reaches 25 or the deck is empty.
+	"""
+	def __init__(self, num_games: int, num_players: int = 5, hand_size: int = 4, seed: Optional[int] = None):
+		self.num_games = num_games
+		self.num_players = num_players
+		self.hand_size = hand_size
+		self.num_actions = num_actions(num_players, hand_size)
+		self.rng = np.random.default_rng(seed)
+		self.reset()
+
+	def reset(self, decks: Optional[np.ndarray] = None):
+		"""
+		Start new games. `decks` is an (N, 50) array of card codes in draw order
+		from the end (matching HanabiGame, which pops from the end of its deck);
+		if omitted, decks are shuffled with the environment's RNG.
+		"""
+		n, p, h = self.num_games, self.num_players, self.hand_size
+		if decks is None:
+			decks = self.rng.permuted(np.tile(BASE_DECK, (n, 1)), axis=1)
+		self.deck = np.array(decks, dtype=np.int8).reshape(n, DECK_SIZE)
+		self.deck_size = np.full(n, DECK_SIZE, dtype=np.int16)
+		self.fireworks = np.zeros((n, NUM_COLORS), dtype=np.int8)
+		self.discard_counts = np.zeros((n, NUM_CARD_TYPES), dtype=np.int8)
+		self.lives = np.full(n, 3, dtype=np.int8)
+		self.info_tokens = np.full(n, 8, dtype=np.int8)
+		self.turns_played = np.zeros(n, dtype=np.int16)
+		self.current_player = np.zeros(n, dtype=np.int8)
+
+		# deal in the same order as HanabiGame._deal_initial_hands
+		self.hands = np.empty((n, p, h), dtype=np.int8)
+		draws = self.deck[:, ::-1][:, :p * h]
+		self.hands[:] = draws.reshape(n, p, h)
+		self.deck_size -= p * h
+		self.done = np.zeros(n, dtype=bool)
+		return self
+
+	@property
+	def scores(self) -> np.ndarray:
+		return self.fireworks.sum(axis=1)
+
+	def _update_done(self):
+		self.done |= (self.lives <= 0) | (self.scores >= 25) | (self.deck_size <= 0)
+
+	def _clue_bits(self) -> np.ndarray:
+		"""(N, P-1, 10) presence bits: colors then numbers in each other hand, by target offset."""
+		n, p = self.num_games, self.num_players
+		targets = (self.current_player.astype(np.int64)[:, None] + np.arange(1, p)) % p
+		hands = self.hands[np.arange(n)[:, None], targets].astype(np.int64) # (N, P-1, H)
+		valid = hands != EMPTY
+		color_bits = np.bitwise_or.reduce(np.where(valid, 1 << (hands // NUM_RANKS), 0), axis=2)
+		number_bits = np.bitwise_or.reduce(np.where(valid, 1 << (hands % NUM_RANKS + NUM_COLORS), 0), axis=2)
+		bits = color_bits | number_bits
+		return ((bits[:, :, None] >> np.arange(NUM_COLORS + NUM_RANKS)) & 1).astype(bool)
+
+	def legal_moves(self) -> np.ndarray:
+		"""Boolean (N, num_actions) mask of valid actions for each game's current player."""
+		h = self.hand_size
+		mask = np.empty((self.num_games, self.num_actions), dtype=bool)
+		mask[:, :h] = True
+		mask[:, h:2*h] = (self.info_tokens < 8)[:, None]
+		mask[:, 2*h:] = (self._clue_bits() & (self.info_tokens > 0)[:, None, None]).reshape(self.num_games, -1)
+		mask[self.done] = False
+		return mask
+
+	def _is_legal(self, actions: np.ndarray) -> np.ndarray:
+		"""Validity of one chosen action per game, without building the full mask."""
+		p, h = self.num_players, self.hand_size
+		legal = (actions >= 0) & (actions < self.num_actions) & ~self.done
+		discard = (actions >= h) & (actions < 2 * h)
+		legal &= ~discard | (self.info_tokens < 8)
+		g = np.flatnonzero(legal & (actions >= 2 * h))
+		if len(g):
+			offset, kind = np.divmod(actions[g] - 2 * h, NUM_COLORS + NUM_RANKS)
+			target = (self.current_player[g].astype(np.int64) + offset + 1) % p
+			hand = self.hands[g, target].astype(np.int64)
+			attr = np.where(kind[:, None] < NUM_COLORS, hand // NUM_RANKS, hand % NUM_RANKS + NUM_COLORS)
+			matches = ((attr == kind[:, None]) & (hand != EMPTY)).any(axis=1)
+			legal[g] = matches & (self.info_tokens[g] > 0)
+		return legal
+
+	def step(self, actions: np.ndarray) -> np.ndarray:
+		"""Apply one action per game for its current player. Finished games are left untouched. Returns the done mask."""
+		actions = np.asarray(actions, dtype=np.int64).reshape(self.num_games)
+		active = ~self.done
+		legal = self._is_legal(actions)
+
+		self.turns_played[active] += 1
+		self.lives[active & ~legal] -= 1
+
+		h = self.hand_size
+		ok = active & legal
+		is_play = ok & (actions < h)
+		is_discard = ok & (actions >= h) & (actions < 2 * h)
+		is_clue = ok & (actions >= 2 * h)
+
+		# play / discard share the remove-and-draw logic
+		g = np.flatnonzero(is_play | is_discard)
+		if len(g):
+			seat = self.current_player[g].astype(np.int64)
+			slot = np.where(actions[g] < h, actions[g], actions[g] - h)
+			card = self.hands[g, seat, slot].astype(np.int64)
+			color, number = card // NUM_RANKS, card % NUM_RANKS + 1
+
+			playing = is_play[g]
+			success = playing & (self.fireworks[g, color] == number - 1)
+			self.fireworks[g[success], color[success]] = number[success]
+			self.lives[g[playing & ~success]] -= 1
+			dropped = ~success
+			np.add.at(self.discard_counts, (g[dropped], card[dropped]), 1)
+			discarding = ~playing
+			self.info_tokens[g[discarding]] = np.minimum(8, self.info_tokens[g[discarding]] + 1)
+
+			has_card = self.deck_size[g] > 0
+			drawn = np.full(len(g), EMPTY, dtype=np.int8)
+			drawn[has_card] = self.deck[g[has_card], self.deck_size[g[has_card]] - 1]
+			self.hands[g, seat, slot] = drawn
+			self.deck_size[g[has_card]] -= 1
+
+		self.info_tokens[is_clue] -= 1
+
+		self.current_player[active] = (self.current_player[active] + 1) % self.num_players
+		self._update_done()
+		return self.done
+
+	def random_actions(self, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+		"""Sample a uniformly random legal action for every game."""
+		rng = self.rng if rng is None else rng
+		mask = self.legal_moves()
+		weights = rng.random(mask.shape) * mask
+		return weights.argmax(axis=1)
+
+	def play_random(self, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+		"""Play every game to completion with uniformly random legal actions and return the scores."""
+		while not self.done.all():
+			self.step(self.random_actions(rng))
+		return self.scores
+
+	def decode_action(self, game: int, action: int) -> str:
+		"""Move string equivalent of `action` for game `game`'s current player."""
+		return decode_action(int(action), int(self.current_player[game]), self.hands[game].tolist(), self.hand_size)
+
+	def encode_move(self, game: int, move: str) -> int:
+		return encode_move(move, int(self.current_player[game]), self.hands[game].tolist(), self.hand_size)
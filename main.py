@@ -1,36 +1,29 @@
 import argparse
-from datetime import datetime
-import csv
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
 import os
-from typing import List, Dict
-import pandas as pd
+import random
+from typing import Callable, List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 from hanabi.game import HanabiGame
-from hanabi.players import (
-	GPTPlayer,
-	ClaudePlayer,
-	GeminiPlayer,
-	GroqPlayer,
-	RandomPlayer
-)
+from hanabi.results import ResultsStore, update_readme
+from hanabi.cache import ResponseCache, CACHE_MODES
+from hanabi.trajectory import TrajectoryWriter, build_trajectory
+from hanabi.checkpoint import GameCheckpoint, checkpoint_path, pending_checkpoints
+from hanabi.ratelimit import ProviderError, get_scheduler
+from hanabi.clients import close_clients, configure_clients
+from hanabi.batch import AnthropicBatchBackend, BatchBackend, FileBatchBackend, LockstepRunner, OpenAIBatchBackend, random_move_responder
+from hanabi.registry import get_player_class
+from hanabi.sequential import SequentialSweep, StoppingRule
+from hanabi.jobqueue import Heartbeat, JobQueue, LeaseLost, worker_name
+import time
 from config.models import AVAILABLE_MODELS
+from config.providers import PROVIDER_CONCURRENCY, PROVIDER_RATE_LIMITS, OFFLINE_PROVIDERS, HTTP_CLIENT_SETTINGS, BATCH_PROVIDERS
 import json
 
 # Load environment variables from .env file
 load_dotenv()
 
-def get_player_class(provider: str) -> type:
-	player_classes = {
-		"openai": GPTPlayer,
-		"anthropic": ClaudePlayer,
-		"google": GeminiPlayer,
-		"groq": GroqPlayer, # compatible API with OpenAI
-		"xai": GPTPlayer, # compatible API with OpenAI
-		"test": RandomPlayer
-	}
-	return player_classes[provider]
-
-
 def get_base_link(provider: str) -> str:
 	base_links = {
 		#"groq": "https://api.groq.com/openai/v1",
@@ -41,13 +34,24 @@ def get_base_link(provider: str) -> str:
 	return base_links[provider]
 
 
-def create_player(provider: str, model: str, args: Dict) -> object:
+def create_player(
+		provider: str, 
+		model: str, 
+		args: Dict, 
+		rng: Optional[random.Random] = None, 
+		cache: Optional[ResponseCache] = None,
+		offline: bool = False
+	) -> object:
 	PlayerClass = get_player_class(provider)
 	
 	# Get API key from environment variables
 	api_key = os.getenv(f"{provider.upper()}_API_KEY")
 	base_link = get_base_link(provider)
 
+	if not api_key and cache is not None and cache.mode == "replay":
+		api_key = "replay" # replayed games never reach the API
+	if not api_key and offline:
+		api_key = "offline"
 	if not api_key:
 		raise ValueError(f"API key for {provider} not found in environment variables")
 	
@@ -56,125 +60,670 @@ def create_player(provider: str, model: str, args: Dict) -> object:
 		args["base_url"] = base_link
 
 	if provider == "test":
-		return PlayerClass()
+		return PlayerClass(rng=rng)
 	
-	return PlayerClass(
+	player = PlayerClass(
 		model=model,
 		api_key=api_key,
 		**args  # Pass all run arguments to the player
 	)
+	player.cache = cache
+	player.scheduler = get_scheduler(provider, PROVIDER_RATE_LIMITS.get(provider)) # one per provider, shared by all games
+	return player
+
+
+def seeded_rng(experiment_id: int, run: int, *extra) -> random.Random:
+	"""RNG derived only from (experiment_id, run, ...), so a game plays out the same in any process."""
+	return random.Random(":".join(str(x) for x in (experiment_id, run) + extra))
+
+
+def deck_seed(experiment_id: int, run: int, seed_bank: Optional[int] = None) -> str:
+	"""
+	Seed of the deck of a game: its own by default, or with a seed bank the
+	same for game `run` of every config (common random numbers), so that score
+	differences between configs are paired on the deck.
+	"""
+	if seed_bank is None:
+		return f"{experiment_id}:{run}" # same deck as seeded_rng(experiment_id, run)
+	return f"bank{seed_bank}:{run}"
+
+
+def create_game(
+		provider: str, 
+		model_name: str, 
+		args: Dict, 
+		experiment_id: int, 
+		run: int, 
+		num_players: int = 5, 
+		debug: bool = False,
+		cache: Optional[ResponseCache] = None,
+		offline: bool = False,
+		seed_bank: Optional[int] = None
+	) -> HanabiGame:
+	players = [
+		create_player(provider, model_name, args, rng=seeded_rng(experiment_id, run, seat), cache=cache, offline=offline)
+		for seat in range(num_players)
+	]
+	if debug:
+		players[1].debug = True # only print debug for the fourth player
+	return HanabiGame(players, rng=random.Random(deck_seed(experiment_id, run, seed_bank)))
+
+
+def trajectory_meta(experiment_id: int, run: int, provider: str, model_name: str, args: Dict) -> Dict:
+	return {"experiment_id": int(experiment_id), "run": run, "provider": provider, "model": model_name, "args": str(args)}
+
+
+def play_offline_game(job: Tuple[str, str, Dict, int, int, bool, Optional[int]]) -> Tuple[int, int, Optional[Tuple]]:
+	"""
+	Play one game of an offline provider and return (turns_played, score, trajectory),
+	where trajectory is None unless requested. Runs in a worker process.
+	"""
+	provider, model_name, args, experiment_id, run, record_trajectory, seed_bank = job
+	game = create_game(provider, model_name, args, experiment_id, run, seed_bank=seed_bank)
+	score = game.play_game(verbosity=0)
+	trajectory = None
+	if record_trajectory:
+		trajectory = build_trajectory(game, **trajectory_meta(experiment_id, run, provider, model_name, args))
+	return game.turns_played, score, trajectory
+
+
+def open_results(output_dir: str, journal_mode: str = "WAL") -> ResultsStore:
+	# Create output directory if it doesn't exist
+	os.makedirs(output_dir, exist_ok=True)
+	
+	# games also go to experiment_results.csv, which is imported once into a new store
+	return ResultsStore(
+		os.path.join(output_dir, "results.sqlite"),
+		csv_file=os.path.join(output_dir, "experiment_results.csv"),
+		journal_mode=journal_mode
+	)
+
+
+def allocate_experiments(results: ResultsStore, models: List[Dict], first_id: Optional[int] = None) -> List[Tuple[int, Dict]]:
+	"""One experiment ID per model config, paired with the config."""
+	ids = results.allocate_experiments(
+		[(m["provider"], m["model"], str(m["args"])) for m in models], 
+		first_id # e.g. to replay the decks of an earlier experiment
+	)
+	return list(zip(ids, models))
+
+
+def save_result(
+		results: ResultsStore, 
+		experiment_id: int, 
+		provider: str, 
+		model_name: str, 
+		args: Dict, 
+		turns_played: int, 
+		score: int, 
+		calls: List[Dict] = (),
+		deck_seed: Optional[str] = None,
+		job_key: Optional[str] = None
+	) -> bool:
+	return results.add_game(
+		experiment_id, provider, model_name, str(args), turns_played, score, calls=calls, deck_seed=deck_seed, job_key=job_key
+	) # Convert dict to string for storage
+
+
+def game_calls(game: HanabiGame) -> List[Dict]:
+	"""Telemetry of every LLM request of a game, in turn order."""
+	calls = [
+		call
+		for player in game.players
+		for turn_calls in getattr(player, "turn_calls", [])
+		for call in turn_calls
+	]
+	return sorted(calls, key=lambda c: (c["turn"], c["call"]))
+
+
+def open_checkpoint(
+		output_dir: str, 
+		game: HanabiGame, 
+		experiment_id: int, 
+		run: int, 
+		provider: str, 
+		model_name: str, 
+		args: Dict, 
+		seed_bank: Optional[int] = None
+	) -> Optional[GameCheckpoint]:
+	"""
+	Checkpoint of game (experiment_id, run), which resumes the game if an earlier attempt was interrupted.
+	None for offline providers, whose games are cheap to replay, as in play_offline_game.
+	"""
+	if provider in OFFLINE_PROVIDERS:
+		return None
+	return GameCheckpoint(
+		checkpoint_path(os.path.join(output_dir, "checkpoints"), experiment_id, run), 
+		game, 
+		experiment_id=int(experiment_id), run=run, provider=provider, model=model_name, args=args, seed_bank=seed_bank
+	)
+
+
+def record_game(
+		results: ResultsStore, 
+		game: HanabiGame, 
+		score: int, 
+		experiment_id: int, 
+		run: int, 
+		provider: str, 
+		model_name: str, 
+		args: Dict,
+		trajectories: Optional[TrajectoryWriter] = None,
+		checkpoint: Optional[GameCheckpoint] = None,
+		seed_bank: Optional[int] = None,
+		job_key: Optional[str] = None
+	):
+	added = save_result(
+		results, experiment_id, provider, model_name, args, game.turns_played, score, game_calls(game), 
+		deck_seed(experiment_id, run, seed_bank), job_key
+	)
+	if not added: # the job's game was already recorded by another worker
+		print(f"Run {run + 1} of experiment {experiment_id} was already recorded for job {job_key}, skipped (score {score} in {game.turns_played} turns)")
+	elif trajectories is not None:
+		trajectories.write(*build_trajectory(game, **trajectory_meta(experiment_id, run, provider, model_name, args)))
+	if checkpoint is not None:
+		checkpoint.remove() # only once the result is safely stored
+
+
+def run_offline_experiments(
+		num_runs: int,
+		results: ResultsStore,
+		experiments: List[Tuple[int, Dict]],
+		workers: int,
+		trajectories: Optional[TrajectoryWriter] = None,
+		seed_bank: Optional[int] = None
+	):
+	"""
+	Play the games of offline providers in a process pool. Every game is seeded
+	from (experiment_id, run), and rows are written by this process in job order,
+	so the results don't depend on the number of workers.
+	"""
+	jobs = [
+		(model_config["provider"], model_config["model"], model_config["args"], experiment_id, run, trajectories is not None, seed_bank)
+		for experiment_id, model_config in experiments
+		for run in range(num_runs)
+	]
+	if not jobs:
+		return
+	
+	print(f"\n\nRunning {len(jobs)} offline games on {workers} worker processes")
+	chunksize = max(1, len(jobs) // (workers * 4))
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		for job, (turns_played, score, trajectory) in zip(jobs, pool.map(play_offline_game, jobs, chunksize=chunksize)):
+			provider, model_name, args, experiment_id, run, _, _ = job
+			save_result(results, experiment_id, provider, model_name, args, turns_played, score, deck_seed=deck_seed(experiment_id, run, seed_bank))
+			if trajectory is not None:
+				trajectories.write(*trajectory)
 
 
 def run_experiments(
 		num_runs: int, 
 		output_dir: str = "results", 
 		models: List[Dict] = AVAILABLE_MODELS,
-		debug: bool = False
+		debug: bool = False,
+		workers: int = 1,
+		cache: Optional[ResponseCache] = None,
+		first_id: Optional[int] = None,
+		trajectories: Optional[TrajectoryWriter] = None,
+		seed_bank: Optional[int] = None
 	):
-	# Create output directory if it doesn't exist
-	os.makedirs(output_dir, exist_ok=True)
-	
-	results_file = os.path.join(output_dir, "experiment_results.csv")
+	results = open_results(output_dir)
 	summary_file = os.path.join(output_dir, "model_summary.csv")
+	experiments = allocate_experiments(results, models, first_id)
 	
-	# Create results file with headers if it doesn't exist
-	if not os.path.exists(results_file):
-		with open(results_file, 'w', newline='') as f:
-			writer = csv.writer(f)
-			writer.writerow([
-				"experiment_id",
-				"provider",
-				"model",
-				"args",
-				"timestamp",
-				"turns_played",
-				"score"
-			])
-	
-	experiment_id = 1
-	if os.path.exists(results_file):
-		df = pd.read_csv(results_file)
-		if not df.empty:
-			experiment_id = df['experiment_id'].max() + 1
+	if workers > 1:
+		run_offline_experiments(
+			num_runs, 
+			results, 
+			[e for e in experiments if e[1]["provider"] in OFFLINE_PROVIDERS], 
+			workers,
+			trajectories,
+			seed_bank
+		)
+		experiments = [e for e in experiments if e[1]["provider"] not in OFFLINE_PROVIDERS]
 	
 	# Run experiments for each model
-	for model_config in models:
+	for experiment_id, model_config in experiments:
 		provider = model_config["provider"]
 		model_name = model_config["model"]
 		args = model_config["args"]
-		num_players = 5
 		
 		print(f"\n\nRunning {num_runs} games for {provider} - {model_name} with args {args}")
 		
 		for run in range(num_runs):
 			print(f"Run {run + 1}/{num_runs} {provider} - {model_name} with args {args} -------------------------------")
 			
-			# Create player and game
-			players = [create_player(provider, model_name, args) for _ in range(num_players)]
-			if debug:
-				players[1].debug = True # only print debug for the fourth player
-			game = HanabiGame(players)
-			
-			# Run game and get score
-			score = game.play_game(verbosity=1)
-			
-			# Save results
-			with open(results_file, 'a', newline='') as f:
-				writer = csv.writer(f)
-				writer.writerow([
-					experiment_id,
-					provider,
-					model_name,
-					str(args),  # Convert dict to string for CSV storage
-					datetime.now().isoformat(),
-					game.turns_played,
-					score
-				])
-			
-		experiment_id += 1 # increment experiment ID for next model
+			_run_game(provider, model_name, args, experiment_id, run, output_dir, results, debug, cache, trajectories, seed_bank)
 	
 	# Generate summary after all experiments
-	generate_summary(results_file, summary_file)
+	generate_summary(results, summary_file)
 
 
-def generate_summary(results_file: str, summary_file: str):
-	df = pd.read_csv(results_file)
+def _run_game(
+		provider: str,
+		model_name: str,
+		args: Dict,
+		experiment_id: int,
+		run: int,
+		output_dir: str,
+		results: ResultsStore,
+		debug: bool = False,
+		cache: Optional[ResponseCache] = None,
+		trajectories: Optional[TrajectoryWriter] = None,
+		seed_bank: Optional[int] = None,
+		before_turn: Optional[Callable[[], None]] = None,
+		job_key: Optional[str] = None
+	) -> Optional[int]:
+	# Create players and game
+	game = create_game(provider, model_name, args, experiment_id, run, debug=debug, cache=cache, seed_bank=seed_bank)
+	checkpoint = open_checkpoint(output_dir, game, experiment_id, run, provider, model_name, args, seed_bank)
 	
-	# Convert timestamp to datetime
-	df['timestamp'] = pd.to_datetime(df['timestamp'])
+	# Run game and get score
+	try:
+		score = game.play_game(verbosity=1, checkpoint=checkpoint, before_turn=before_turn)
+	except ProviderError as e:
+		print(f"Run {run + 1} {provider} - {model_name} with args {args} stopped by a provider error: {e} (resume with --resume)")
+		return None
 	
-	# Get the latest timestamp and corresponding experiment_id for each model configuration
-	latest_ids = df.sort_values('timestamp').groupby(['provider', 'model', 'args'])['experiment_id'].last()
+	# Save results
+	record_game(results, game, score, experiment_id, run, provider, model_name, args, trajectories, checkpoint, seed_bank, job_key)
+	return score
+
+
+async def _run_game_async(
+		provider: str,
+		model_name: str,
+		args: Dict,
+		experiment_id: int,
+		run: int,
+		num_runs: int,
+		output_dir: str,
+		results: ResultsStore,
+		limits: List[asyncio.Semaphore],
+		debug: bool = False,
+		cache: Optional[ResponseCache] = None,
+		trajectories: Optional[TrajectoryWriter] = None,
+		seed_bank: Optional[int] = None
+	) -> Optional[int]:
+	async with limits[0], limits[1]:
+		try:
+			game = create_game(provider, model_name, args, experiment_id, run, debug=debug, cache=cache, seed_bank=seed_bank)
+			checkpoint = open_checkpoint(output_dir, game, experiment_id, run, provider, model_name, args, seed_bank)
+			score = await game.play_game_async(verbosity=0, checkpoint=checkpoint) # interleaved per-turn output from many games is unreadable
+		except Exception as e:
+			print(f"Run {run + 1}/{num_runs} {provider} - {model_name} with args {args} failed: {e} (resume with --resume)")
+			return None
 	
-	# Get all experiments that match these experiment IDs
-	latest_experiments = df[df['experiment_id'].isin(latest_ids)]
+	# results are written as soon as each game finishes
+	record_game(results, game, score, experiment_id, run, provider, model_name, args, trajectories, checkpoint, seed_bank)
+	print(f"Run {run + 1}/{num_runs} {provider} - {model_name} with args {args}: score {score} in {game.turns_played} turns")
+	return score
+
+
+async def run_experiments_async(
+		num_runs: int, 
+		output_dir: str = "results", 
+		models: List[Dict] = AVAILABLE_MODELS,
+		debug: bool = False,
+		concurrency: int = 16,
+		provider_limits: Dict[str, int] = PROVIDER_CONCURRENCY,
+		cache: Optional[ResponseCache] = None,
+		first_id: Optional[int] = None,
+		trajectories: Optional[TrajectoryWriter] = None,
+		seed_bank: Optional[int] = None
+	):
+	"""
+	Like run_experiments, but plays many games (across all configs) at once.
+	At most `concurrency` games are in flight overall, and at most
+	provider_limits[provider] for any one provider.
+	"""
+	results = open_results(output_dir)
+	summary_file = os.path.join(output_dir, "model_summary.csv")
 	
-	# Calculate summary statistics on latest experiments only
-	summary = latest_experiments.groupby(['provider', 'model', 'args']).agg({
-		'score': ['mean', 'std', 'count'],
-		'turns_played': ['mean']
-	}).round(4)
+	total_limit = asyncio.Semaphore(concurrency)
+	provider_semaphores = {}
+	games = []
+	for experiment_id, model_config in allocate_experiments(results, models, first_id):
+		provider = model_config["provider"]
+		provider_limit = provider_semaphores.setdefault(
+			provider, asyncio.Semaphore(provider_limits.get(provider, concurrency))
+		)
+		for run in range(num_runs):
+			games.append(_run_game_async(
+				provider,
+				model_config["model"],
+				model_config["args"],
+				experiment_id,
+				run,
+				num_runs,
+				output_dir,
+				results,
+				[provider_limit, total_limit], # provider first, so a saturated provider doesn't hold global slots
+				debug=debug,
+				cache=cache,
+				trajectories=trajectories,
+				seed_bank=seed_bank
+			))
 	
-	# Calculate win percentage (score of 25 is a win)
-	win_games = latest_experiments[latest_experiments['score'] == 25].groupby(['provider', 'model', 'args']).size()
-	total_games = latest_experiments.groupby(['provider', 'model', 'args']).size()
-	win_pct = (win_games / total_games).fillna(0)  # Replace NaN with 0 when no wins
+	print(f"Running {len(games)} games across {len(models)} configurations, up to {concurrency} at a time")
+	await asyncio.gather(*games)
 	
-	summary['win_percentage'] = win_pct.round(2)
+	# Generate summary after all experiments
+	generate_summary(results, summary_file)
+
+
+def create_batch_backend(kind: str, provider: str, player: object, output_dir: str, experiment_id: int) -> BatchBackend:
+	"""Batch backend of a provider: its batch API, or with kind "file" a local stand-in answering with random moves."""
+	batch_format = BATCH_PROVIDERS[provider]
+	if kind == "file":
+		return FileBatchBackend(
+			os.path.join(output_dir, "batches"), 
+			batch_format, 
+			respond=random_move_responder(seeded_rng(experiment_id, "batch"))
+		)
+	if batch_format == "anthropic":
+		return AnthropicBatchBackend(player.client)
+	return OpenAIBatchBackend(player.client)
+
+
+def run_batch_experiments(
+		num_runs: int, 
+		output_dir: str = "results", 
+		models: List[Dict] = AVAILABLE_MODELS,
+		batch: str = "api",
+		debug: bool = False,
+		cache: Optional[ResponseCache] = None,
+		first_id: Optional[int] = None,
+		trajectories: Optional[TrajectoryWriter] = None,
+		seed_bank: Optional[int] = None
+	):
+	"""
+	Like run_experiments, but the games of each config are played in lockstep,
+	with every step sent as one request batch (see hanabi.batch). Configs of
+	providers without a batch API are played one game after another.
+	"""
+	results = open_results(output_dir)
+	summary_file = os.path.join(output_dir, "model_summary.csv")
 	
-	# Flatten column names
-	summary.columns = ['avg_score', 'std_score', 'num_games', 'avg_turns_played', 'win_percentage']
+	for experiment_id, model_config in allocate_experiments(results, models, first_id):
+		provider = model_config["provider"]
+		model_name = model_config["model"]
+		args = model_config["args"]
+		
+		if provider not in BATCH_PROVIDERS:
+			print(f"\n\n{provider} has no batch API, running {num_runs} games for {model_name} with args {args} one by one")
+			for run in range(num_runs):
+				_run_game(provider, model_name, args, experiment_id, run, output_dir, results, debug, cache, trajectories, seed_bank)
+			continue
+		
+		print(f"\n\nRunning {num_runs} games in lockstep for {provider} - {model_name} with args {args}")
+		games = [
+			create_game(provider, model_name, args, experiment_id, run, debug=debug, cache=cache, offline=batch == "file", seed_bank=seed_bank)
+			for run in range(num_runs)
+		]
+		checkpoints = [
+			open_checkpoint(output_dir, game, experiment_id, run, provider, model_name, args, seed_bank)
+			for run, game in enumerate(games)
+		]
+		backend = create_batch_backend(batch, provider, games[0].players[0], output_dir, experiment_id)
+		scores = LockstepRunner(games, backend, checkpoints).run()
+		for run, (game, score, checkpoint) in enumerate(zip(games, scores, checkpoints)):
+			if score is not None:
+				record_game(results, game, score, experiment_id, run, provider, model_name, args, trajectories, checkpoint, seed_bank)
+				print(f"Run {run + 1}/{num_runs} {provider} - {model_name} with args {args}: score {score} in {game.turns_played} turns")
+	
+	generate_summary(results, summary_file)
+
+
+async def _run_sweep_async(
+		sweep: SequentialSweep,
+		experiments: Dict[int, Dict],
+		output_dir: str,
+		results: ResultsStore,
+		concurrency: int,
+		provider_limits: Dict[str, int] = PROVIDER_CONCURRENCY,
+		debug: bool = False,
+		cache: Optional[ResponseCache] = None,
+		trajectories: Optional[TrajectoryWriter] = None,
+		seed_bank: Optional[int] = None
+	):
+	"""Keep up to `concurrency` games of the sweep in flight, asking it for the next ones as games finish."""
+	total_limit = asyncio.Semaphore(concurrency)
+	provider_semaphores = {}
+	running = {} # task -> experiment ID
+	while True:
+		for experiment_id, run in sweep.next_games(concurrency - len(running)):
+			model_config = experiments[experiment_id]
+			provider = model_config["provider"]
+			provider_limit = provider_semaphores.setdefault(
+				provider, asyncio.Semaphore(provider_limits.get(provider, concurrency))
+			)
+			task = asyncio.ensure_future(_run_game_async(
+				provider,
+				model_config["model"],
+				model_config["args"],
+				experiment_id,
+				run,
+				sweep.rule.max_runs,
+				output_dir,
+				results,
+				[provider_limit, total_limit],
+				debug=debug,
+				cache=cache,
+				trajectories=trajectories,
+				seed_bank=seed_bank
+			))
+			running[task] = experiment_id
+		if not running:
+			break
+		done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+		for task in done:
+			sweep.record(running.pop(task), task.result())
+
 
-	# arrange by win_percentage, then by avg_score, then by avg_turns_played (higher is better for all)
-	summary = summary.sort_values(by=['win_percentage', 'avg_score', 'avg_turns_played'], ascending=[False, False, False])
+def run_sequential_experiments(
+		rule: StoppingRule,
+		output_dir: str = "results", 
+		models: List[Dict] = AVAILABLE_MODELS,
+		budget: Optional[int] = None,
+		debug: bool = False,
+		concurrency: int = 1,
+		provider_limits: Dict[str, int] = PROVIDER_CONCURRENCY,
+		cache: Optional[ResponseCache] = None,
+		first_id: Optional[int] = None,
+		trajectories: Optional[TrajectoryWriter] = None,
+		seed_bank: Optional[int] = None
+	):
+	"""
+	Like run_experiments, but every config only plays until the stopping rule is
+	met (between rule.min_runs and rule.max_runs games), and games are allocated
+	across configs by a SequentialSweep (see hanabi.sequential), up to `budget`
+	games in total.
+	"""
+	results = open_results(output_dir)
+	summary_file = os.path.join(output_dir, "model_summary.csv")
+	experiments = dict(allocate_experiments(results, models, first_id))
+	sweep = SequentialSweep(list(experiments), rule, budget)
+	
+	print(f"Running up to {rule.max_runs} games for each of {len(experiments)} configurations, stopping at a CI half-width of {rule.half_width}")
+	if concurrency > 1:
+		asyncio.run(_run_sweep_async(sweep, experiments, output_dir, results, concurrency, provider_limits, debug, cache, trajectories, seed_bank))
+	else:
+		while True:
+			games = sweep.next_games(1)
+			if not games:
+				break
+			experiment_id, run = games[0]
+			provider, model_name, args = (experiments[experiment_id][k] for k in ("provider", "model", "args"))
+			print(f"Run {run + 1}/{rule.max_runs} {provider} - {model_name} with args {args} -------------------------------")
+			sweep.record(experiment_id, _run_game(provider, model_name, args, experiment_id, run, output_dir, results, debug, cache, trajectories, seed_bank))
+	
+	print("\nSequential sweep:")
+	for experiment_id, num_games, mean, half_width, reason in sweep.report():
+		model_config = experiments[experiment_id]
+		print(f"{model_config['provider']} - {model_config['model']} with args {model_config['args']}: {mean:.2f} ± {half_width:.2f} after {num_games} games ({reason})")
+	print(f"{sweep.started} games played out of {rule.max_runs * len(experiments)}")
 	
-	# Save summary, overwrite if exists
-	summary.reset_index().to_csv(summary_file, index=False)
+	generate_summary(results, summary_file)
+
+
+def resume_experiments(
+		output_dir: str = "results",
+		debug: bool = False,
+		concurrency: int = 1,
+		provider_limits: Dict[str, int] = PROVIDER_CONCURRENCY,
+		cache: Optional[ResponseCache] = None,
+		trajectories: Optional[TrajectoryWriter] = None
+	):
+	"""Finish the games that were interrupted, from their last completed turn."""
+	results = open_results(output_dir)
+	summary_file = os.path.join(output_dir, "model_summary.csv")
+	pending = pending_checkpoints(os.path.join(output_dir, "checkpoints"))
+	print(f"Resuming {len(pending)} unfinished games")
+	
+	if concurrency > 1:
+		async def resume_all():
+			total_limit = asyncio.Semaphore(concurrency)
+			provider_semaphores = {}
+			games = []
+			for header in pending:
+				provider = header["provider"]
+				provider_limit = provider_semaphores.setdefault(
+					provider, asyncio.Semaphore(provider_limits.get(provider, concurrency))
+				)
+				games.append(_run_game_async(
+					provider, header["model"], header["args"], header["experiment_id"], header["run"], header["run"] + 1,
+					output_dir, results, [provider_limit, total_limit], debug=debug, cache=cache, trajectories=trajectories,
+					seed_bank=header.get("seed_bank") # absent in older checkpoints
+				))
+			await asyncio.gather(*games)
+		asyncio.run(resume_all())
+	else:
+		for header in pending:
+			print(f"\n\nResuming run {header['run'] + 1} of experiment {header['experiment_id']}: {header['provider']} - {header['model']} with args {header['args']}")
+			_run_game(
+				header["provider"], header["model"], header["args"], header["experiment_id"], header["run"],
+				output_dir, results, debug, cache, trajectories, header.get("seed_bank")
+			)
+	
+	generate_summary(results, summary_file)
+
+
+def enqueue_experiments(
+		num_runs: int, 
+		output_dir: str = "results", 
+		models: List[Dict] = AVAILABLE_MODELS,
+		first_id: Optional[int] = None,
+		seed_bank: Optional[int] = None,
+		journal_mode: str = "WAL"
+	):
+	"""Queue num_runs games of every config in <output_dir>/jobs.sqlite, to be played by `main.py worker` processes."""
+	results = open_results(output_dir, journal_mode)
+	queue = JobQueue(os.path.join(output_dir, "jobs.sqlite"), journal_mode)
+	experiments = allocate_experiments(results, models, first_id)
+	added = queue.enqueue(
+		{
+			"experiment_id": experiment_id,
+			"run": run,
+			"provider": model_config["provider"],
+			"model": model_config["model"],
+			"args": model_config["args"],
+			"seed_bank": seed_bank
+		}
+		for experiment_id, model_config in experiments
+		for run in range(num_runs)
+	)
+	print(f"Queued {added} games of {len(experiments)} configurations in {queue.path} ({queue.counts()})")
+	queue.close()
+	results.close()
+
+
+def run_worker(
+		output_dir: str = "results",
+		lease: float = 300.0,
+		poll_interval: float = 10.0,
+		debug: bool = False,
+		cache: Optional[ResponseCache] = None,
+		trajectories: Optional[TrajectoryWriter] = None,
+		journal_mode: str = "WAL"
+	):
+	"""
+	Play queued games (see enqueue_experiments) until none are left. Any number
+	of workers, on any host sharing output_dir, can run at once. Each game is
+	leased for `lease` seconds and the lease is renewed while it makes progress; the
+	game of a worker that died or got stuck in a turn is picked up by another one
+	once its lease expires, and resumed from its checkpoint. Workers wait while other workers still hold jobs.
+	"""
+	results = open_results(output_dir, journal_mode)
+	summary_file = os.path.join(output_dir, "model_summary.csv")
+	queue = JobQueue(os.path.join(output_dir, "jobs.sqlite"), journal_mode)
+	worker = worker_name()
+	print(f"Worker {worker} started ({queue.counts()})")
+	
+	played = 0
+	while True:
+		job = queue.claim(worker, lease)
+		if job is None:
+			if not queue.counts()["running"]:
+				break
+			time.sleep(poll_interval) # jobs of other workers come back if their leases expire
+			continue
+		
+		print(f"\n\nJob {job.job_id} (attempt {job.attempts}): run {job.run + 1} of experiment {job.experiment_id}, {job.provider} - {job.model} with args {job.args}")
+		try:
+			with Heartbeat(queue, job, worker, lease) as heartbeat:
+				score = _run_game(
+					job.provider, job.model, job.args, job.experiment_id, job.run,
+					output_dir, results, debug, cache, trajectories, job.seed_bank,
+					before_turn=heartbeat.check, # stop paying for a game another worker has taken over
+					job_key=job.key
+				)
+		except LeaseLost as e:
+			print(f"{e}, leaving it to them")
+			continue
+		except Exception as e:
+			print(f"Job {job.job_id} failed: {e}")
+			queue.fail(job, worker, f"{type(e).__name__}: {e}")
+			continue
+		if score is None:
+			queue.fail(job, worker, "stopped by a provider error") # resumed from its checkpoint on the next attempt
+		else:
+			queue.complete(job, worker)
+			played += 1
+	
+	print(f"\nWorker {worker} played {played} games ({queue.counts()})")
+	queue.close()
+	generate_summary(results, summary_file)
+
+
+def generate_summary(results: ResultsStore, summary_file: str, readme_file: Optional[str] = None):
+	# the store keeps per-experiment aggregates up to date, only the score statistics read the games
+	summary, comparisons = results.leaderboard()
+	results.export_summary(summary_file, summary)
 	print(f"\nSummary saved to {summary_file}")
+	if comparisons:
+		comparisons_file = os.path.join(os.path.dirname(summary_file), "model_comparisons.csv")
+		results.export_comparisons(comparisons_file, comparisons)
+		print(f"p-values of {len(comparisons)} config pairs saved to {comparisons_file}")
+	pairs = results.paired_differences()
+	if pairs: # only configs that played on the same decks, e.g. with --seed-bank
+		pairs_file = os.path.join(os.path.dirname(summary_file), "model_pairs.csv")
+		results.export_pairs(pairs_file, pairs)
+		print(f"Paired differences of {len(pairs)} config pairs saved to {pairs_file}")
+	if readme_file is not None:
+		update_readme(readme_file, summary)
+		print(f"Leaderboard updated in {readme_file}")
 
 
 def main():
 	parser = argparse.ArgumentParser(description='Hanabi AI experiments')
+	parser.add_argument(
+		'command',
+		nargs='?',
+		choices=['run', 'enqueue', 'worker', 'summary'],
+		default='run',
+		help='run: play the games here (default); enqueue: queue them in <output-dir>/jobs.sqlite; worker: play queued games until none are left; summary: only write the summary files of <output-dir>'
+	)
 	parser.add_argument(
 		'-n', '--num-runs',
 		type=int,
@@ -209,13 +758,126 @@ def main():
 		action='store_true',
 		help='Enable debug mode'
 	)
+	parser.add_argument(
+		'-w', '--workers',
+		type=int,
+		default=1,
+		help='Number of worker processes for games of offline providers such as "test" (default: 1)'
+	)
+	parser.add_argument(
+		'-c', '--concurrency',
+		type=int,
+		default=1,
+		help='Number of games to play at the same time (default: 1, i.e. one game after another)'
+	)
+	
+	parser.add_argument(
+		'--cache-mode',
+		choices=CACHE_MODES,
+		default='passthrough',
+		help='LLM response cache: passthrough (off), record (reuse and store responses) or replay (cached responses only, no network)'
+	)
+	parser.add_argument(
+		'--cache-path',
+		type=str,
+		default=None,
+		help='SQLite file for the response cache (default: <output-dir>/response_cache.sqlite)'
+	)
+	parser.add_argument(
+		'--experiment-id',
+		type=int,
+		default=None,
+		help='First experiment ID to use (default: next free ID). Reusing an earlier ID of the same config replays its decks, which are not counted again in the summary'
+	)
+	
+	parser.add_argument(
+		'--no-trajectories',
+		action='store_true',
+		help='Do not store game trajectories (deck, moves and raw outputs) in <output-dir>/trajectories.jsonl/.blob'
+	)
+	
+	parser.add_argument(
+		'--resume',
+		action='store_true',
+		help='Finish the games that were interrupted (saved in <output-dir>/checkpoints) instead of starting new ones'
+	)
+	
+	parser.add_argument(
+		'--batch',
+		choices=['api', 'file'],
+		default=None,
+		help='Play the games of each config in lockstep through the provider batch API (api), or a local file-based stand-in answering with random moves (file)'
+	)
+	
+	parser.add_argument(
+		'--lease',
+		type=float,
+		default=300.0,
+		help='With worker, seconds a worker holds a game without renewing its lease before another worker takes it over (default: 300)'
+	)
+	parser.add_argument(
+		'--journal-mode',
+		choices=['WAL', 'DELETE'],
+		default='WAL',
+		help='With enqueue and worker, SQLite journal mode of the results store and job queue. WAL (default) needs all processes on one host; use DELETE when workers on several hosts share the output directory over a network filesystem'
+	)
+	parser.add_argument(
+		'--seed-bank',
+		type=int,
+		default=None,
+		help='Common random numbers: game i of every config is played on the same deck, drawn from this seed bank, and model_pairs.csv compares configs on their paired games'
+	)
+	parser.add_argument(
+		'--sequential',
+		action='store_true',
+		help='Stop each config early once its score CI is narrow enough (or clearly below --score-threshold), playing at most --num-runs games'
+	)
+	parser.add_argument(
+		'--ci-half-width',
+		type=float,
+		default=1.0,
+		help='With --sequential, stop a config once the 95%% CI of its mean score is within ± this (default: 1.0)'
+	)
+	parser.add_argument(
+		'--score-threshold',
+		type=float,
+		default=None,
+		help='With --sequential, also stop a config once its 95%% CI is entirely below this score (e.g. the leaderboard cut-off)'
+	)
+	parser.add_argument(
+		'--min-runs',
+		type=int,
+		default=5,
+		help='With --sequential, games per config before it can stop (default: 5)'
+	)
+	parser.add_argument(
+		'--budget',
+		type=int,
+		default=None,
+		help='With --sequential, total games across all configs (default: no limit)'
+	)
+	
+	parser.add_argument(
+		'--readme',
+		type=str,
+		default=None,
+		help='With summary, also rewrite the leaderboard table of this README (e.g. README.md)'
+	)
 	
 	parsed_args = parser.parse_args()
 	
+	if parsed_args.command == 'summary':
+		results = open_results(parsed_args.output_dir, parsed_args.journal_mode)
+		generate_summary(results, os.path.join(parsed_args.output_dir, "model_summary.csv"), parsed_args.readme)
+		results.close()
+		return
+	
 	models = []
 	if parsed_args.models:
 		for model in parsed_args.models.split(';'):
-			provider, model, model_args = model.split('/')
+			provider, model = model.split('/', 1)
+			model, brace, model_args = model.partition('/{') # the args may contain slashes, e.g. a base_url
+			model, model_args = model.rstrip('/'), brace[1:] + model_args
 			if model_args:
 				model_args = json.loads(model_args)
 			else:
@@ -229,16 +891,107 @@ def main():
 		models = [m for m in models if m["provider"] == parsed_args.provider]
 	
 	# Filter out already tested models if only-new is specified
-	if parsed_args.only_new and os.path.exists(os.path.join(parsed_args.output_dir, "experiment_results.csv")):
-		df = pd.read_csv(os.path.join(parsed_args.output_dir, "experiment_results.csv"))
-		tested_configs = set()
-		for _, row in df.iterrows():
-			config = f"{row['provider']}/{row['model']}/{row['args']}"
-			tested_configs.add(config)
+	if parsed_args.only_new:
+		results = open_results(parsed_args.output_dir)
+		tested_configs = results.configs()
+		results.close()
 		
 		models = [m for m in models if f"{m['provider']}/{m['model']}/{m['args']}" not in tested_configs]
 	
-	run_experiments(parsed_args.num_runs, parsed_args.output_dir, models, debug=parsed_args.debug)
+	configure_clients(**HTTP_CLIENT_SETTINGS)
+	cache = ResponseCache(
+		parsed_args.cache_path or os.path.join(parsed_args.output_dir, "response_cache.sqlite"),
+		mode=parsed_args.cache_mode
+	)
+	trajectories = None
+	if not parsed_args.no_trajectories:
+		trajectories = TrajectoryWriter(os.path.join(parsed_args.output_dir, "trajectories"))
+	
+	if parsed_args.command == 'enqueue':
+		enqueue_experiments(
+			parsed_args.num_runs, 
+			parsed_args.output_dir, 
+			models, 
+			first_id=parsed_args.experiment_id,
+			seed_bank=parsed_args.seed_bank,
+			journal_mode=parsed_args.journal_mode
+		)
+	elif parsed_args.command == 'worker':
+		run_worker(
+			parsed_args.output_dir,
+			lease=parsed_args.lease,
+			debug=parsed_args.debug, 
+			cache=cache,
+			trajectories=trajectories,
+			journal_mode=parsed_args.journal_mode
+		)
+	elif parsed_args.resume:
+		resume_experiments(
+			parsed_args.output_dir, 
+			debug=parsed_args.debug, 
+			concurrency=parsed_args.concurrency,
+			cache=cache,
+			trajectories=trajectories
+		)
+	elif parsed_args.sequential:
+		run_sequential_experiments(
+			StoppingRule(
+				half_width=parsed_args.ci_half_width,
+				threshold=parsed_args.score_threshold,
+				min_runs=parsed_args.min_runs,
+				max_runs=parsed_args.num_runs
+			),
+			parsed_args.output_dir, 
+			models, 
+			budget=parsed_args.budget,
+			debug=parsed_args.debug, 
+			concurrency=parsed_args.concurrency,
+			cache=cache,
+			first_id=parsed_args.experiment_id,
+			trajectories=trajectories,
+			seed_bank=parsed_args.seed_bank
+		)
+	elif parsed_args.batch:
+		run_batch_experiments(
+			parsed_args.num_runs, 
+			parsed_args.output_dir, 
+			models, 
+			batch=parsed_args.batch,
+			debug=parsed_args.debug, 
+			cache=cache,
+			first_id=parsed_args.experiment_id,
+			trajectories=trajectories,
+			seed_bank=parsed_args.seed_bank
+		)
+	elif parsed_args.concurrency > 1:
+		asyncio.run(run_experiments_async(
+			parsed_args.num_runs, 
+			parsed_args.output_dir, 
+			models, 
+			debug=parsed_args.debug, 
+			concurrency=parsed_args.concurrency,
+			cache=cache,
+			first_id=parsed_args.experiment_id,
+			trajectories=trajectories,
+			seed_bank=parsed_args.seed_bank
+		))
+	else:
+		run_experiments(
+			parsed_args.num_runs, 
+			parsed_args.output_dir, 
+			models, 
+			debug=parsed_args.debug, 
+			workers=parsed_args.workers,
+			cache=cache,
+			first_id=parsed_args.experiment_id,
+			trajectories=trajectories,
+			seed_bank=parsed_args.seed_bank
+		)
+	
+	if cache.enabled:
+		print(f"Response cache: {cache.hits} hits, {cache.misses} misses")
+	cache.close()
+	close_clients()
 
 if __name__ == "__main__":
 	main()
@@ -0,0 +1,35 @@
+import random
+from typing import Any, Dict, Optional
+from hanabi.players import LLMPlayer
+
+
+class StubPlayer(LLMPlayer):
+	"""LLM player whose provider answers instantly with a random legal move (filler text for THINK prompts)."""
+	conversation_start = 1
+
+	def __init__(self, cot: int = 0, stream: bool = True, rng: Optional[random.Random] = None, context: Optional[str] = None):
+		super().__init__(context, stream)
+		self.model = "stub"
+		self.cot = cot
+		self.rng = rng if rng is not None else random.Random()
+		self._load_prompts()
+		self.messages = [{"role": "system", "content": self.system_prompt}]
+		self.sent = [] # the conversation sent with each request
+
+	def _build_request(self, content: str, final: bool) -> Dict[str, Any]:
+		self.messages.append({"role": "user", "content": content})
+		self.sent.append(self._context_messages())
+		return {"model": self.model, "messages": self.sent[-1]}
+
+	def _send(self, request: Dict[str, Any]) -> str:
+		if not self._expect_move:
+			return "Thinking about the state. " * 20
+		legal = self.game.legal_moves(self.seat)
+		action = self.game.action_table.nth_listed(self.seat, legal, self.rng.randrange(legal.bit_count()))
+		return self.game.action_to_move(self.seat, action)
+
+	async def _send_async(self, request: Dict[str, Any]) -> str:
+		return self._send(request)
+
+	def _parse(self, response: str) -> str:
+		return response
@@ -0,0 +1,66 @@
+import random
+from typing import Dict, List, Optional
+import pytest
+from hanabi.batch import BatchBackend, BatchItem, LockstepRunner, _anthropic_item
+from hanabi.game import HanabiGame
+from stubs import StubPlayer
+
+
+class FailingBackend(BatchBackend):
+	"""Answers the requests of game 0 with a fixed error and the others with a discard."""
+	def __init__(self, status: Optional[int]):
+		self.status = status
+		self.submitted: List[str] = []
+
+	def submit(self, requests):
+		self.submitted.extend(requests)
+		self.pending = list(requests)
+		return "batch"
+
+	def results(self, batch_id):
+		return {
+			custom_id: BatchItem(None, "failed", self.status) if custom_id.startswith("0-") else BatchItem("D1", None)
+			for custom_id in self.pending
+		}
+
+
+def run(status: Optional[int]):
+	games = [HanabiGame([StubPlayer(rng=random.Random(seat)) for seat in range(2)], rng=random.Random(i)) for i in range(2)]
+	backend = FailingBackend(status)
+	runner = LockstepRunner(games, backend, max_resubmits=2)
+	return runner, games, backend, runner.run()
+
+
+def submissions(backend: FailingBackend, game: int) -> Dict[str, int]:
+	counts: Dict[str, int] = {}
+	for custom_id in backend.submitted:
+		if custom_id.startswith(f"{game}-"):
+			counts[custom_id] = counts.get(custom_id, 0) + 1
+	return counts
+
+
+@pytest.mark.parametrize("status", [429, 500, None])
+def test_transient_errors_are_resubmitted_then_stop_the_game(status):
+	runner, games, backend, scores = run(status)
+	assert scores[0] is None and scores[1] is not None
+	assert list(submissions(backend, 0).values()) == [3] # first request, then max_resubmits
+	assert games[0].turns_played == 0
+
+
+def test_auth_errors_stop_the_game_right_away():
+	runner, games, backend, scores = run(401)
+	assert scores[0] is None
+	assert list(submissions(backend, 0).values()) == [1]
+
+
+def test_request_errors_are_played_as_invalid_moves():
+	runner, games, backend, scores = run(400)
+	assert scores[0] is not None and 0 not in runner.failed
+	assert set(submissions(backend, 0).values()) == {1} # never resubmitted
+	assert games[0].players[0].history[0][1] == "ERROR"
+
+
+def test_anthropic_error_types_map_to_their_status():
+	errored = {"type": "errored", "error": {"type": "error", "error": {"type": "invalid_request_error", "message": "too long"}}}
+	assert _anthropic_item({"result": errored}).status == 400
+	assert _anthropic_item({"result": {"type": "expired"}}).status is None
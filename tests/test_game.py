@@ -0,0 +1,60 @@
+from hanabi.game import Card, HanabiGame
+
+
+def make_game(num_players: int = 3) -> HanabiGame:
+	# cards are dealt from the end of the deck, player 1 gets the last four
+	deck = [Card(color, number) for number in (1, 2, 3, 4, 5) for color in "RGBYW"]
+	return HanabiGame([None] * num_players, deck=deck)
+
+
+def test_clue_to_yourself_is_valid():
+	game = make_game()
+	positions = "".join(str(i + 1) for i, card in enumerate(game.hands[0]) if card.color == game.hands[0][0].color)
+	assert game.validate_move(0, f"C1C{game.hands[0][0].color}{positions}")
+
+
+def test_zero_card_index_addresses_the_last_card():
+	game = make_game()
+	last = game.hands[0][-1]
+	assert game.validate_move(0, "P0")
+	assert not game.validate_move(0, "D0") # no token to regain
+	game.execute_move(0, "P0")
+	assert last not in game.hands[0]
+	assert game.play_area[last.color] == 1 or last in game.discard_pile
+
+
+def test_zero_clue_target_is_the_last_player():
+	game = make_game()
+	card = game.hands[-1][0]
+	positions = "".join(str(i + 1) for i, c in enumerate(game.hands[-1]) if c.number == card.number)
+	assert game.validate_move(0, f"C0N{card.number}{positions}")
+
+
+def test_malformed_moves_are_invalid():
+	game = make_game()
+	for move in ["", "P", "P12", "P5", "C2", "C9CR1", "C2N9", "X1", "ERROR"]:
+		assert not game.validate_move(0, move), move
+
+
+def test_render_after_undo_shows_the_new_discard():
+	game = make_game()
+	game.info_tokens = 7
+	first, second = game.hands[0][0], game.hands[0][1]
+	game.apply("D1")
+	assert f"{first.color}{first.number}" in game.get_game_state(1, 1)
+	game.undo()
+	game.apply("D2")
+	state = game.get_game_state(1, 1)
+	discard_pile = state.split("Discard pile:\n")[1].split("\n")[0]
+	assert discard_pile == f"{second.color}{second.number}"
+
+
+def test_undo_all_restores_the_rendered_state():
+	game = make_game(4)
+	game.info_tokens = 7
+	before = [game.get_game_state(p, 0) for p in range(4)]
+	for move in ["D1", "P1", "D2", "P2"]:
+		game.apply(move)
+		game.get_game_state(0, game.current_player)
+	game.undo_all()
+	assert [game.get_game_state(p, 0) for p in range(4)] == before
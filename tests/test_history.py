@@ -0,0 +1,77 @@
+import random
+from typing import List
+from hanabi.context import estimate_tokens
+from hanabi.game import HanabiGame
+from stubs import StubPlayer
+
+
+# seed 26 is one of the longer random games, 8 turns per seat
+def play(context: str, seed: int = 26) -> List[StubPlayer]:
+	players = [StubPlayer(rng=random.Random(seat), context=context) for seat in range(4)]
+	HanabiGame(players, rng=random.Random(seed)).play_game(verbosity=0)
+	return players
+
+
+def user_prompts(messages) -> List[str]:
+	return [m["content"] for m in messages if m["role"] == "user"]
+
+
+def test_summary_is_the_board_and_stays_bounded():
+	players = [StubPlayer(rng=random.Random(seat), context="compact:2") for seat in range(4)]
+	game = HanabiGame(players, rng=random.Random(1))
+	game.play_game(verbosity=0)
+
+	summaries = [game.log.summarize(end) for end in range(1, len(game.log) + 1)]
+	assert game.log.summarize(0) == ""
+	assert all("Turn" not in summary.split("\n", 1)[1] for summary in summaries) # no list of moves
+	assert max(len(s) for s in summaries) < 400
+	last = summaries[-1]
+	assert game.renderer.status_line() in last
+	for card in game.discard_pile:
+		assert f"{card.color}{card.number}" in last
+
+
+def test_full_context_sends_everything():
+	player = play("full")[0]
+	for turn, sent in enumerate(player.sent):
+		assert len(user_prompts(sent)) == turn + 1
+	calls = [call for calls in player.turn_calls for call in calls]
+	assert all(call["context_tokens"] == call["sent_context_tokens"] for call in calls)
+
+
+def test_window_sends_the_last_turns():
+	player = play("window:2")[0]
+	prompts = user_prompts(player.messages)
+	for turn, sent in enumerate(player.sent):
+		assert sent[0]["role"] == "system"
+		assert user_prompts(sent) == prompts[max(0, turn - 1):turn + 1]
+	calls = [call for calls in player.turn_calls for call in calls]
+	assert calls[-1]["sent_context_tokens"] < calls[-1]["context_tokens"]
+
+
+def test_compact_prepends_the_summary_to_the_window():
+	player = play("compact:2")[0]
+	prompts = user_prompts(player.messages)
+	for turn, sent in enumerate(player.sent):
+		kept = user_prompts(sent)
+		assert len(kept) == min(turn + 1, 2)
+		if turn < 2:
+			assert kept == prompts[:turn + 1]
+			continue
+		summary, prompt = kept[0].split("\n", 1)[0], kept[0]
+		assert summary.startswith("<-------- Summary of turns 0-")
+		assert "Play area:" in prompt and prompt.endswith(prompts[turn - 1])
+		assert kept[1] == prompts[turn]
+
+
+def test_budget_drops_the_oldest_turns():
+	budget = 1500
+	player = play(f"budget:{budget}")[0]
+	prompts = user_prompts(player.messages)
+	dropped = 0
+	for turn, sent in enumerate(player.sent):
+		kept = user_prompts(sent)
+		assert kept == prompts[turn + 1 - len(kept):turn + 1] # the most recent turns
+		assert estimate_tokens(sent[1:]) <= budget or len(kept) == 1
+		dropped += len(kept) < turn + 1
+	assert dropped
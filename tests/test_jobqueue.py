@@ -0,0 +1,75 @@
+import random
+import time
+import pytest
+from hanabi.game import HanabiGame
+from hanabi.jobqueue import Heartbeat, JobQueue, LeaseLost
+from hanabi.players import RandomPlayer
+
+
+def job(run: int = 0):
+	return {"experiment_id": 1, "run": run, "provider": "test", "model": "random", "args": {"cot": 0}}
+
+
+@pytest.fixture
+def queue(tmp_path):
+	queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+	yield queue
+	queue.close()
+
+
+def test_expired_lease_is_taken_over_and_the_first_worker_stops(queue):
+	queue.enqueue([job()])
+	first = queue.claim("a", lease=0.05)
+	with Heartbeat(queue, first, "a", lease=0.05) as heartbeat:
+		heartbeat._stop.set() # the heartbeat thread hangs, e.g. the host is suspended
+		time.sleep(0.1)
+		second = queue.claim("b", lease=60)
+		assert second.job_id == first.job_id and second.attempts == 2
+		with pytest.raises(LeaseLost):
+			heartbeat.check()
+
+	turns = []
+	game = HanabiGame([RandomPlayer(random.Random(seat)) for seat in range(3)], rng=random.Random(0))
+	def before_turn():
+		turns.append(game.turns_played)
+		if len(turns) > 3:
+			heartbeat.check()
+	with pytest.raises(LeaseLost):
+		game.play_game(verbosity=0, before_turn=before_turn)
+	assert game.turns_played == 3
+
+
+def test_heartbeat_keeps_the_lease(queue):
+	queue.enqueue([job()])
+	claimed = queue.claim("a", lease=0.3)
+	with Heartbeat(queue, claimed, "a", lease=0.3) as heartbeat:
+		time.sleep(0.5)
+		assert queue.claim("b", lease=60) is None
+		heartbeat.check()
+
+
+def test_a_stuck_game_stops_renewing_its_lease(queue):
+	queue.enqueue([job()])
+	claimed = queue.claim("a", lease=0.1)
+	with Heartbeat(queue, claimed, "a", lease=0.1, stall_leases=2) as heartbeat:
+		for _ in range(5): # turns keep coming, the lease is kept
+			time.sleep(0.1)
+			heartbeat.check()
+		assert queue.claim("b", lease=60) is None
+		time.sleep(0.5) # stuck in a turn, e.g. on a request without a timeout
+		assert heartbeat.stalled
+		assert queue.claim("b", lease=60).job_id == claimed.job_id
+		with pytest.raises(LeaseLost, match="no progress"):
+			heartbeat.check()
+
+
+def test_job_that_keeps_losing_its_worker_fails_after_max_attempts(tmp_path):
+	queue = JobQueue(str(tmp_path / "jobs.sqlite"), max_attempts=2)
+	queue.enqueue([job()])
+	assert queue.claim("a", lease=0.01).attempts == 1
+	time.sleep(0.02)
+	assert queue.claim("b", lease=0.01).attempts == 2
+	time.sleep(0.02)
+	assert queue.claim("c", lease=0.01) is None
+	assert queue.counts()["failed"] == 1
+	queue.close()
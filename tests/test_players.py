@@ -0,0 +1,80 @@
+from typing import Any, Dict, Iterator
+from hanabi.actions import extract_move
+from hanabi.cache import ResponseCache
+from hanabi.players import Chunk, LLMPlayer
+
+
+class StreamingPlayer(LLMPlayer):
+	"""Streams a fixed reply in small chunks, with the usage in a last chunk as the OpenAI API does."""
+	conversation_start = 1
+
+	def __init__(self, reply: str, stream: bool = True):
+		super().__init__(stream=stream)
+		self.model = "stub"
+		self.reply = reply
+		self._load_prompts()
+		self.messages = [{"role": "system", "content": self.system_prompt}]
+
+	def _build_request(self, content: str, final: bool) -> Dict[str, Any]:
+		self.messages.append({"role": "user", "content": content})
+		return {"model": self.model, "messages": self._context_messages()}
+
+	def _send(self, request: Dict[str, Any]) -> str:
+		return self.reply
+
+	async def _send_async(self, request: Dict[str, Any]) -> str:
+		return self.reply
+
+	def _send_stream(self, request: Dict[str, Any]) -> Iterator[Chunk]:
+		for i in range(0, len(self.reply), 3):
+			yield self.reply[i:i + 3], None
+		yield "", {"prompt_tokens": 1000, "completion_tokens": 50}
+
+	def _parse(self, response: str) -> str:
+		return response
+
+	def _usage(self, response: str) -> Dict[str, int]:
+		return {"prompt_tokens": 1000, "completion_tokens": 50}
+
+
+def test_extract_move_prefers_the_last_move_of_a_complete_reply():
+	assert extract_move("I considered P1 but will D3") == "D3"
+	assert extract_move("I'll play P2.") == "P2"
+	assert extract_move("no move here") is None
+	assert extract_move("P1 then D3", complete=False) == "P1"
+	assert extract_move("C2N1", complete=False) is None # more positions may follow
+
+
+def test_streams_closed_at_the_move_estimate_their_usage():
+	player = StreamingPlayer("P2 because it is safe, then maybe D1")
+	player._expect_move = True
+	player.turn_calls.append([])
+	call = player._new_call()
+	output = player._request({"model": "stub", "messages": []}, call)
+	assert output == "P2"
+	assert call["usage_estimated"] and call["prompt_tokens"] > 0 and call["completion_tokens"] == 1
+
+
+def test_streams_read_to_the_end_keep_the_reported_usage():
+	player = StreamingPlayer("Thinking about it")
+	player._expect_move = False
+	player.turn_calls.append([])
+	call = player._new_call()
+	assert player._request({"model": "stub", "messages": []}, call) == "Thinking about it"
+	assert not call["usage_estimated"] and (call["prompt_tokens"], call["completion_tokens"]) == (1000, 50)
+
+
+def test_streamed_play_outputs_are_cached_apart_from_complete_ones(tmp_path):
+	cache = ResponseCache(str(tmp_path / "cache.sqlite"), mode="record")
+	reply = "P1 is risky, so D3"
+	outputs = {}
+	for stream in (True, False, True):
+		player = StreamingPlayer(reply, stream=stream)
+		player.cache = cache
+		player._expect_move = True
+		player.turn_calls.append([])
+		call = player._new_call()
+		outputs.setdefault(stream, []).append((player._complete({"model": "stub", "messages": []}, call), call["cached"]))
+	assert outputs[True] == [("P1", False), ("P1", True)] # closed at the first move
+	assert outputs[False] == [(reply, False)] # not the truncated output
+	cache.close()
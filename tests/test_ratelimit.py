@@ -0,0 +1,24 @@
+import pytest
+from hanabi.ratelimit import is_provider_error
+
+
+class APIStatusError(Exception):
+	def __init__(self, status_code: int):
+		super().__init__(f"status {status_code}")
+		self.status_code = status_code
+
+
+@pytest.mark.parametrize("status", [401, 403, 408, 429, 500, 502, 503, 529])
+def test_outages_and_auth_errors_stop_the_game(status):
+	assert is_provider_error(APIStatusError(status))
+
+
+@pytest.mark.parametrize("status", [400, 404, 413, 422])
+def test_other_client_errors_are_invalid_moves(status):
+	assert not is_provider_error(APIStatusError(status)) # e.g. context length exceeded, fails the same on every retry
+
+
+def test_network_errors_stop_the_game():
+	assert is_provider_error(ConnectionError("reset"))
+	assert is_provider_error(TimeoutError())
+	assert not is_provider_error(ValueError("no move in the output"))
@@ -0,0 +1,87 @@
+import sqlite3
+import pytest
+from hanabi.results import ResultsStore
+from hanabi.sequential import score_interval
+
+
+def add(store: ResultsStore, deck_seed: str = "1:0", **kwargs) -> bool:
+	return store.add_game(1, "test", "random", "{'cot': 0}", 30, 5, deck_seed=deck_seed, **kwargs)
+
+
+def test_replayed_decks_are_stored(tmp_path):
+	store = ResultsStore(str(tmp_path / "results.sqlite"))
+	assert add(store) and add(store) # e.g. --experiment-id reused to replay the same decks
+	assert len(store.games()) == 2
+	store.close()
+
+
+def test_a_job_is_stored_once(tmp_path):
+	store = ResultsStore(str(tmp_path / "results.sqlite"))
+	assert add(store, job_key="a")
+	assert not add(store, job_key="a") # another worker finished the same job
+	assert add(store, deck_seed="1:1", job_key="b")
+	assert len(store.games()) == 2
+	assert store.summary()[0]["num_games"] == 2
+	store.close()
+
+
+def test_older_stores_are_migrated(tmp_path):
+	path = str(tmp_path / "results.sqlite")
+	db = sqlite3.connect(path)
+	db.execute(
+		"CREATE TABLE games (id INTEGER PRIMARY KEY AUTOINCREMENT, experiment_id INTEGER NOT NULL, provider TEXT NOT NULL, "
+		"model TEXT NOT NULL, args TEXT NOT NULL, timestamp TEXT NOT NULL, turns_played INTEGER NOT NULL, score INTEGER NOT NULL)"
+	)
+	db.commit()
+	db.close()
+	store = ResultsStore(path)
+	assert add(store, job_key="a") and not add(store, job_key="a")
+	store.close()
+
+
+def test_replays_are_left_out_of_the_summary(tmp_path):
+	store = ResultsStore(str(tmp_path / "results.sqlite"))
+	store.allocate_experiments([("test", "random", "{'cot': 0}")], first_id=1)
+	assert store.allocate_experiments([("test", "random", "{'cot': 0}")], first_id=1) == [1]
+	for score in (4, 6):
+		store.add_game(1, "test", "random", "{'cot': 0}", 30, score, deck_seed="1:0")
+	store.add_game(1, "test", "random", "{'cot': 0}", 30, 8, deck_seed="1:1")
+	row, = store.summary()
+	assert (row["num_games"], row["avg_score"], row["score_histogram"]) == (2, 6.0, "4:1 8:1")
+	assert len(store.games()) == 3
+	store.close()
+
+
+def test_an_experiment_id_is_not_reused_for_another_config(tmp_path):
+	store = ResultsStore(str(tmp_path / "results.sqlite"))
+	store.allocate_experiments([("test", "random", "{'cot': 0}")])
+	with pytest.raises(ValueError):
+		store.allocate_experiments([("test", "other", "{'cot': 0}")], first_id=1)
+	assert store.allocate_experiments([("test", "other", "{'cot': 0}")]) == [2]
+	store.close()
+
+
+def test_few_games_get_t_intervals_and_no_p_values(tmp_path):
+	store = ResultsStore(str(tmp_path / "results.sqlite"))
+	for config, scores in (("random", [11, 14, 14]), ("other", [5] * 10 + [7] * 10)):
+		experiment_id, = store.allocate_experiments([("test", config, "{}")])
+		for run, score in enumerate(scores):
+			store.add_game(experiment_id, "test", config, "{}", 30, score, deck_seed=f"{experiment_id}:{run}")
+	summary, comparisons = store.leaderboard()
+	few, many = summary
+	mean, half_width = score_interval([11, 14, 14])
+	assert (few["score_ci_low"], few["score_ci_high"]) == (round(mean - half_width, 4), round(mean + half_width, 4))
+	assert few["p_vs_next"] is None and comparisons[0]["p_value"] is None
+	assert 5.5 < many["score_ci_low"] < 6 < many["score_ci_high"] < 6.5 # bootstrap
+	store.close()
+
+
+def test_context_saving_is_summarized(tmp_path):
+	store = ResultsStore(str(tmp_path / "results.sqlite"))
+	calls = [
+		{"call": 0, "retries": 0, "cached": False, "context_tokens": full, "sent_context_tokens": sent}
+		for full, sent in ((100, 100), (300, 100))
+	]
+	store.add_game(1, "test", "random", "{}", 30, 5, calls=calls)
+	assert store.summary()[0]["context_saving"] == 0.5
+	store.close()
@@ -0,0 +1,6 @@
+from hanabi.stats import holm_adjust
+
+
+def test_holm_adjust():
+	assert list(holm_adjust([0.01, 0.04, 0.03])) == [0.03, 0.06, 0.06]
+	assert list(holm_adjust([0.5, 0.9])) == [1.0, 1.0]
@@ -0,0 +1,15 @@
+import random
+import pytest
+from hanabi.game import HanabiGame
+from hanabi.players import RandomPlayer
+from hanabi.trajectory import TrajectoryReplay, build_trajectory
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_trajectories_replay_the_game(seed):
+	game = HanabiGame([RandomPlayer(random.Random(f"{seed}:{seat}")) for seat in range(3)], rng=random.Random(seed))
+	game.play_game(verbosity=0)
+	record, _ = build_trajectory(game)
+	assert all(isinstance(move, int) for move in record["moves"]) # clues included
+	final = TrajectoryReplay(record).final_state()
+	assert (final.play_area, final.lives, final.info_tokens, final.turns_played) == (game.play_area, game.lives, game.info_tokens, game.turns_played)
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from hanabi.game import HanabiGame, code_to_card
+from hanabi.vector import VectorHanabiEnv
+
+NUM_GAMES = 40
+
+
+def assert_same_state(env: VectorHanabiEnv, g: int, game: HanabiGame):
+	assert env.fireworks[g].tolist() == game.fireworks.tolist()
+	assert env.discard_counts[g].tolist() == game.discard_counts.reshape(-1).tolist()
+	assert env.hands[g].tolist() == game.hand_codes.tolist()
+	assert env.lives[g] == game.lives
+	assert env.info_tokens[g] == game.info_tokens
+	assert env.deck_size[g] == len(game.deck)
+	assert env.turns_played[g] == game.turns_played
+	assert env.current_player[g] == game.current_player
+	assert env.scores[g] == sum(game.play_area.values())
+	assert env.done[g] == game.is_over()
+
+
+@pytest.mark.parametrize("num_players", [2, 3, 4, 5])
+@pytest.mark.parametrize("invalid_rate", [0.0, 0.2])
+def test_vector_env_matches_engine(num_players, invalid_rate):
+	rng = np.random.default_rng(num_players)
+	env = VectorHanabiEnv(NUM_GAMES, num_players=num_players, seed=num_players)
+	games = [HanabiGame([None] * num_players, deck=[code_to_card(int(c)) for c in env.deck[g]]) for g in range(NUM_GAMES)]
+	for g, game in enumerate(games):
+		assert_same_state(env, g, game)
+
+	while not env.done.all():
+		mask = env.legal_moves()
+		for g, game in enumerate(games):
+			if not env.done[g]:
+				legal = game.legal_moves(game.current_player)
+				assert mask[g].nonzero()[0].tolist() == [a for a in range(env.num_actions) if legal >> a & 1]
+
+		actions = env.random_actions(rng)
+		# some uniformly random actions, legal or not (an invalid one costs a life)
+		random = rng.random(NUM_GAMES) < invalid_rate
+		actions[random] = rng.integers(0, env.num_actions, random.sum())
+		moves = [env.decode_action(g, a) for g, a in enumerate(actions)]
+		was_done = env.done.copy()
+		env.step(actions)
+		for g, game in enumerate(games):
+			if not was_done[g]:
+				game.execute_move(game.current_player, moves[g])
+				game.current_player = (game.current_player + 1) % num_players
+			assert_same_state(env, g, game)
+
+
+def test_out_of_range_actions_cost_a_life():
+	env = VectorHanabiEnv(2, num_players=3, seed=0)
+	game = HanabiGame([None] * 3, deck=[code_to_card(int(c)) for c in env.deck[0]])
+	env.step(np.array([-1, env.num_actions]))
+	game.execute_move(0, "INVALID")
+	game.current_player = 1
+	assert_same_state(env, 0, game)
+	assert env.lives.tolist() == [2, 2]
+
+
+def test_clues_encode_only_with_their_positions():
+	env = VectorHanabiEnv(1, num_players=3, seed=0)
+	game = HanabiGame([None] * 3, deck=[code_to_card(int(c)) for c in env.deck[0]])
+	for action in range(8, env.num_actions):
+		move = env.decode_action(0, action)
+		if move[4:]: # the clue touches some card
+			assert env.encode_move(0, move) == action
+			assert env.encode_move(0, move[:4] + move[4:][::-1]) == action # positions in any order
+			wrong = move[:4] + "".join(str(p) for p in range(1, 5) if str(p) not in move[4:])
+			if wrong[4:]:
+				assert env.encode_move(0, wrong) == -1
+				assert not game.validate_move(0, wrong) # the engine takes a life for it as well